@@ -22,10 +22,18 @@ __version__ = "1.0.0"
 __author__ = "ML Engineering Team"
 __email__ = "ml-team@example.com"
 
-# Експортуємо основні компоненти для зручності імпорту
-from app.main import app
+# Експортуємо основні компоненти для зручності імпорту.
+# FastAPI app імпортується ліниво: дочірні процеси обробки документів
+# (spawn) імпортують пакет app, але не мають створювати весь додаток
 from app.config import settings
 
+
+def __getattr__(name):
+    if name == "app":
+        from app.main import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = ["app", "settings", "__version__"]
 
 # ================================================================
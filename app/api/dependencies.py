@@ -18,18 +18,40 @@ FastAPI виступає як service locator, який автоматично 
 та ін'єктує потрібні залежності в endpoints.
 """
 
+import asyncio
+import hashlib
 import logging
 import time
-from typing import Optional, Dict, Any, Annotated
-from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from secrets import token_hex as _token_hex
+from typing import Optional, Dict, Any, Annotated, Callable, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba опціональна - без неї kernel працює як чистий Python
+    njit = None
 
 from fastapi import Depends, HTTPException, Request, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis опціональний - без нього працює in-memory limiter
+    aioredis = None
+
+try:
+    from prometheus_client import Histogram
+except ImportError:  # prometheus_client опціональний - без нього метрики лише в логах
+    Histogram = None
 
 from app.config import settings
 from app.services.search_service import search_service
 from app.services.embedding_service import embedding_service
 from app.services.vector_store import vector_store
+from app.utils.logger import LazyLogData
 from app.utils.exceptions import (
     DocumentSearchException, 
     ServiceInitializationError,
@@ -39,9 +61,6 @@ from app.utils.exceptions import (
 
 logger = logging.getLogger(__name__)
 
-# Security scheme для майбутнього додавання автентифікації
-security = HTTPBearer(auto_error=False)
-
 
 class RequestContext:
     """
@@ -59,11 +78,27 @@ class RequestContext:
     
     def __init__(self, request: Request):
         self.request = request
-        self.start_time = time.time()
+        self.start_time = time.time()  # Wall clock - для логів/аудиту
+        self._start_ns = time.monotonic_ns()  # Monotonic - для вимірювання тривалості
         self.request_id = self._generate_request_id()
-        self.client_ip = self._get_client_ip()
-        self.user_agent = request.headers.get("user-agent", "unknown")
-        self.correlation_id = request.headers.get("x-correlation-id")
+        
+        # Всі потрібні headers читаємо один раз - кожен get() у Starlette
+        # це лінійний пошук по списку headers
+        headers = request.headers
+        self.user_agent = headers.get("user-agent", "unknown")
+        self.correlation_id = headers.get("x-correlation-id")
+        self.client_ip = self._get_client_ip(
+            headers.get("x-forwarded-for"),
+            headers.get("x-real-ip")
+        )
+        
+        # Незмінна частина лог контексту будується один раз на запит
+        self._log_identity = {
+            "request_id": self.request_id,
+            "correlation_id": self.correlation_id,
+            "client_ip": self.client_ip,
+            "user_agent": self.user_agent
+        }
         
         # User context (заповнюється при автентифікації)
         self.user_id: Optional[str] = None
@@ -71,20 +106,22 @@ class RequestContext:
         
         # Request metrics
         self.metrics: Dict[str, Any] = {}
+        
+        # Чи вже врахований запит rate limiter'ом (middleware або dependency)
+        self.rate_limit_checked = False
     
     def _generate_request_id(self) -> str:
-        """Генерує унікальний ідентифікатор запиту."""
-        import uuid
-        return str(uuid.uuid4())[:8]
+        """Генерує унікальний ідентифікатор запиту (8 hex символів)."""
+        return _token_hex(4)
     
-    def _get_client_ip(self) -> str:
+    def _get_client_ip(self, forwarded_for: Optional[str], real_ip: Optional[str]) -> str:
         """Витягує IP адресу клієнта з урахуванням proxy."""
-        # Перевіряємо headers від reverse proxy
-        forwarded_for = self.request.headers.get("x-forwarded-for")
+        # Перевіряємо headers від reverse proxy.
+        # Перший елемент X-Forwarded-For - оригінальний клієнт; partition
+        # не будує список з усіх proxy в ланцюжку.
         if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
+            return forwarded_for.partition(",")[0].strip()
         
-        real_ip = self.request.headers.get("x-real-ip")
         if real_ip:
             return real_ip
         
@@ -100,15 +137,18 @@ class RequestContext:
     
     def get_duration_ms(self) -> float:
         """Повертає тривалість запиту в мілісекундах."""
-        return (time.time() - self.start_time) * 1000
+        return (time.monotonic_ns() - self._start_ns) / 1e6
     
     def to_log_dict(self) -> Dict[str, Any]:
-        """Конвертує контекст в словник для логування."""
+        """
+        Конвертує контекст в словник для логування.
+        
+        Викликається для кожного лог запису, тому в endpoints передається
+        як LazyLogData(context.to_log_dict) - словник будується тільки
+        якщо запис реально форматується.
+        """
         return {
-            "request_id": self.request_id,
-            "correlation_id": self.correlation_id,
-            "client_ip": self.client_ip,
-            "user_agent": self.user_agent,
+            **self._log_identity,
             "user_id": self.user_id,
             "duration_ms": self.get_duration_ms(),
             "metrics": self.metrics
@@ -117,6 +157,20 @@ class RequestContext:
 
 # === Базові залежності ===
 
+def _request_started_log_data(context: RequestContext) -> Dict[str, Any]:
+    """Структуровані дані для логу початку запиту."""
+    request = context.request
+    data = {
+        "request_context": context.to_log_dict(),
+        "request_method": request.scope["method"],
+        "request_path": request.scope["path"]
+    }
+    # Query params копіюємо тільки для DEBUG - на INFO це зайва алокація
+    if logger.isEnabledFor(logging.DEBUG):
+        data["query_params"] = dict(request.query_params)
+    return data
+
+
 def get_request_context(request: Request) -> RequestContext:
     """
     Dependency для отримання контексту запиту.
@@ -124,127 +178,234 @@ def get_request_context(request: Request) -> RequestContext:
     Ця залежність автоматично створює та ін'єктує RequestContext
     в будь-який endpoint, який її потребує.
     
+    Контекст зберігається в `request.state.ctx`, тому всі залежності
+    та хелпери одного запиту (check_rate_limit, get_current_user, тощо)
+    отримують той самий об'єкт без повторного читання headers.
+    
     Usage:
     @app.get("/search")
     def search(context: RequestContext = Depends(get_request_context)):
         logger.info(f"Request from {context.client_ip}")
     """
+    context = getattr(request.state, "ctx", None)
+    if context is not None:
+        return context
+    
     context = RequestContext(request)
+    request.state.ctx = context
     
-    # Логуємо початок обробки запиту
-    logger.info(
-        f"Request started: {request.method} {request.url.path}",
-        extra={
-            "extra_data": {
-                "request_context": context.to_log_dict(),
-                "request_method": request.method,
-                "request_path": str(request.url.path),
-                "query_params": dict(request.query_params)
-            }
-        }
-    )
+    # Логуємо початок обробки запиту. Дані для логу будуються ліниво -
+    # тільки якщо запис дійде до форматера.
+    if logger.isEnabledFor(logging.INFO):
+        scope = request.scope
+        logger.info(
+            "event=request_started method=%s path=%s", scope["method"], scope["path"],
+            extra={"extra_data": LazyLogData(lambda: _request_started_log_data(context))}
+        )
     
     return context
 
 
 # === Сервісні залежності ===
 
-def get_search_service():
+@dataclass
+class HealthCache:
     """
-    Dependency для отримання search service.
+    Результат останньої перевірки здоров'я сервісу.
     
-    Перевіряє що сервіс правильно ініціалізований перед використанням.
-    Якщо сервіс недоступний - кидає HTTP 503 (Service Unavailable).
+    Перевірки здоров'я звертаються до векторної БД та ML моделі,
+    тому виконувати їх на кожен запит занадто дорого. Результат
+    зберігається на `_HEALTH_TTL` секунд і повторно використовується.
     """
-    try:
-        # Перевіряємо базову працездатність сервісу
-        stats = search_service.get_document_stats()
-        if not stats.get("system_health", {}).get("vector_db_healthy", False):
-            logger.error("Search service health check failed: vector DB unhealthy")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Search service is temporarily unavailable"
-            )
-        
-        return search_service
-        
-    except DocumentSearchException as e:
-        log_exception(logger, e, context={"dependency": "search_service"})
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=e.get_user_message()
-        )
-    except Exception as e:
-        logger.error(f"Unexpected error in search service dependency: {str(e)}")
+    ts: float = 0.0
+    healthy: bool = False
+    detail: Optional[str] = None
+
+
+# TTL кешу перевірок здоров'я (секунди, за monotonic годинником)
+_HEALTH_TTL = 5.0
+
+# Кеш результатів перевірок, ключ - назва сервісу.
+# Новий сервіс додається простим викликом _ensure_healthy з новим ключем.
+_health_cache: Dict[str, HealthCache] = {}
+_health_lock = asyncio.Lock()
+
+
+def _is_fresh(cache: Optional[HealthCache]) -> bool:
+    """Перевіряє чи закешований результат ще актуальний."""
+    return cache is not None and time.monotonic() - cache.ts < _HEALTH_TTL
+
+
+def _raise_if_unhealthy(cache: HealthCache) -> None:
+    """Кидає HTTP 503 якщо закешований результат негативний."""
+    if not cache.healthy:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Search service initialization failed"
+            detail=cache.detail
         )
 
 
-def get_embedding_service():
+async def _ensure_healthy(
+    service_name: str,
+    probe: Callable[[], bool],
+    unhealthy_detail: str,
+    failure_detail: str
+) -> None:
     """
-    Dependency для отримання embedding service.
+    Перевіряє здоров'я сервісу з TTL кешуванням результату.
     
-    Перевіряє що ML модель завантажена та готова до роботи.
+    Fast path не бере lock і не викликає probe - так проходить
+    переважна більшість запитів. Реальна перевірка виконується
+    не частіше ніж раз на `_HEALTH_TTL` секунд; негативний результат
+    теж кешується, щоб не перевантажувати недоступний сервіс.
     """
-    try:
-        model_info = embedding_service.get_model_info()
-        if not model_info.get("loaded", False):
-            logger.error("Embedding service health check failed: model not loaded")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="AI model is not ready. Please try again later."
-            )
+    cache = _health_cache.get(service_name)
+    if _is_fresh(cache):
+        _raise_if_unhealthy(cache)
+        return
+    
+    async with _health_lock:
+        # Інший запит міг оновити кеш поки ми чекали на lock
+        cache = _health_cache.get(service_name)
+        if _is_fresh(cache):
+            _raise_if_unhealthy(cache)
+            return
         
-        return embedding_service
+        try:
+            # Probe звертається до БД/моделі синхронно - виносимо з event loop
+            healthy = bool(await run_in_threadpool(probe))
+            detail = None if healthy else unhealthy_detail
+            if not healthy:
+                logger.error(f"{service_name} health check failed")
+        except DocumentSearchException as e:
+            log_exception(logger, e, context={"dependency": service_name})
+            healthy, detail = False, e.get_user_message()
+        except Exception as e:
+            logger.error(f"Unexpected error in {service_name} dependency: {str(e)}")
+            healthy, detail = False, failure_detail
         
-    except DocumentSearchException as e:
-        log_exception(logger, e, context={"dependency": "embedding_service"})
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=e.get_user_message()
-        )
-    except Exception as e:
-        logger.error(f"Unexpected error in embedding service dependency: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="AI service is temporarily unavailable"
-        )
+        cache = HealthCache(ts=time.monotonic(), healthy=healthy, detail=detail)
+        _health_cache[service_name] = cache
+    
+    _raise_if_unhealthy(cache)
+
+
+def _search_service_probe() -> bool:
+    """Search service здоровий якщо доступна векторна БД."""
+    stats = search_service.get_document_stats()
+    return stats.get("system_health", {}).get("vector_db_healthy", False)
+
+
+def _embedding_service_probe() -> bool:
+    """Embedding service здоровий якщо ML модель завантажена."""
+    return embedding_service.get_model_info().get("loaded", False)
+
+
+async def get_search_service():
+    """
+    Dependency для отримання search service.
+    
+    Перевіряє що сервіс правильно ініціалізований перед використанням.
+    Якщо сервіс недоступний - кидає HTTP 503 (Service Unavailable).
+    """
+    await _ensure_healthy(
+        "search_service",
+        _search_service_probe,
+        unhealthy_detail="Search service is temporarily unavailable",
+        failure_detail="Search service initialization failed"
+    )
+    return search_service
+
+
+async def get_embedding_service():
+    """
+    Dependency для отримання embedding service.
+    
+    Перевіряє що ML модель завантажена та готова до роботи.
+    """
+    await _ensure_healthy(
+        "embedding_service",
+        _embedding_service_probe,
+        unhealthy_detail="AI model is not ready. Please try again later.",
+        failure_detail="AI service is temporarily unavailable"
+    )
+    return embedding_service
 
 
-def get_vector_store():
+async def get_vector_store():
     """
     Dependency для отримання vector store service.
     
     Перевіряє підключення до векторної бази даних.
     """
-    try:
-        if not vector_store.health_check():
-            logger.error("Vector store health check failed")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database is temporarily unavailable"
-            )
-        
-        return vector_store
-        
-    except DocumentSearchException as e:
-        log_exception(logger, e, context={"dependency": "vector_store"})
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=e.get_user_message()
-        )
-    except Exception as e:
-        logger.error(f"Unexpected error in vector store dependency: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Database connection failed"
-        )
+    await _ensure_healthy(
+        "vector_store",
+        vector_store.health_check,
+        unhealthy_detail="Database is temporarily unavailable",
+        failure_detail="Database connection failed"
+    )
+    return vector_store
 
 
 # === Rate Limiting та Security ===
 
+def _maybe_njit(func):
+    """numba.njit для гарячих числових функцій, якщо numba встановлена."""
+    if njit is None:
+        return func
+    return njit(cache=True, nogil=True)(func)
+
+
+@_maybe_njit
+def _rate_limit_kernel(ids, counts, starts, key, home, now, max_requests, window_seconds, probe_window):
+    """
+    Token bucket перевірка над SoA масивами RateLimiter.
+    
+    Тільки скалярна арифметика по preallocated масивах - без алокацій
+    об'єктів, тому з numba (nogil) виконується поза GIL. Без numba
+    працює як звичайна Python функція з тією ж семантикою.
+    
+    Returns:
+        (allowed, remaining)
+    """
+    mask = ids.shape[0] - 1
+    free = -1
+    oldest = 0
+    
+    for i in range(probe_window):
+        slot = (home + i) & mask
+        
+        if ids[slot] == key:
+            # Скидаємо лічильник якщо минуло вікно
+            if now - starts[slot] > window_seconds:
+                counts[slot] = 1
+                starts[slot] = now
+                return True, max_requests - 1
+            
+            # Перевіряємо ліміт
+            if counts[slot] >= max_requests:
+                return False, 0
+            
+            # Інкрементуємо лічильник
+            counts[slot] += 1
+            return True, max_requests - int(counts[slot])
+        
+        if free < 0 and (ids[slot] == 0 or now - starts[slot] > window_seconds):
+            free = i
+        
+        if starts[slot] < starts[(home + oldest) & mask]:
+            oldest = i
+    
+    # Новий клієнт: перший вільний/прострочений слот вікна (lazy eviction),
+    # а якщо все вікно зайняте активними клієнтами - витісняємо клієнта
+    # з найстаршим вікном: його лічильник найближчий до скидання
+    slot = (home + (free if free >= 0 else oldest)) & mask
+    ids[slot] = key
+    counts[slot] = 1
+    starts[slot] = now
+    return True, max_requests - 1
+
+
 class RateLimiter:
     """
     Simple in-memory rate limiter.
@@ -254,81 +415,220 @@ class RateLimiter:
     
     Архітектурний патерн: Token Bucket
     Кожен клієнт має "відро" з токенами, які поповнюються з фіксованою швидкістю.
+    
+    Стан клієнтів зберігається як Structure of Arrays - три паралельні
+    numpy масиви (хеш ідентифікатора, лічильник, початок вікна) з
+    open addressing по хешу client_id. Це замість dict-of-dicts дає
+    фіксований розмір пам'яті та відсутність resize при рості кількості IP.
+    
+    Пам'ять обмежена max_clients (округлюється до степеня двійки), тому
+    сканер чи DDoS з тисяч IP не роздуває RSS: прострочені слоти
+    перевикористовуються при пошуку, а при переповненні витісняється
+    клієнт з найстаршим вікном.
     """
     
-    def __init__(self, max_requests: int = 100, window_seconds: int = 60):
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        self.clients: Dict[str, Dict[str, Any]] = {}
+    # Кількість слотів, які перевіряються від "домашнього" слоту клієнта.
+    # Пошук завжди сканує все вікно, тому звільнення слотів не ламає ланцюжки.
+    _PROBE_WINDOW = 8
     
-    def is_allowed(self, client_id: str) -> bool:
-        """Перевіряє чи дозволений запит від клієнта."""
-        now = time.time()
+    # Як часто (в кількості викликів) прибирати прострочені слоти
+    _SWEEP_INTERVAL = 4096
+    
+    def __init__(self, max_requests: int = 100, window_seconds: int = 60, max_clients: int = 100_000):
+        if max_clients <= 0:
+            raise ValueError("RateLimiter max_clients must be positive")
         
-        if client_id not in self.clients:
-            self.clients[client_id] = {
-                "requests": 1,
-                "window_start": now
-            }
-            return True
+        # Open addressing через маску потребує розміру - степеня двійки
+        capacity = 1 << max(max_clients - 1, 1).bit_length()
         
-        client_data = self.clients[client_id]
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.max_clients = max_clients
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._probe_offsets = np.arange(self._PROBE_WINDOW, dtype=np.int64)
         
-        # Скидаємо лічильник якщо минуло вікно
-        if now - client_data["window_start"] > self.window_seconds:
-            client_data["requests"] = 1
-            client_data["window_start"] = now
-            return True
+        # 0 в _ids означає порожній слот
+        self._ids = np.zeros(capacity, dtype=np.uint64)
+        self._counts = np.zeros(capacity, dtype=np.uint32)
+        self._starts = np.zeros(capacity, dtype=np.float64)
+        self._calls = 0
         
-        # Перевіряємо ліміт
-        if client_data["requests"] >= self.max_requests:
-            return False
+        # Headers для 429 рахуються один раз: постійна частина та рядкові
+        # форми всіх можливих значень Remaining (0..max_requests)
+        self._static_headers = {
+            "Retry-After": str(window_seconds),
+            "X-RateLimit-Limit": str(max_requests)
+        }
+        self._remaining_strs = tuple(str(i) for i in range(max_requests + 1))
+    
+    @staticmethod
+    def _hash_client_id(client_id: str) -> np.uint64:
+        """64-бітний хеш ідентифікатора клієнта (ніколи не 0)."""
+        digest = hashlib.blake2b(client_id.encode("utf-8"), digest_size=8).digest()
+        return np.uint64(int.from_bytes(digest, "little") or 1)
+    
+    def _probe(self, key: np.uint64) -> np.ndarray:
+        """Індекси слотів вікна пошуку для заданого хешу."""
+        return ((int(key) & self._mask) + self._probe_offsets) & self._mask
+    
+    def _find_slot(self, key: np.uint64) -> Optional[int]:
+        """Повертає слот клієнта або None якщо клієнт не відстежується."""
+        idx = self._probe(key)
+        hit = np.flatnonzero(self._ids[idx] == key)
+        return int(idx[hit[0]]) if hit.size else None
+    
+    def sweep_expired(self, now: Optional[float] = None) -> int:
+        """Звільняє слоти клієнтів, чиє вікно вже минуло. Повертає їх кількість."""
+        now = time.time() if now is None else now
+        expired = (self._ids != 0) & (now - self._starts > self.window_seconds)
+        self._ids[expired] = 0
+        self._counts[expired] = 0
+        return int(np.count_nonzero(expired))
+    
+    def check(self, client_id: str) -> Tuple[bool, int]:
+        """Рахує запит клієнта. Повертає (дозволено, залишок запитів)."""
+        now = time.time()
         
-        # Інкрементуємо лічильник
-        client_data["requests"] += 1
-        return True
+        self._calls += 1
+        if self._calls % self._SWEEP_INTERVAL == 0:
+            self.sweep_expired(now)
+        
+        key = self._hash_client_id(client_id)
+        allowed, remaining = _rate_limit_kernel(
+            self._ids, self._counts, self._starts,
+            key, int(key) & self._mask, now,
+            self.max_requests, float(self.window_seconds), self._PROBE_WINDOW
+        )
+        return bool(allowed), int(remaining)
+    
+    def is_allowed(self, client_id: str) -> bool:
+        """Перевіряє чи дозволений запит від клієнта."""
+        return self.check(client_id)[0]
     
     def get_remaining(self, client_id: str) -> int:
         """Повертає кількість залишкових запитів."""
-        if client_id not in self.clients:
+        slot = self._find_slot(self._hash_client_id(client_id))
+        if slot is None:
             return self.max_requests
         
-        return max(0, self.max_requests - self.clients[client_id]["requests"])
+        return max(0, self.max_requests - int(self._counts[slot]))
+    
+    def rate_limit_headers(self, remaining: int) -> Dict[str, str]:
+        """Headers відповіді 429 без форматування чисел на кожну відмову."""
+        remaining = min(max(remaining, 0), self.max_requests)
+        return {**self._static_headers, "X-RateLimit-Remaining": self._remaining_strs[remaining]}
+
+
+# Лічильник вікна для одного клієнта: INCR + EXPIRE + залишок за один round-trip.
+# Атомарність гарантує Redis, тому ліміт коректний між усіма workers.
+_RATE_LIMIT_LUA = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return {current, tonumber(ARGV[1]) - current}
+"""
+
+
+class RedisRateLimiter:
+    """
+    Rate limiter на базі Redis, спільний для всіх процесів.
+    
+    In-memory RateLimiter живе в межах одного процесу, тому при
+    кількох uvicorn workers ефективний ліміт множиться на їх кількість.
+    Тут стан зберігається в Redis, а кожна перевірка - один EVALSHA.
+    """
+    
+    def __init__(self, redis_url: str, max_requests: int = 100, window_seconds: int = 60):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.client = aioredis.from_url(redis_url)
+        # register_script сам обробляє EVALSHA та fallback на EVAL при NOSCRIPT
+        self._script = self.client.register_script(_RATE_LIMIT_LUA)
+    
+    async def hit(self, client_id: str) -> Tuple[bool, int]:
+        """Рахує запит клієнта. Повертає (дозволено, залишок запитів)."""
+        current, remaining = await self._script(
+            keys=[f"rl:{client_id}"],
+            args=[self.max_requests, self.window_seconds]
+        )
+        return int(current) <= self.max_requests, max(0, int(remaining))
 
 
 # Глобальний rate limiter
-# В production це має бути Redis-based або вивантажено в окремий middleware
-_rate_limiter = RateLimiter(max_requests=100, window_seconds=60)
+# In-memory варіант також слугує fallback коли Redis недоступний
+_rate_limiter = RateLimiter(
+    max_requests=settings.max_requests_per_minute,
+    window_seconds=settings.rate_limit_window_seconds,
+    max_clients=settings.rate_limit_max_clients
+)
+
+_redis_rate_limiter: Optional[RedisRateLimiter] = None
+if settings.redis_url:
+    if aioredis is None:
+        logger.warning("REDIS_URL is set but redis package is not installed, using in-memory rate limiter")
+    else:
+        _redis_rate_limiter = RedisRateLimiter(
+            settings.redis_url,
+            max_requests=settings.max_requests_per_minute,
+            window_seconds=settings.rate_limit_window_seconds
+        )
+
+
+async def _consume_rate_limit(client_id: str) -> Tuple[bool, int]:
+    """Рахує запит через Redis, а при його недоступності - локально."""
+    if _redis_rate_limiter is not None:
+        try:
+            return await _redis_rate_limiter.hit(client_id)
+        except Exception as e:
+            logger.warning(f"Redis rate limiter unavailable, falling back to in-memory: {str(e)}")
+    
+    return _rate_limiter.check(client_id)
 
 
-def check_rate_limit(context: RequestContext = Depends(get_request_context)) -> None:
+async def check_rate_limit(context: RequestContext = Depends(get_request_context)) -> None:
     """
     Dependency для перевірки rate limiting.
     
+    Оголошена як async - перевірка не має I/O, тому FastAPI виконує її
+    прямо в event loop без диспетчеризації в threadpool.
+    
     Використовує IP адресу як ідентифікатор клієнта.
     В майбутньому можна замінити на user_id після автентифікації.
     """
+    # Запит вже врахований RequestContextMiddleware - не рахуємо вдруге
+    if context.rate_limit_checked:
+        return
+    context.rate_limit_checked = True
+    
     client_id = context.client_ip
+    allowed, remaining = await _consume_rate_limit(client_id)
     
-    if not _rate_limiter.is_allowed(client_id):
+    if not allowed:
         logger.warning(
             f"Rate limit exceeded for client {client_id}",
-            extra={"extra_data": context.to_log_dict()}
+            extra={"extra_data": LazyLogData(context.to_log_dict)}
         )
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many requests. Please slow down.",
-            headers={
-                "Retry-After": str(_rate_limiter.window_seconds),
-                "X-RateLimit-Limit": str(_rate_limiter.max_requests),
-                "X-RateLimit-Remaining": str(_rate_limiter.get_remaining(client_id))
-            }
+            headers=_rate_limiter.rate_limit_headers(remaining)
         )
 
 
 # === Валідаційні залежності ===
 
-def validate_search_limits(
+# Сталі тексти помилок валідації. Виключення створюється заново на кожен raise:
+# спільний екземпляр між конкурентними запитами перезаписував би
+# __context__/__cause__ і тримав би frames іншого запиту. Тіло відповіді
+# main.py все одно кешує за (status, detail).
+_DETAIL_LIMIT_TOO_SMALL = "Limit must be greater than 0"
+_DETAIL_LIMIT_TOO_LARGE = "Limit cannot exceed 100 results"
+_DETAIL_SCORE_THRESHOLD_RANGE = "Score threshold must be between 0.0 and 1.0"
+
+
+async def validate_search_limits(
     limit: Optional[int] = None,
     score_threshold: Optional[float] = None
 ) -> Dict[str, Any]:
@@ -343,15 +643,9 @@ def validate_search_limits(
     # Валідація limit
     if limit is not None:
         if limit <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Limit must be greater than 0"
-            )
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=_DETAIL_LIMIT_TOO_SMALL)
         if limit > 100:  # Максимальний ліміт для захисту системи
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Limit cannot exceed 100 results"
-            )
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=_DETAIL_LIMIT_TOO_LARGE)
         validated_params["limit"] = limit
     else:
         validated_params["limit"] = settings.default_limit
@@ -359,10 +653,7 @@ def validate_search_limits(
     # Валідація score_threshold
     if score_threshold is not None:
         if not 0.0 <= score_threshold <= 1.0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Score threshold must be between 0.0 and 1.0"
-            )
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=_DETAIL_SCORE_THRESHOLD_RANGE)
         validated_params["score_threshold"] = score_threshold
     else:
         validated_params["score_threshold"] = settings.similarity_threshold
@@ -372,23 +663,30 @@ def validate_search_limits(
 
 # === Автентифікація та авторизація (заготовка) ===
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    context: RequestContext = Depends(get_request_context)
-) -> Optional[Dict[str, Any]]:
+async def get_current_user(request: Request) -> Optional[Dict[str, Any]]:
     """
     Dependency для автентифікації користувача.
     
     Поки що повертає None (відкритий доступ), але готова для
     додавання JWT токенів або іншої системи автентифікації.
+    
+    Анонімні запити відсікаються однією перевіркою header - без
+    HTTPBearer та резолвінгу контексту запиту. Bearer токен
+    розбирається вручну тільки коли Authorization присутній.
     """
-    if credentials is None:
+    authorization = request.headers.get("authorization")
+    if not authorization:
         # Відкритий доступ - автентифікація не обов'язкова
         return None
     
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        # Як HTTPBearer(auto_error=False) - некоректний header ігнорується
+        return None
+    
     # TODO: Додати перевірку JWT токену
     # try:
-    #     payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=["HS256"])
+    #     payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
     #     user_id = payload.get("sub")
     #     if user_id is None:
     #         raise HTTPException(status_code=401, detail="Invalid authentication")
@@ -423,71 +721,126 @@ def require_admin(current_user: Optional[Dict] = Depends(get_current_user)) -> D
 
 # === Monitoring та Metrics ===
 
-@asynccontextmanager
-async def track_endpoint_metrics(
-    endpoint_name: str,
-    context: RequestContext
-):
+# Кеш ISO timestamp з точністю до секунди: [monotonic час оновлення, рядок]
+_NOW_ISO_TTL = 1.0
+_now_iso_state = [float("-inf"), ""]
+
+
+def now_iso_cached() -> str:
     """
-    Async context manager для автоматичного трекінгу метрик endpoints.
+    Поточний час в ISO форматі, оновлюється не частіше ніж раз на секунду.
     
-    Використання:
-    async with track_endpoint_metrics("search", context):
-        result = await some_operation()
-        # метрики автоматично записуються
+    Для timestamps у відповідях секундної точності достатньо, а
+    datetime.now().isoformat() на кожен виклик - зайве форматування рядка.
+    """
+    now = time.monotonic()
+    if now - _now_iso_state[0] >= _NOW_ISO_TTL:
+        _now_iso_state[0] = now
+        _now_iso_state[1] = datetime.now().isoformat(timespec="seconds")
+    return _now_iso_state[1]
+
+
+# Histogram латентності endpoints (секунди), якщо prometheus_client встановлений
+ENDPOINT_LATENCY = (
+    Histogram(
+        "endpoint_duration_seconds",
+        "Endpoint handler latency",
+        ["endpoint", "status"]
+    )
+    if Histogram is not None else None
+)
+
+
+class EndpointMetrics:
     """
-    start_time = time.time()
+    Синхронний context manager трекінгу метрик endpoint.
     
-    try:
-        logger.info(f"Starting endpoint: {endpoint_name}")
-        yield
-        
-        # Успішне завершення
-        duration_ms = (time.time() - start_time) * 1000
-        context.add_metric(f"{endpoint_name}_duration_ms", duration_ms)
-        context.add_metric(f"{endpoint_name}_status", "success")
-        
-        logger.info(
-            f"Endpoint completed: {endpoint_name} in {duration_ms:.2f}ms",
-            extra={"extra_data": context.to_log_dict()}
-        )
+    Раніше це був @asynccontextmanager - на кожен запит створювались
+    async generator та coroutines для __aenter__/__aexit__, хоча всередині
+    немає жодного await. Звичайний `with` з __slots__ класом робить те саме
+    без цих алокацій.
+    """
+    
+    __slots__ = ("endpoint_name", "context", "start_ns")
+    
+    def __init__(self, endpoint_name: str, context: RequestContext):
+        self.endpoint_name = endpoint_name
+        self.context = context
+        self.start_ns = 0
+    
+    def __enter__(self) -> "EndpointMetrics":
+        self.start_ns = time.monotonic_ns()
+        logger.info("event=endpoint_start endpoint=%s", self.endpoint_name)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration_ms = (time.monotonic_ns() - self.start_ns) / 1e6
+        endpoint_name = self.endpoint_name
+        context = self.context
+        status_label = "success" if exc_type is None else "error"
         
-    except Exception as e:
-        # Обробка помилок
-        duration_ms = (time.time() - start_time) * 1000
         context.add_metric(f"{endpoint_name}_duration_ms", duration_ms)
-        context.add_metric(f"{endpoint_name}_status", "error")
-        context.add_metric(f"{endpoint_name}_error_type", type(e).__name__)
+        context.add_metric(f"{endpoint_name}_status", status_label)
+        if ENDPOINT_LATENCY is not None:
+            ENDPOINT_LATENCY.labels(endpoint_name, status_label).observe(duration_ms / 1000)
         
-        logger.error(
-            f"Endpoint failed: {endpoint_name} after {duration_ms:.2f}ms - {str(e)}",
-            extra={"extra_data": context.to_log_dict()}
-        )
+        if exc_type is None:
+            logger.info(
+                "event=endpoint_complete endpoint=%s duration=%.2fms", endpoint_name, duration_ms,
+                extra={"extra_data": LazyLogData(context.to_log_dict)}
+            )
+        elif issubclass(exc_type, Exception):
+            context.add_metric(f"{endpoint_name}_error_type", exc_type.__name__)
+            logger.error(
+                "event=endpoint_failed endpoint=%s duration=%.2fms error=%s", endpoint_name, duration_ms, exc,
+                extra={"extra_data": LazyLogData(context.to_log_dict)}
+            )
         
-        raise  # Re-raise для обробки в endpoint
+        return False  # Виключення пробрасується далі для обробки в endpoint
+
+
+def track_endpoint_metrics(endpoint_name: str, context: RequestContext) -> EndpointMetrics:
+    """
+    Context manager для автоматичного трекінгу метрик endpoints.
+    
+    Використання:
+    with track_endpoint_metrics("search", context):
+        result = await some_operation()
+        # метрики автоматично записуються
+    """
+    return EndpointMetrics(endpoint_name, context)
 
 
 # === Комбіновані залежності для зручності ===
 
+def _search_deps(
+    context: RequestContext = Depends(get_request_context),
+    search_service = Depends(get_search_service),
+    params: Dict[str, Any] = Depends(validate_search_limits)
+) -> Tuple[RequestContext, Any, Dict[str, Any]]:
+    """
+    Типовий набір залежностей для search endpoints.
+    
+    Справжня композиція Depends - FastAPI резолвить кожну під-залежність
+    і кешує її в межах запиту. Rate limiting застосовує
+    RequestContextMiddleware для всіх /api/ маршрутів.
+    """
+    return context, search_service, params
+
+
+def _admin_deps(
+    context: RequestContext = Depends(get_request_context),
+    admin_user: Dict[str, Any] = Depends(require_admin),
+    search_service = Depends(get_search_service)
+) -> Tuple[RequestContext, Dict[str, Any], Any]:
+    """Типовий набір залежностей для admin endpoints."""
+    return context, admin_user, search_service
+
+
 # Типові набори залежностей для різних типів endpoints
-SearchDependencies = Annotated[
-    tuple,
-    Depends(lambda: (
-        Depends(get_request_context),
-        Depends(get_search_service),
-        Depends(check_rate_limit),
-        Depends(validate_search_limits)
-    ))
-]
-
-AdminDependencies = Annotated[
-    tuple,
-    Depends(lambda: (
-        Depends(get_request_context),
-        Depends(require_admin),
-        Depends(get_search_service)
-    ))
-]
+SearchDependencies = Annotated[tuple, Depends(_search_deps)]
+
+AdminDependencies = Annotated[tuple, Depends(_admin_deps)]
 
 
 # === Експорт основних залежностей ===
@@ -510,6 +863,7 @@ __all__ = [
     
     # Monitoring
     "track_endpoint_metrics",
+    "now_iso_cached",
     
     # Combined
     "SearchDependencies",
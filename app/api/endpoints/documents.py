@@ -19,13 +19,30 @@ Document Management API Endpoints - Управління документами
 Безпека: Більшість операцій потребують admin права.
 """
 
+import asyncio
+import json
 import logging
+import os
+import stat
+import time
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from pathlib import Path
+from functools import lru_cache
 
-from fastapi import APIRouter, HTTPException, Depends, Query, status, BackgroundTasks
-from fastapi.responses import JSONResponse
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:  # Без orjson відповіді серіалізуються stdlib json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack опціональний - без нього batch endpoints приймають лише JSON
+    msgpack = None
 
 from app.models.schemas import (
     IndexingRequest, IndexingResponse, IndexingStats,
@@ -35,17 +52,163 @@ from app.models.schemas import (
 from app.api.dependencies import (
     RequestContext, get_request_context,
     get_search_service, require_admin,
-    track_endpoint_metrics
+    track_endpoint_metrics, now_iso_cached
 )
+from app.api.endpoints.search import invalidate_search_caches
+from app.utils.logger import LazyLogData
 from app.utils.exceptions import (
     DocumentSearchException, ConfigurationError,
     DocumentProcessingError, log_exception
 )
 
 # Створюємо router для document management endpoints
-router = APIRouter()
+# Списки документів та статистика - найбільші відповіді API,
+# тому серіалізуємо їх через orjson коли він доступний
+_JSON_RESPONSE = ORJSONResponse if orjson is not None else JSONResponse
+router = APIRouter(default_response_class=_JSON_RESPONSE)
 logger = logging.getLogger(__name__)
 
+# Максимальна кількість документів в одному batch видаленні.
+# Видалення виконується одним запитом до векторної БД, тому ліміт
+# захищає лише від надмірно великих тіл запиту.
+MAX_BATCH_DELETE = 10_000
+
+# Сталі тексти помилок валідації. HTTPException створюється заново на кожен
+# raise - спільний екземпляр між запитами тримав би їхні frames через __context__.
+_DETAIL_CONFIRM_REQUIRED = "Operation requires explicit confirmation. Set confirm=true"
+_DETAIL_BATCH_TOO_LARGE = f"Cannot delete more than {MAX_BATCH_DELETE} documents at once"
+_DETAIL_INVALID_DOCUMENT_IDS = "Request body must be a list of document ID strings"
+_DETAIL_MSGPACK_UNSUPPORTED = "application/msgpack body is not supported by this server"
+
+# Незмінні помилки модуля (status, detail) - main.py серіалізує їх відповіді один раз при старті
+STATIC_ERRORS = (
+    (status.HTTP_400_BAD_REQUEST, _DETAIL_CONFIRM_REQUIRED),
+    (status.HTTP_400_BAD_REQUEST, _DETAIL_BATCH_TOO_LARGE),
+    (status.HTTP_400_BAD_REQUEST, _DETAIL_INVALID_DOCUMENT_IDS),
+    (status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, _DETAIL_MSGPACK_UNSUPPORTED)
+)
+
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def require_confirmation(
+    confirm: bool = Query(False, description="Підтвердження операції")
+) -> None:
+    """
+    Dependency для небезпечних операцій.
+    
+    Відхиляє запит без confirm=true ще до входу в endpoint,
+    тобто без запуску метрик та логування.
+    """
+    if not confirm:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=_DETAIL_CONFIRM_REQUIRED)
+
+
+# Одночасно може йти лише одна індексація в процесі: паралельні повні
+# переіндексації подвоюють навантаження на CPU/GPU та запис у векторну БД.
+# Для кількох процесів/подів потрібен розподілений lock (напр. Redis SET NX PX).
+_indexing_lock = asyncio.Lock()
+
+# Кількість документів для пагінації кешується на _DOC_COUNT_TTL секунд
+# і скидається після індексації/видалення
+_DOC_COUNT_TTL = 5.0
+
+
+@lru_cache(maxsize=16)
+def _cached_doc_count(
+    vector_store,
+    file_type: Optional[str],
+    search_query: Optional[str],
+    ttl_bucket: int
+) -> int:
+    """Кількість документів у векторному сховищі для поточного TTL інтервалу."""
+    return vector_store.count_documents(file_type, search_query)
+
+
+async def _parse_document_ids(request: Request) -> List[str]:
+    """
+    Список ID документів з тіла запиту (JSON або msgpack).
+    
+    Замість Pydantic валідації списку - одна перевірка isinstance:
+    для 10k рядків це помітно дешевше, а помилка та сама (400).
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    
+    try:
+        if content_type in MSGPACK_CONTENT_TYPES:
+            if msgpack is None:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail=_DETAIL_MSGPACK_UNSUPPORTED
+                )
+            document_ids = msgpack.unpackb(body, raw=False)
+        else:
+            document_ids = orjson.loads(body) if orjson is not None else json.loads(body)
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=_DETAIL_INVALID_DOCUMENT_IDS)
+    
+    if not (isinstance(document_ids, list) and all(isinstance(x, str) for x in document_ids)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=_DETAIL_INVALID_DOCUMENT_IDS)
+    return document_ids
+
+
+def _invalidate_index_caches() -> None:
+    """Скидає кеші, що залежать від вмісту індексу: кількість документів та результати пошуку."""
+    _cached_doc_count.cache_clear()
+    invalidate_search_caches()
+
+
+# Фонові задачі індексації, ключ - request_id запиту що її запустив.
+# In-memory та обмежено за розміром/TTL - для одного процесу API цього достатньо.
+_indexing_jobs: TTLCache = TTLCache(maxsize=1024, ttl=24 * 3600)
+
+# Посилання на запущені asyncio задачі індексації - без них event loop
+# тримає лише слабке посилання і задача може бути зібрана GC
+_indexing_tasks: set = set()
+
+
+async def _run_indexing_job(
+    job_id: str,
+    search_service,
+    custom_path: Optional[str],
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    bulk_load: bool = False
+) -> None:
+    """
+    Виконує індексацію у фоні та записує результат у _indexing_jobs.
+    
+    _indexing_lock захоплюється endpoint'ом до створення задачі
+    і звільняється тут у finally - незалежно від результату.
+    """
+    job = _indexing_jobs.get(job_id, {"job_id": job_id})
+    
+    try:
+        # Індексація синхронна та довга - виконуємо в threadpool,
+        # щоб event loop продовжував обслуговувати інші запити
+        result = await run_in_threadpool(
+            search_service.index_documents_from_path,
+            custom_path=custom_path,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            bulk_load=bulk_load
+        )
+        job["status"] = "completed" if result.get("success") else "failed"
+        job["result"] = result
+    except Exception as e:
+        logger.error("Background indexing job %s failed: %s", job_id, e)
+        job["status"] = "failed"
+        job["result"] = {"success": False, "message": str(e)}
+    finally:
+        _indexing_lock.release()
+        _invalidate_index_caches()
+    
+    job["finished_at"] = now_iso_cached()
+    _indexing_jobs[job_id] = job
+
 
 @router.post(
     "/index",
@@ -62,18 +225,28 @@ logger = logging.getLogger(__name__)
     5. Збереження у векторну базу даних
     
     **Примітка:** Процес може займати багато часу для великих колекцій.
+    
+    **bulk_load=true:** для порожньої колекції точки завантажуються без
+    побудови HNSW індексу після кожного батчу - індекс будується один раз
+    в кінці. До завершення побудови пошук повільніший (повний перебір).
+    Якщо колекція не порожня, використовується звичайний upsert;
+    `stats.bulk_load_used` показує, який шлях було виконано.
     """,
     responses={
         200: {"description": "Індексація завершена"},
         202: {"description": "Індексація запущена у фоновому режимі"},
         400: {"description": "Некоректні параметри індексації"},
         403: {"description": "Потрібні права адміністратора"},
+        409: {"description": "Індексація вже виконується"},
         503: {"description": "Сервіс недоступний"}
     }
 )
 async def index_documents(
     indexing_request: IndexingRequest,
-    background_tasks: BackgroundTasks,
+    async_mode: bool = Query(False, description="Запустити індексацію у фоні та одразу повернути 202"),
+    batch_size: Optional[int] = Query(None, description="Розмір батчу upsert у векторну БД", ge=1, le=1000),
+    concurrency: Optional[int] = Query(None, description="Кількість паралельних upsert", ge=1, le=16),
+    bulk_load: bool = Query(False, description="Швидке завантаження в порожню колекцію з однією побудовою індексу"),
     context: RequestContext = Depends(get_request_context),
     search_service = Depends(get_search_service),
     _admin = Depends(require_admin)
@@ -82,46 +255,105 @@ async def index_documents(
     Endpoint для запуску індексації документів.
     
     Підтримує як синхронний, так і асинхронний режими:
-    - Синхронний: блокує запит до завершення індексації
-    - Асинхронний: запускає індексацію у фоні та повертає статус
+    - Синхронний: чекає завершення індексації (в threadpool, event loop не блокується)
+    - Асинхронний (async_mode=true): запускає індексацію у фоні та повертає 202
+      з job_id; статус доступний через GET /index/jobs/{job_id}
     """
-    async with track_endpoint_metrics("index_documents", context):
+    with track_endpoint_metrics("index_documents", context):
         try:
             # Логуємо запит на індексацію
             logger.info(
                 "Document indexing requested",
                 extra={
-                    "extra_data": {
+                    "extra_data": LazyLogData(lambda: {
                         "custom_path": indexing_request.custom_path,
                         "force_reindex": indexing_request.force_reindex,
                         "file_types_filter": indexing_request.file_types_filter,
                         "admin_user": context.user_id,
                         "request_context": context.to_log_dict()
-                    }
+                    })
                 }
             )
             
-            # Валідація шляху до документів
+            # Валідація шляху до документів - один stat() замість exists() + is_dir()
             if indexing_request.custom_path:
-                custom_path = Path(indexing_request.custom_path)
-                if not custom_path.exists():
+                try:
+                    path_stat = os.stat(indexing_request.custom_path)
+                except (FileNotFoundError, NotADirectoryError):
                     raise ConfigurationError(
                         f"Custom documents path does not exist: {indexing_request.custom_path}",
                         config_field="custom_path"
                     )
-                if not custom_path.is_dir():
+                if not stat.S_ISDIR(path_stat.st_mode):
                     raise ConfigurationError(
                         f"Custom path is not a directory: {indexing_request.custom_path}",
                         config_field="custom_path"
                     )
+                
+                # Dict будуємо лише якщо DEBUG справді увімкнений
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Custom documents path validated",
+                        extra={
+                            "extra_data": {
+                                "custom_path": indexing_request.custom_path,
+                                "mtime_ns": path_stat.st_mtime_ns,
+                                "size": path_stat.st_size
+                            }
+                        }
+                    )
             
-            # Перевірка чи не йде вже індексація
-            # TODO: Додати lock mechanism для запобігання concurrent індексації
+            # Перевірка чи не йде вже індексація - не чекаємо в черзі, а
+            # одразу повертаємо 409. Між перевіркою та acquire() немає await,
+            # тому захоплення незайнятого lock не перемикає event loop.
+            if _indexing_lock.locked():
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Indexing already in progress"
+                )
+            await _indexing_lock.acquire()
+            
+            if async_mode:
+                job_id = context.request_id
+                _indexing_jobs[job_id] = {
+                    "job_id": job_id,
+                    "status": "running",
+                    "custom_path": indexing_request.custom_path,
+                    "started_at": now_iso_cached()
+                }
+                # Lock передається задачі - вона звільнить його по завершенню.
+                # Саме asyncio задача, а не BackgroundTasks: Starlette не запускає
+                # background tasks якщо відправка 202 не вдалась (клієнт відключився),
+                # і lock лишився б захопленим до рестарту
+                task = asyncio.create_task(_run_indexing_job(
+                    job_id, search_service, indexing_request.custom_path,
+                    batch_size, concurrency, bulk_load
+                ))
+                _indexing_tasks.add(task)
+                task.add_done_callback(_indexing_tasks.discard)
+                
+                return _JSON_RESPONSE(
+                    status_code=status.HTTP_202_ACCEPTED,
+                    content={
+                        "success": True,
+                        "message": "Document indexing started in background",
+                        "job_id": job_id
+                    }
+                )
             
-            # Запускаємо індексацію
-            indexing_result = search_service.index_documents_from_path(
-                custom_path=indexing_request.custom_path
-            )
+            # Запускаємо індексацію в threadpool - вона синхронна і може
+            # тривати хвилини, а event loop має обслуговувати інші запити
+            try:
+                indexing_result = await run_in_threadpool(
+                    search_service.index_documents_from_path,
+                    custom_path=indexing_request.custom_path,
+                    batch_size=batch_size,
+                    concurrency=concurrency,
+                    bulk_load=bulk_load
+                )
+            finally:
+                _indexing_lock.release()
+                _invalidate_index_caches()
             
             # Перевіряємо результат
             if not indexing_result["success"]:
@@ -135,22 +367,27 @@ async def index_documents(
             context.add_metric("chunks_indexed", stats.get("chunks_indexed", 0))
             context.add_metric("indexing_duration_s", stats.get("total_time_s", 0))
             
-            # Формуємо відповідь
-            response = IndexingResponse(
+            # Формуємо відповідь. Дані сформовані сервером, тому model_construct
+            # без повторної валідації - валідується тільки вхідний IndexingRequest
+            response = IndexingResponse.model_construct(
                 success=True,
                 message=indexing_result["message"],
-                stats=IndexingStats(**stats) if stats else None
+                stats=IndexingStats.model_construct(**stats) if stats else None
             )
             
             logger.info(
-                f"Document indexing completed successfully: {stats.get('chunks_indexed', 0)} chunks indexed",
-                extra={"extra_data": context.to_log_dict()}
+                "Document indexing completed successfully: %s chunks indexed",
+                stats.get("chunks_indexed", 0),
+                extra={"extra_data": LazyLogData(context.to_log_dict)}
             )
             
             return response
             
+        except HTTPException:
+            raise
+            
         except ConfigurationError as e:
-            logger.warning(f"Indexing configuration error: {e.message}")
+            logger.warning("Indexing configuration error: %s", e.message)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=e.get_user_message()
@@ -164,13 +401,33 @@ async def index_documents(
             )
             
         except Exception as e:
-            logger.error(f"Unexpected error during indexing: {str(e)}")
+            logger.error("Unexpected error during indexing: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Document indexing failed due to unexpected error"
             )
 
 
+@router.get(
+    "/index/jobs/{job_id}",
+    response_model=Dict[str, Any],
+    summary="Статус фонової індексації",
+    description="Повертає стан задачі індексації, запущеної з async_mode=true."
+)
+async def get_indexing_job(
+    job_id: str,
+    _admin = Depends(require_admin)
+):
+    """Статус та результат фонової задачі індексації."""
+    job = _indexing_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Indexing job {job_id} not found"
+        )
+    return job
+
+
 @router.get(
     "/",
     response_model=Dict[str, Any],
@@ -201,35 +458,28 @@ async def list_documents(
     - Моніторингу стану документів
     - Пошуку конкретних файлів
     """
-    async with track_endpoint_metrics("list_documents", context):
+    with track_endpoint_metrics("list_documents", context):
         try:
-            # TODO: Реалізувати отримання списку документів з векторної БД
-            # Поки що повертаємо заглушку з базовою інформацією
-            
-            # Отримуємо статистику системи
-            stats = search_service.get_document_stats()
+            file_type_value = file_type.value if file_type else None
+            
+            # Статистика системи та кількість документів незалежні - паралельно
+            stats, total_documents = await asyncio.gather(
+                run_in_threadpool(search_service.get_document_stats),
+                run_in_threadpool(
+                    _cached_doc_count,
+                    search_service.vector_store,
+                    file_type_value,
+                    search_query,
+                    int(time.monotonic() // _DOC_COUNT_TTL)
+                )
+            )
             vector_stats = stats.get("vector_database", {})
             discovery_stats = stats.get("document_discovery", {})
             
-            # Формуємо мок-дані для демонстрації
-            mock_documents = []
-            for i in range(min(size, 10)):  # Обмежуємо для демо
-                mock_documents.append({
-                    "id": f"doc_{page}_{i}",
-                    "file_name": f"Документ_{i + (page - 1) * size}.docx",
-                    "file_type": "docx",
-                    "file_size_mb": round(2.5 + i * 0.3, 1),
-                    "chunks_count": 15 + i * 2,
-                    "indexed_at": datetime.now().isoformat(),
-                    "status": "indexed"
-                })
-            
             # Підрахунок пагінації
-            total_documents = vector_stats.get("points_count", 0) // 10  # Припускаємо 10 чанків на документ
             total_pages = max(1, (total_documents + size - 1) // size)
             
-            return {
-                "documents": mock_documents,
+            envelope = {
                 "pagination": {
                     "page": page,
                     "size": size,
@@ -239,7 +489,7 @@ async def list_documents(
                     "has_prev": page > 1
                 },
                 "filters": {
-                    "file_type": file_type.value if file_type else None,
+                    "file_type": file_type_value,
                     "search_query": search_query
                 },
                 "stats": {
@@ -249,8 +499,22 @@ async def list_documents(
                 }
             }
             
+            # Документи сторінки (LIMIT/OFFSET на стороні сховища, не більше 100)
+            # матеріалізуються до відповіді: помилка сховища стає 500,
+            # а не успішною відповіддю з обрізаним списком
+            envelope["documents"] = await run_in_threadpool(
+                lambda: list(search_service.vector_store.scroll_documents(
+                    offset=(page - 1) * size,
+                    limit=size,
+                    file_type=file_type_value,
+                    name_query=search_query
+                ))
+            )
+            
+            return _JSON_RESPONSE(content=envelope)
+            
         except Exception as e:
-            logger.error(f"Failed to list documents: {str(e)}")
+            logger.error("Failed to list documents: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to retrieve documents list"
@@ -285,12 +549,12 @@ async def get_document_details(
     - Аналізу якості індексації
     - Перегляду структури документа
     """
-    async with track_endpoint_metrics("get_document_details", context):
+    with track_endpoint_metrics("get_document_details", context):
         try:
             # TODO: Реалізувати отримання деталей документа з векторної БД
             # Поки що заглушка
             
-            logger.info(f"Document details requested for: {document_id}")
+            logger.info("Document details requested for: %s", document_id)
             
             # Мок-дані для демонстрації
             document_details = {
@@ -300,7 +564,7 @@ async def get_document_details(
                 "file_type": "docx",
                 "file_size_bytes": 2560000,
                 "created_at": "2024-01-15T10:30:00",
-                "indexed_at": datetime.now().isoformat(),
+                "indexed_at": datetime.now(),
                 "status": "indexed",
                 "metadata": {
                     "title": f"Технічний документ {document_id}",
@@ -318,9 +582,10 @@ async def get_document_details(
             
             # Додаємо чанки якщо запитано
             if include_chunks:
+                chunk_prefix = f"{document_id}_chunk_"
                 document_details["chunks"] = [
                     {
-                        "chunk_id": f"{document_id}_chunk_{i}",
+                        "chunk_id": f"{chunk_prefix}{i}",
                         "chunk_index": i,
                         "text": f"Це текст фрагменту {i} документа {document_id}. Тут містяться важливі технічні деталі...",
                         "word_count": 45 + i * 5,
@@ -332,7 +597,7 @@ async def get_document_details(
             return document_details
             
         except Exception as e:
-            logger.error(f"Failed to get document details for {document_id}: {str(e)}")
+            logger.error("Failed to get document details for %s: %s", document_id, e)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Document {document_id} not found or failed to retrieve details"
@@ -364,16 +629,17 @@ async def delete_document(
     - Очищення некоректно проіндексованих файлів
     - Управління розміром індексу
     """
-    async with track_endpoint_metrics("delete_document", context):
+    with track_endpoint_metrics("delete_document", context):
         try:
             logger.warning(
-                f"Document deletion requested: {document_id}",
+                "Document deletion requested: %s",
+                document_id,
                 extra={
-                    "extra_data": {
+                    "extra_data": LazyLogData(lambda: {
                         "document_id": document_id,
                         "admin_user": context.user_id,
                         "request_context": context.to_log_dict()
-                    }
+                    })
                 }
             )
             
@@ -382,9 +648,10 @@ async def delete_document(
             
             # Поки що заглушка
             deleted_count = 1  # Припускаємо що видалили 1 документ
+            _invalidate_index_caches()
             
             if deleted_count > 0:
-                return BaseResponse(
+                return BaseResponse.model_construct(
                     success=True,
                     message=f"Document {document_id} deleted successfully ({deleted_count} chunks removed)"
                 )
@@ -397,7 +664,7 @@ async def delete_document(
         except HTTPException:
             raise  # Перекидаємо HTTP exceptions
         except Exception as e:
-            logger.error(f"Failed to delete document {document_id}: {str(e)}")
+            logger.error("Failed to delete document %s: %s", document_id, e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to delete document {document_id}"
@@ -412,10 +679,10 @@ async def delete_document(
     Переіндексовує конкретний документ.
     
     **Процес:**
-    1. Видаляє існуючі фрагменти документа з індексу
-    2. Повторно обробляє файл
-    3. Створює нові фрагменти з оновленим текстом
-    4. Індексує у векторну базу даних
+    1. Повторно обробляє файл
+    2. Порівнює хеші фрагментів з уже проіндексованими
+    3. Генерує ембединги лише для змінених фрагментів
+    4. Оновлює їх одним upsert та видаляє зайві одним delete
     """
 )
 async def reindex_document(
@@ -432,35 +699,35 @@ async def reindex_document(
     - Змінилась ML модель
     - Виникли помилки при початковій індексації
     """
-    async with track_endpoint_metrics("reindex_document", context):
+    with track_endpoint_metrics("reindex_document", context):
         try:
-            logger.info(f"Document reindexing requested: {document_id}")
+            logger.info("Document reindexing requested: %s", document_id)
             
-            # TODO: Реалізувати переіндексацію конкретного документа
-            # 1. Знайти оригінальний файл
-            # 2. Видалити старі чанки
-            # 3. Повторно обробити файл
-            # 4. Проіндексувати нові чанки
+            reindex_result = await run_in_threadpool(search_service.reindex_document, document_id)
             
-            # Поки що заглушка
-            return IndexingResponse(
-                success=True,
-                message=f"Document {document_id} reindexed successfully",
-                stats=IndexingStats(
-                    total_documents_found=1,
-                    chunks_processed=12,
-                    chunks_indexed=12,
-                    success_rate=100.0,
-                    processing_time_s=5.2,
-                    embedding_time_s=3.1,
-                    indexing_time_s=1.8,
-                    total_time_s=10.1,
-                    avg_time_per_chunk_ms=842.0
+            if reindex_result.get("not_found"):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=reindex_result["message"]
                 )
+            if not reindex_result["success"]:
+                raise DocumentProcessingError(reindex_result["message"])
+            
+            _invalidate_index_caches()
+            
+            stats = reindex_result.get("stats", {})
+            context.add_metric("chunks_indexed", stats.get("chunks_indexed", 0))
+            
+            return IndexingResponse.model_construct(
+                success=True,
+                message=reindex_result["message"],
+                stats=IndexingStats.model_construct(**stats) if stats else None
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
-            logger.error(f"Failed to reindex document {document_id}: {str(e)}")
+            logger.error("Failed to reindex document %s: %s", document_id, e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to reindex document {document_id}"
@@ -484,31 +751,25 @@ async def reindex_document(
     """
 )
 async def clear_search_index(
-    confirm: bool = Query(False, description="Підтвердження операції"),
     context: RequestContext = Depends(get_request_context),
     search_service = Depends(get_search_service),
-    _admin = Depends(require_admin)
+    _admin = Depends(require_admin),
+    _confirmed = Depends(require_confirmation)
 ):
     """
     Повне очищення пошукового індексу.
     
     Потребує явного підтвердження для безпеки.
     """
-    async with track_endpoint_metrics("clear_index", context):
-        if not confirm:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Operation requires explicit confirmation. Set confirm=true"
-            )
-        
+    with track_endpoint_metrics("clear_index", context):
         try:
             logger.critical(
                 "Search index clearing requested - DESTRUCTIVE OPERATION",
                 extra={
-                    "extra_data": {
+                    "extra_data": LazyLogData(lambda: {
                         "admin_user": context.user_id,
                         "request_context": context.to_log_dict()
-                    }
+                    })
                 }
             )
             
@@ -517,16 +778,17 @@ async def clear_search_index(
             
             # Поки що заглушка
             deleted_count = 1000  # Припускаємо що видалили 1000 чанків
+            _invalidate_index_caches()
             
-            logger.critical(f"Search index cleared: {deleted_count} chunks removed")
+            logger.critical("Search index cleared: %s chunks removed", deleted_count)
             
-            return BaseResponse(
+            return BaseResponse.model_construct(
                 success=True,
                 message=f"Search index cleared successfully. {deleted_count} chunks removed."
             )
             
         except Exception as e:
-            logger.error(f"Failed to clear search index: {str(e)}")
+            logger.error("Failed to clear search index: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to clear search index"
@@ -552,6 +814,7 @@ async def clear_search_index(
     """
 )
 async def clear_caches(
+    response: Response,
     context: RequestContext = Depends(get_request_context),
     search_service = Depends(get_search_service),
     _admin = Depends(require_admin)
@@ -561,29 +824,59 @@ async def clear_caches(
     
     Безпечна операція - не видаляє індексовані дані.
     """
-    async with track_endpoint_metrics("clear_caches", context):
+    with track_endpoint_metrics("clear_caches", context):
         try:
             logger.info("Cache clearing requested")
             
-            # Очищуємо кеші через search service
-            cache_result = search_service.clear_cache()
-            
-            if cache_result["success"]:
-                return CacheOperationResponse(
-                    success=True,
-                    message=cache_result["message"],
-                    cleared_items=cache_result.get("cleared_items", {})
-                )
-            else:
+            # Кеші незалежні - очищуємо паралельно, помилка одного не зупиняє інші
+            cache_names = ("query_cache", "embedding_cache")
+            results = await asyncio.gather(
+                search_service.aclear_query_cache(),
+                search_service.aclear_embedding_cache(),
+                return_exceptions=True
+            )
+            _invalidate_index_caches()
+            
+            cleared_items = {}
+            failed = []
+            for name, result in zip(cache_names, results):
+                if isinstance(result, Exception):
+                    logger.error("Failed to clear %s: %s", name, result)
+                    failed.append(name)
+                else:
+                    cleared_items[name] = result
+            
+            if len(failed) == len(cache_names):
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=cache_result.get("message", "Failed to clear caches")
+                    detail="Failed to clear caches"
                 )
-                
+            
+            if failed:
+                # Частковий успіх - очищені кеші повертаються разом з переліком невдалих
+                response.status_code = status.HTTP_207_MULTI_STATUS
+                return CacheOperationResponse.model_construct(
+                    success=False,
+                    message=f"Caches partially cleared, failed: {', '.join(failed)}",
+                    cleared_items=cleared_items
+                )
+            
+            logger.info(
+                "Caches cleared: query_cache=%s, embedding_cache=%s",
+                cleared_items["query_cache"],
+                cleared_items["embedding_cache"]
+            )
+            
+            return CacheOperationResponse.model_construct(
+                success=True,
+                message="All caches cleared successfully",
+                cleared_items=cleared_items
+            )
+            
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"Failed to clear caches: {str(e)}")
+            logger.error("Failed to clear caches: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to clear caches"
@@ -619,13 +912,11 @@ async def get_detailed_stats(
     - Оптимізації системи
     - Звітності
     """
-    async with track_endpoint_metrics("detailed_stats", context):
+    with track_endpoint_metrics("detailed_stats", context):
         try:
-            # Отримуємо базову статистику
-            base_stats = search_service.get_document_stats()
-            
-            # Додаємо додаткову інформацію
-            enhanced_stats = base_stats.copy()
+            # Отримуємо базову статистику - частини збираються паралельно.
+            # Сервіс щоразу повертає новий dict, тому доповнюємо його на місці без copy()
+            enhanced_stats = await search_service.aget_document_stats()
             
             if include_performance:
                 # TODO: Додати метрики продуктивності
@@ -637,7 +928,7 @@ async def get_detailed_stats(
                 }
             
             # Додаємо timestamp для моніторингу
-            enhanced_stats["report_generated_at"] = datetime.now().isoformat()
+            enhanced_stats["report_generated_at"] = now_iso_cached()
             enhanced_stats["system_version"] = "1.0.0"
             
             return SystemStatsResponse(
@@ -647,7 +938,7 @@ async def get_detailed_stats(
             )
             
         except Exception as e:
-            logger.error(f"Failed to get detailed stats: {str(e)}")
+            logger.error("Failed to get detailed stats: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to retrieve detailed statistics"
@@ -663,12 +954,25 @@ async def get_detailed_stats(
     description="""
     Видаляє множинні документи з індексу одночасно.
     
+    **Тіло запиту:** масив ID документів у форматі
+    `application/json` або `application/msgpack` (компактніший та
+    швидший для розбору при тисячах ID).
+    
     **Примітка:** Операція незворотна!
     Рекомендується створити backup перед виконанням.
-    """
+    """,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": {"type": "string"}}},
+                "application/msgpack": {"schema": {"type": "array", "items": {"type": "string"}}}
+            }
+        }
+    }
 )
 async def batch_delete_documents(
-    document_ids: List[str],
+    request: Request,
     context: RequestContext = Depends(get_request_context),
     search_service = Depends(get_search_service),
     _admin = Depends(require_admin)
@@ -681,34 +985,34 @@ async def batch_delete_documents(
     - Міграції даних
     - Batch операцій адміністрування
     """
-    async with track_endpoint_metrics("batch_delete", context):
+    document_ids = await _parse_document_ids(request)
+    if len(document_ids) > MAX_BATCH_DELETE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=_DETAIL_BATCH_TOO_LARGE)
+    
+    with track_endpoint_metrics("batch_delete", context):
         try:
-            if len(document_ids) > 100:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Cannot delete more than 100 documents at once"
-                )
-            
             logger.warning(
-                f"Batch deletion requested for {len(document_ids)} documents",
+                "Batch deletion requested for %s documents",
+                len(document_ids),
                 extra={"extra_data": {"document_count": len(document_ids)}}
             )
             
-            # TODO: Реалізувати batch видалення
-            # deleted_count = search_service.vector_store.batch_delete(document_ids)
-            
-            # Заглушка
-            deleted_count = len(document_ids)
+            # Один bulk запит до векторного сховища замість видалення по одному
+            deleted_count = await run_in_threadpool(
+                search_service.vector_store.batch_delete, document_ids
+            )
+            context.add_metric("chunks_deleted", deleted_count)
+            _invalidate_index_caches()
             
-            return BaseResponse(
+            return BaseResponse.model_construct(
                 success=True,
-                message=f"Batch deletion completed: {deleted_count} documents removed"
+                message=f"Batch deletion completed: {len(document_ids)} documents, {deleted_count} chunks removed"
             )
             
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"Batch deletion failed: {str(e)}")
+            logger.error("Batch deletion failed: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Batch deletion operation failed"
@@ -22,32 +22,351 @@ Search API Endpoints - Інтерфейси для семантичного по
 4. Логування та метрики
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import re
+import time
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple, Literal, Iterator
+
+import numpy as np
+from cachetools import TTLCache
+
+try:
+    import orjson
+except ImportError:  # Без orjson відповіді серіалізуються stdlib json
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:  # xxhash опціональний - без нього хеш для логів рахує blake2b
+    xxhash = None
 
 from fastapi import APIRouter, HTTPException, Depends, Query, status
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 
 from app.models.schemas import (
     SearchRequest, SearchResponse, SearchResultItem, 
     BaseResponse, SystemStatsResponse, ErrorResponse, ErrorDetail
 )
+from app.config import settings
 from app.api.dependencies import (
     RequestContext, get_request_context,
     get_search_service, get_embedding_service,
-    check_rate_limit, validate_search_limits,
-    track_endpoint_metrics
+    validate_search_limits,
+    track_endpoint_metrics, now_iso_cached
 )
+from app.services.embedding_service import embedding_batcher, encode_embedding_base64
+from app.services.search_service import search_service
+from app.utils.logger import LazyLogData, json_dumps
 from app.utils.exceptions import (
     DocumentSearchException, SearchQueryError, 
     ValidationError, log_exception
 )
 
 # Створюємо router для всіх search endpoints
-router = APIRouter()
+# Масиви результатів пошуку серіалізуються через orjson коли він доступний
+router = APIRouter(
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
+)
 logger = logging.getLogger(__name__)
 
+# Кеш результатів пошуку перед search_service.
+# Повторний запит не генерує ембединг і не йде у векторну БД.
+_SEARCH_CACHE_TTL = 300
+_search_results_cache: TTLCache = TTLCache(maxsize=4096, ttl=_SEARCH_CACHE_TTL)
+
+
+class SemanticResultCache:
+    """
+    Кеш результатів для майже однакових запитів.
+    
+    Зберігає ембединги останніх `capacity` запитів у кільцевому буфері
+    (матриця capacity x dim). Ембединги L2-нормалізовані, тому косинусна
+    схожість з усіма збереженими запитами - один matrix-vector добуток.
+    Хіт пропускає векторний пошук; ембединг запиту вже порахований.
+    """
+    
+    def __init__(self, capacity: int, dimension: int, threshold: float, ttl: float):
+        self.threshold = threshold
+        self.ttl = ttl
+        self._embeddings = np.zeros((capacity, dimension), dtype=np.float32)
+        self._entries: List[Optional[Tuple[Tuple, Dict[str, Any], float]]] = [None] * capacity
+        self._next = 0
+    
+    def get(self, embedding: np.ndarray, params: Tuple) -> Optional[Dict[str, Any]]:
+        """Результат найближчого запиту з тими ж параметрами, або None."""
+        now = time.monotonic()
+        candidates = [
+            i for i, entry in enumerate(self._entries)
+            if entry is not None and entry[0] == params and now - entry[2] < self.ttl
+        ]
+        if not candidates:
+            return None
+        
+        similarities = self._embeddings[candidates] @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return self._entries[candidates[best]][1]
+    
+    def put(self, embedding: np.ndarray, params: Tuple, result: Dict[str, Any]) -> None:
+        """Запис з витісненням найстарішого (ring buffer)."""
+        slot = self._next
+        self._embeddings[slot] = embedding
+        self._entries[slot] = (params, result, time.monotonic())
+        self._next = (slot + 1) % len(self._entries)
+    
+    def clear(self) -> None:
+        """Очищення кешу."""
+        self._entries = [None] * len(self._entries)
+        self._next = 0
+
+
+_semantic_cache: Optional[SemanticResultCache] = (
+    SemanticResultCache(
+        capacity=settings.semantic_cache_size,
+        dimension=settings.embedding_dimension,
+        threshold=settings.semantic_cache_threshold,
+        ttl=_SEARCH_CACHE_TTL
+    )
+    if settings.semantic_cache_enabled else None
+)
+
+
+def invalidate_search_caches() -> None:
+    """
+    Скидає кеші результатів пошуку: точний та семантичний кеш endpoint
+    та query_cache самого SearchService.
+    
+    Викликається після будь-якої зміни індексу (індексація, видалення,
+    очищення), щоб видалені або переіндексовані документи не повертались
+    з кешу до кінця TTL.
+    """
+    _search_results_cache.clear()
+    if _semantic_cache is not None:
+        _semantic_cache.clear()
+    search_service.clear_query_cache()
+
+
+# Lock на ключ кешу: конкурентні однакові запити при cache miss
+# чекають на перший замість того щоб паралельно рахувати те саме
+_search_key_locks: Dict[Tuple, asyncio.Lock] = {}
+
+
+def _search_cache_key(
+    query: str,
+    limit: Optional[int],
+    score_threshold: Optional[float],
+    filters: Optional[Dict[str, Any]],
+    include_stats: bool
+) -> Tuple:
+    """Ключ кешу: 128-бітний blake2b хеш запиту + параметри пошуку."""
+    query_digest = hashlib.blake2b(query.encode("utf-8"), digest_size=16).digest()
+    filters_key = repr(sorted(filters.items())) if filters else None
+    return (query_digest, limit, score_threshold, filters_key, include_stats)
+
+
+def _query_log_hash(query: str) -> str:
+    """
+    Детермінований 64-бітний хеш запиту для логів.
+    
+    На відміну від вбудованого hash() (рандомізований для кожного процесу)
+    однаковий у всіх workers, тому дозволяє корелювати запити в логах.
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(query)
+    return hashlib.blake2b(query.encode("utf-8"), digest_size=8).hexdigest()
+
+
+# Статичні саджешни для демонстрації
+# В production це мало б бути динамічно згенероване
+_SUGGESTIONS = (
+    "інформаційне забезпечення",
+    "архітектура системи",
+    "штучний інтелект",
+    "безпека даних",
+    "технічні вимоги",
+    "управління документами",
+    "платформа ШІ",
+    "векторна база даних",
+    "машинне навчання",
+    "обробка документів"
+)
+_SUGGESTIONS_LC = tuple(s.lower() for s in _SUGGESTIONS)
+
+# Специфічні для української літери - ознака мови запиту
+_UK_CHARS = re.compile("[іїєґ]")
+
+# Слова з літер (включно з кирилицею) - без цифр, пунктуації та "_".
+# Апостроф всередині слова не розриває його ("м'ята", "п’ять")
+_TOKEN_RE = re.compile(r"[^\W\d_]+(?:['’ʼ][^\W\d_]+)*")
+
+_CONTEXTUAL_SUGGESTIONS = {
+    "архітект": ("архітектура додатків", "архітектурне рішення", "архітектурні патерни"),
+    "безпек": ("безпека системи", "кібербезпека", "інформаційна безпека")
+}
+
+
+def _match_suggestions(query_lc: str) -> List[str]:
+    """
+    Саджешни, що містять query_lc, у порядку списку _SUGGESTIONS.
+    
+    Lowercase форми пораховані заздалегідь, а результат для кожного
+    запиту мемоізує _filter_suggestions.
+    """
+    if not query_lc:
+        return list(_SUGGESTIONS)
+    
+    return [s for s, lc in zip(_SUGGESTIONS, _SUGGESTIONS_LC) if query_lc in lc]
+
+
+@lru_cache(maxsize=1024)
+def _filter_suggestions(query_lc: str, limit: int) -> Tuple[Tuple[str, ...], Tuple[str, ...], int]:
+    """
+    Саджешни для (query_lc, limit): (обмежений список, контекстні, загальна кількість).
+    
+    Autocomplete викликається на кожне натискання клавіші з тими самими
+    префіксами, а списки саджешнів статичні - тому результат мемоізується.
+    Tuple незмінні, тож закешоване значення безпечно віддавати всім запитам.
+    """
+    filtered_suggestions = _match_suggestions(query_lc)
+    
+    contextual_suggestions = next(
+        (values for key, values in _CONTEXTUAL_SUGGESTIONS.items() if key in query_lc),
+        ()
+    )
+    
+    return tuple(filtered_suggestions[:limit]), tuple(contextual_suggestions[:5]), len(filtered_suggestions)
+
+
+def _format_results(raw_results: List[Dict[str, Any]]) -> List[SearchResultItem]:
+    """
+    Результати search_service у форматі API без повторної валідації.
+    
+    Дані формує наш сервіс, тому model_construct безпечний і
+    пропускає валідацію Pydantic для кожного результату.
+    
+    Результати сервісу - поля SearchResult (chunk_id, text, score,
+    source_file, metadata), тобто підмножина полів SearchResultItem:
+    dict передається як є, без поштучних lookup. Відсутні опціональні
+    поля (chunk_index, highlighted_text, keyword_matches) отримують default.
+    """
+    construct = SearchResultItem.model_construct
+    return [construct(**result_data) for result_data in raw_results]
+
+
+def _prepare_search_filters(search_request: SearchRequest) -> Optional[Dict[str, Any]]:
+    """
+    Валідація пошукового запиту та побудова фільтрів.
+    
+    Raises:
+        SearchQueryError: Порожній або занадто довгий запит
+    """
+    if not search_request.query.strip():
+        raise SearchQueryError(
+            query=search_request.query,
+            reason="Query cannot be empty",
+            suggestions=["Введіть ключові слова для пошуку", "Спробуйте більш конкретний запит"]
+        )
+    
+    if len(search_request.query) > 1000:
+        raise SearchQueryError(
+            query=search_request.query,
+            reason="Query too long",
+            suggestions=["Скоротіть запит до 1000 символів"]
+        )
+    
+    # Підготовка фільтрів для пошуку
+    filters = {}
+    
+    # Списки значень стають MatchAny умовами, які Qdrant застосовує під час
+    # обходу HNSW графа, а не після пошуку
+    if search_request.file_types:
+        # Конвертуємо enum значення в рядки як у payload ("pdf", не ".pdf")
+        filters["file_type"] = sorted({ft.value.lstrip(".").lower() for ft in search_request.file_types})
+    
+    if search_request.source_files:
+        filters["file_name"] = sorted(set(search_request.source_files))
+    
+    return filters or None
+
+
+def _ndjson_results(raw_results: List[Dict[str, Any]]) -> Iterator[str]:
+    """
+    NDJSON рядки результатів: один SearchResultItem на рядок.
+    
+    Серіалізація відбувається по одному результату в міру відправки,
+    тому повна JSON відповідь ніколи не будується в пам'яті.
+    """
+    for item in _format_results(raw_results):
+        yield json_dumps(item.model_dump()) + "\n"
+
+
+async def cached_search(
+    search_service,
+    query: str,
+    limit: Optional[int] = None,
+    score_threshold: Optional[float] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    include_stats: bool = True
+) -> Dict[str, Any]:
+    """
+    Виконує search_service.search з кешуванням успішних результатів.
+    
+    Невдалі пошуки не кешуються, щоб тимчасова недоступність БД
+    не "залипала" на весь TTL.
+    """
+    key = _search_cache_key(query, limit, score_threshold, filters, include_stats)
+    
+    cached = _search_results_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    lock = _search_key_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        try:
+            # Поки чекали на lock, результат міг порахувати інший запит
+            cached = _search_results_cache.get(key)
+            if cached is not None:
+                return cached
+            
+            # Ембединг запиту рахуємо через micro-batcher, щоб конкурентні
+            # пошуки ділили один forward pass моделі
+            query_embedding = None
+            if query.strip():
+                query_embedding = await embedding_batcher.submit(query.strip())
+            
+            # Майже однаковий запит з тими ж параметрами вже шукали нещодавно
+            semantic_params = key[1:]
+            if _semantic_cache is not None and query_embedding is not None:
+                similar_result = _semantic_cache.get(query_embedding, semantic_params)
+                if similar_result is not None:
+                    _search_results_cache[key] = similar_result
+                    return similar_result
+            
+            # Векторний пошук синхронний - виконуємо в threadpool,
+            # щоб event loop обслуговував інші запити
+            search_result = await run_in_threadpool(
+                search_service.search,
+                query=query,
+                limit=limit,
+                score_threshold=score_threshold,
+                filters=filters,
+                include_stats=include_stats,
+                query_embedding=query_embedding
+            )
+            if search_result.get("success"):
+                _search_results_cache[key] = search_result
+                if _semantic_cache is not None and query_embedding is not None:
+                    _semantic_cache.put(query_embedding, semantic_params, search_result)
+            return search_result
+        finally:
+            # Наступні запити вже знайдуть результат у кеші
+            _search_key_locks.pop(key, None)
+
 
 @router.post(
     "/semantic",
@@ -79,8 +398,7 @@ logger = logging.getLogger(__name__)
 async def semantic_search(
     search_request: SearchRequest,
     context: RequestContext = Depends(get_request_context),
-    search_service = Depends(get_search_service),
-    _rate_limit = Depends(check_rate_limit)
+    search_service = Depends(get_search_service)
 ):
     """
     Основний endpoint для семантичного пошуку.
@@ -92,55 +410,33 @@ async def semantic_search(
     4. Пост-обробка та ранжування результатів
     5. Форматування відповіді
     """
-    async with track_endpoint_metrics("semantic_search", context):
+    with track_endpoint_metrics("semantic_search", context):
         try:
             # Логуємо пошуковий запит (без чутливих даних)
             logger.info(
                 f"Semantic search request",
                 extra={
-                    "extra_data": {
+                    "extra_data": LazyLogData(lambda: {
                         "query_length": len(search_request.query),
-                        "query_hash": hash(search_request.query),  # Хеш для privacy
+                        "query_hash": _query_log_hash(search_request.query),  # Хеш для privacy
                         "limit": search_request.limit,
                         "score_threshold": search_request.score_threshold,
                         "filters_count": len(search_request.file_types or []),
                         "request_context": context.to_log_dict()
-                    }
+                    })
                 }
             )
             
-            # Валідація запиту
-            if not search_request.query.strip():
-                raise SearchQueryError(
-                    query=search_request.query,
-                    reason="Query cannot be empty",
-                    suggestions=["Введіть ключові слова для пошуку", "Спробуйте більш конкретний запит"]
-                )
-            
-            if len(search_request.query) > 1000:
-                raise SearchQueryError(
-                    query=search_request.query,
-                    reason="Query too long",
-                    suggestions=["Скоротіть запит до 1000 символів"]
-                )
-            
-            # Підготовка фільтрів для пошуку
-            filters = {}
-            
-            if search_request.file_types:
-                # Конвертуємо enum значення в рядки
-                file_extensions = [ft.value for ft in search_request.file_types]
-                filters["file_extension"] = {"range": {"gte": file_extensions[0]}}  # Simplified for demo
+            # Валідація запиту та підготовка фільтрів
+            filters = _prepare_search_filters(search_request)
             
-            if search_request.source_files:
-                filters["file_name"] = search_request.source_files[0]  # Simplified - тільки перший файл
-            
-            # Виконуємо пошук через search service
-            search_result = search_service.search(
+            # Виконуємо пошук через search service (з кешем результатів)
+            search_result = await cached_search(
+                search_service,
                 query=search_request.query,
                 limit=search_request.limit,
                 score_threshold=search_request.score_threshold,
-                filters=filters if filters else None,
+                filters=filters,
                 include_stats=search_request.include_stats
             )
             
@@ -158,23 +454,10 @@ async def semantic_search(
                 context.add_metric("embedding_duration_ms", search_result["stats"]["embedding_time_ms"])
             
             # Конвертуємо результати в API формат
-            formatted_results = []
-            for result_data in search_result["results"]:
-                # Створюємо SearchResultItem з raw даних
-                formatted_result = SearchResultItem(
-                    chunk_id=result_data["chunk_id"],
-                    text=result_data["text"],
-                    score=result_data["score"],
-                    source_file=result_data["source_file"],
-                    chunk_index=result_data.get("chunk_index"),
-                    metadata=result_data["metadata"],
-                    highlighted_text=result_data.get("highlighted_text"),
-                    keyword_matches=result_data.get("keyword_matches")
-                )
-                formatted_results.append(formatted_result)
+            formatted_results = _format_results(search_result["results"])
             
             # Формуємо відповідь
-            response = SearchResponse(
+            response = SearchResponse.model_construct(
                 success=True,
                 message=f"Found {len(formatted_results)} results",
                 query=search_request.query,
@@ -209,6 +492,77 @@ async def semantic_search(
             )
 
 
+@router.post(
+    "/semantic/stream",
+    summary="Семантичний пошук з потоковою відповіддю (NDJSON)",
+    description="""
+    Той самий пошук, що й POST /semantic, але результати повертаються
+    як NDJSON (`application/x-ndjson`): один JSON об'єкт результату на рядок.
+    
+    Корисно для великих `limit` з довгими текстами - клієнт отримує
+    перші результати одразу і може розбирати відповідь построково.
+    Статистика пошуку в потоковій відповіді не повертається.
+    """,
+    responses={
+        200: {"description": "Потік результатів", "content": {"application/x-ndjson": {}}},
+        400: {"description": "Некоректний запит"},
+        429: {"description": "Перевищено ліміт запитів"}
+    }
+)
+async def semantic_search_stream(
+    search_request: SearchRequest,
+    context: RequestContext = Depends(get_request_context),
+    search_service = Depends(get_search_service)
+):
+    """Семантичний пошук з результатами у форматі NDJSON."""
+    with track_endpoint_metrics("semantic_search_stream", context):
+        try:
+            filters = _prepare_search_filters(search_request)
+            
+            search_result = await cached_search(
+                search_service,
+                query=search_request.query,
+                limit=search_request.limit,
+                score_threshold=search_request.score_threshold,
+                filters=filters,
+                include_stats=False
+            )
+            
+            if not search_result["success"]:
+                raise DocumentSearchException(
+                    message=search_result.get("message", "Search failed"),
+                    error_code="SEARCH_FAILED"
+                )
+            
+            context.add_metric("search_results_count", len(search_result["results"]))
+            
+            return StreamingResponse(
+                _ndjson_results(search_result["results"]),
+                media_type="application/x-ndjson"
+            )
+            
+        except SearchQueryError as e:
+            logger.warning(f"Search query error: {e.message}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=e.get_user_message()
+            )
+            
+        except DocumentSearchException as e:
+            log_exception(logger, e, context={"endpoint": "semantic_search_stream"})
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=e.get_user_message()
+            )
+            
+        except Exception as e:
+            logger.error(f"Unexpected error in streaming semantic search: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="An unexpected error occurred during search"
+            )
+
+
 @router.get(
     "/quick",
     response_model=SearchResponse,
@@ -228,52 +582,34 @@ async def quick_search(
     limit: int = Query(10, description="Кількість результатів", ge=1, le=50),
     threshold: float = Query(0.5, description="Поріг схожості", ge=0.0, le=1.0),
     context: RequestContext = Depends(get_request_context),
-    search_service = Depends(get_search_service),
-    _rate_limit = Depends(check_rate_limit)
+    search_service = Depends(get_search_service)
 ):
     """
     GET endpoint для простого пошуку без складної структури запиту.
     
     Корисний для швидкого тестування та простих інтеграцій.
     """
-    async with track_endpoint_metrics("quick_search", context):
+    with track_endpoint_metrics("quick_search", context):
         try:
-            # Конвертуємо GET параметри в SearchRequest
-            search_request = SearchRequest(
+            # GET параметри вже провалідовані Query, тому SearchRequest
+            # не створюємо - одразу викликаємо спільну логіку пошуку
+            search_result = await cached_search(
+                search_service,
                 query=q,
                 limit=limit,
                 score_threshold=threshold,
                 include_stats=True  # Завжди включаємо stats для GET
             )
             
-            # Викликаємо основну логіку semantic_search
-            # Створюємо mock dependencies для internal call
-            search_result = search_service.search(
-                query=search_request.query,
-                limit=search_request.limit,
-                score_threshold=search_request.score_threshold,
-                include_stats=True
-            )
-            
             if not search_result["success"]:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=search_result.get("message", "Search failed")
                 )
             
-            # Формуємо спрощену відповідь
-            formatted_results = []
-            for result_data in search_result["results"]:
-                formatted_result = SearchResultItem(
-                    chunk_id=result_data["chunk_id"],
-                    text=result_data["text"],
-                    score=result_data["score"],
-                    source_file=result_data["source_file"],
-                    metadata=result_data["metadata"]
-                )
-                formatted_results.append(formatted_result)
+            formatted_results = _format_results(search_result["results"])
             
-            return SearchResponse(
+            return SearchResponse.model_construct(
                 success=True,
                 message=f"Quick search: {len(formatted_results)} results",
                 query=q,
@@ -319,46 +655,17 @@ async def get_search_suggestions(
     - Історії пошуків
     - NLP обробки запитів
     """
-    async with track_endpoint_metrics("search_suggestions", context):
-        # Статичні саджешни для демонстрації
-        # В production це мало б бути динамічно згенероване
-        base_suggestions = [
-            "інформаційне забезпечення",
-            "архітектура системи",
-            "штучний інтелект",
-            "безпека даних",
-            "технічні вимоги",
-            "управління документами",
-            "платформа ШІ",
-            "векторна база даних",
-            "машинне навчання",
-            "обробка документів"
-        ]
-        
-        # Фільтруємо саджешни на основі часткового запиту
-        if partial_query:
-            filtered_suggestions = [
-                s for s in base_suggestions 
-                if partial_query.lower() in s.lower()
-            ]
-        else:
-            filtered_suggestions = base_suggestions
-        
-        # Обмежуємо кількість результатів
-        limited_suggestions = filtered_suggestions[:limit]
-        
-        # Додаємо контекстні саджешни
-        contextual_suggestions = []
-        if "архітект" in partial_query.lower():
-            contextual_suggestions = ["архітектура додатків", "архітектурне рішення", "архітектурні патерни"]
-        elif "безпек" in partial_query.lower():
-            contextual_suggestions = ["безпека системи", "кібербезпека", "інформаційна безпека"]
+    with track_endpoint_metrics("search_suggestions", context):
+        # Фільтрація, ліміт та контекстні саджешни - з кешу для повторних префіксів
+        limited_suggestions, contextual_suggestions, total_found = _filter_suggestions(
+            partial_query.lower(), limit
+        )
         
         return {
-            "suggestions": limited_suggestions,
-            "contextual": contextual_suggestions[:5],
+            "suggestions": list(limited_suggestions),
+            "contextual": list(contextual_suggestions),
             "partial_query": partial_query,
-            "total_found": len(filtered_suggestions)
+            "total_found": total_found
         }
 
 
@@ -386,7 +693,7 @@ async def find_similar_documents(
     
     Використовує ембединг заданого документа для пошуку схожих.
     """
-    async with track_endpoint_metrics("similar_documents", context):
+    with track_endpoint_metrics("similar_documents", context):
         try:
             # TODO: Реалізувати логіку пошуку схожих документів
             # 1. Отримати ембединг документа за document_id
@@ -437,9 +744,10 @@ async def get_search_stats(
     - Admin dashboards
     - Debugging та діагностики
     """
-    async with track_endpoint_metrics("search_stats", context):
+    with track_endpoint_metrics("search_stats", context):
         try:
-            stats = search_service.get_document_stats()
+            # Частини статистики збираються паралельно поза event loop
+            stats = await search_service.aget_document_stats()
             
             return SystemStatsResponse(
                 success=True,
@@ -471,6 +779,10 @@ async def get_search_stats(
 )
 async def analyze_query(
     query: str,
+    include_embedding: bool = Query(False, description="Чи повертати сам ембединг запиту"),
+    encoding_format: Literal["float", "base64"] = Query(
+        "base64", description="Формат ембединга: float (JSON список) або base64 (FP16 байти)"
+    ),
     context: RequestContext = Depends(get_request_context),
     embedding_service = Depends(get_embedding_service)
 ):
@@ -481,32 +793,44 @@ async def analyze_query(
     - Показу user-friendly insights про запит
     - Попереднього аналізу перед пошуком
     - Рекомендацій для покращення результатів
+    
+    Ембединг у форматі base64 декодується клієнтом як
+    np.frombuffer(base64.b64decode(s), dtype=np.float16).
     """
-    async with track_endpoint_metrics("analyze_query", context):
+    with track_endpoint_metrics("analyze_query", context):
         try:
-            # Базовий аналіз запиту
+            # Базовий аналіз запиту - один regex прохід замість split
+            keywords = _TOKEN_RE.findall(query)
+            word_count = len(keywords)
+            query_length = len(query)
             analysis = {
                 "query": query,
-                "query_length": len(query),
-                "word_count": len(query.split()),
-                "estimated_complexity": "simple" if len(query.split()) <= 3 else "complex",
-                "language": "uk" if any(char in query for char in "іїєґ") else "unknown",
-                "keywords": query.split(),  # Спрощений розбір на слова
+                "query_length": query_length,
+                "word_count": word_count,
+                "estimated_complexity": "simple" if word_count <= 3 else "complex",
+                "language": "uk" if _UK_CHARS.search(query) else "unknown",
+                "keywords": keywords,
                 "recommendations": []
             }
             
             # Додаємо рекомендації
-            if len(query) < 10:
+            if query_length < 10:
                 analysis["recommendations"].append("Спробуйте більш детальний запит для кращих результатів")
             
-            if len(query.split()) > 10:
+            if word_count > 10:
                 analysis["recommendations"].append("Занадто довгий запит може зменшити точність пошуку")
             
             # Генеруємо ембединг для технічного аналізу
             try:
-                embedding = embedding_service.encode_single(query)
+                embedding = await embedding_batcher.submit(query)
                 analysis["embedding_generated"] = True
                 analysis["embedding_dimension"] = len(embedding)
+                if include_embedding:
+                    analysis["encoding_format"] = encoding_format
+                    analysis["embedding"] = (
+                        encode_embedding_base64(embedding) if encoding_format == "base64"
+                        else embedding.tolist()
+                    )
             except Exception as e:
                 logger.warning(f"Failed to generate embedding for analysis: {str(e)}")
                 analysis["embedding_generated"] = False
@@ -545,7 +869,8 @@ async def search_health_check(
     try:
         health_status = {
             "status": "healthy",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso_cached(),
+            "ts_ns": time.time_ns(),
             "components": {}
         }
         
@@ -565,7 +890,7 @@ async def search_health_check(
         
         # Перевірка search service
         try:
-            stats = search_service.get_document_stats()
+            stats = await search_service.aget_document_stats()
             health_status["components"]["search_service"] = {
                 "status": "healthy",
                 "indexed_documents": stats.get("vector_database", {}).get("points_count", 0)
@@ -589,6 +914,7 @@ async def search_health_check(
         logger.error(f"Health check failed: {str(e)}")
         return {
             "status": "unhealthy",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso_cached(),
+            "ts_ns": time.time_ns(),
             "error": str(e)
         }
\ No newline at end of file
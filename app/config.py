@@ -7,10 +7,13 @@
 # через змінні середовища.
 
 
-from pydantic import BaseSettings, Field
+from pydantic import Field, PrivateAttr, model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 from typing import Optional
 import os
+import stat
+import warnings
 
 
 class Settings(BaseSettings):
@@ -56,6 +59,22 @@ class Settings(BaseSettings):
         ge=0
     )
     
+    # Document parsing is CPU-bound and independent per file, so ingest
+    # runs in a process pool; 0 means one process per CPU core, 1 = serial
+    ingest_workers: int = Field(
+        default=0,
+        description="Document ingest worker processes (0 = CPU count, 1 = serial)",
+        ge=0
+    )
+    
+    # Cleaned lines are memoized: page headers, footers and legal notices
+    # repeat across pages and files, so they are cleaned only once
+    clean_text_cache_size: int = Field(
+        default=8192,
+        description="Number of cleaned text lines kept in the preprocessing cache (0 = off)",
+        ge=0
+    )
+    
     # === ML Model Configuration ===
     # Using multilingual model because your documents are likely in Ukrainian
     # This model supports 50+ languages including Ukrainian and Russian
@@ -64,18 +83,76 @@ class Settings(BaseSettings):
         description="HuggingFace model name for text embeddings"
     )
     
+    # Inference backend: "sentence-transformers" (PyTorch) or "fastembed" (ONNX Runtime).
+    # FastEmbed is several times faster on CPU and has a much smaller memory footprint.
+    embedding_backend: str = Field(
+        default="sentence-transformers",
+        description="Embedding inference backend: 'sentence-transformers' or 'fastembed'"
+    )
+    
     # Model parameters for fine-tuning performance vs quality trade-off
     embedding_dimension: int = Field(
         default=384,  # Dimension of the chosen model
         description="Dimension of embedding vectors"
     )
     
+    # Inference precision for the sentence-transformers backend.
+    # bfloat16 halves weight bandwidth; pooling and normalization still run in float32.
+    # Falls back to float32 on devices without native bf16 support.
+    embedding_dtype: str = Field(
+        default="bfloat16",
+        description="Embedding model weights dtype: 'bfloat16' or 'float32'"
+    )
+    
+    # JIT compilation of the transformer forward pass (sentence-transformers backend).
+    # "torch_compile" fuses operators via TorchDynamo/Inductor (PyTorch 2.x),
+    # "ipex" applies Intel Extension for PyTorch CPU optimizations.
+    # Falls back to eager mode if the backend is unavailable.
+    jit_backend: str = Field(
+        default="none",
+        description="Encoder JIT backend: 'none', 'torch_compile' or 'ipex'"
+    )
+    
+    # Warm up the model and vector DB connection before serving traffic.
+    # Disable for faster restarts during development.
+    prewarm_on_startup: bool = Field(
+        default=True,
+        description="Run warmup embeddings and a vector search at startup"
+    )
+    
     # Device selection - automatically detect GPU if available
     device: str = Field(
         default="auto",
         description="Device for model inference: 'auto', 'cpu', 'cuda'"
     )
     
+    # === Vector Store Configuration ===
+    # "qdrant" - зовнішня векторна БД (за замовчуванням)
+    # "faiss" - in-process HNSW індекс, без мережевих викликів на пошук
+    vector_store_backend: str = Field(
+        default="qdrant",
+        description="Vector store backend: 'qdrant' or 'faiss'"
+    )
+    # Directory where the FAISS backend persists its index; empty keeps it in memory only
+    faiss_index_path: str = Field(
+        default="faiss_index",
+        description="FAISS index persistence directory (empty = in-memory only)"
+    )
+    
+    # Параметри HNSW графа: M - кількість зв'язків вузла,
+    # ef_search - ширина пошуку (більше = точніше, але повільніше).
+    # ef_search використовують обидва backends; recall швидко насичується
+    # після ~64-128, а латентність росте майже лінійно з ef.
+    hnsw_m: int = Field(default=32, description="HNSW graph connectivity (M)", ge=4)
+    hnsw_ef_search: int = Field(default=64, description="HNSW search breadth (efSearch)", ge=1)
+    # Точний (brute-force) пошук у Qdrant замість HNSW - для перевірки recall
+    hnsw_exact: bool = Field(default=False, description="Use exact search instead of HNSW (Qdrant)")
+    
+    # Bulk індексація: Qdrant upsert найшвидший при невеликих батчах
+    # та 2 паралельних запитах, далі продуктивність падає
+    indexing_batch_size: int = Field(default=32, description="Points per vector store upsert", ge=1)
+    indexing_concurrency: int = Field(default=2, description="Concurrent vector store upserts", ge=1)
+    
     # === Search Configuration ===
     # Default parameters for vector search
     default_limit: int = Field(
@@ -94,9 +171,29 @@ class Settings(BaseSettings):
         le=1.0
     )
     
+    # Semantic result cache: a query whose embedding is almost identical
+    # (cosine >= threshold) to a recent one reuses that query's results
+    semantic_cache_enabled: bool = Field(
+        default=False,
+        description="Reuse results of recent near-duplicate queries"
+    )
+    semantic_cache_size: int = Field(
+        default=256,
+        description="Number of recent query embeddings kept by the semantic cache",
+        ge=1
+    )
+    semantic_cache_threshold: float = Field(
+        default=0.98,
+        description="Minimum cosine similarity for a semantic cache hit",
+        ge=0.0,
+        le=1.0
+    )
+    
     # === API Configuration ===
     api_host: str = Field(default="0.0.0.0", description="API server host")
     api_port: int = Field(default=8000, description="API server port")
+    # Production worker processes; 0 means one worker per CPU core
+    api_workers: int = Field(default=0, description="Production worker processes (0 = CPU count)", ge=0)
     
     # CORS settings for web frontend integration
     cors_origins: list[str] = Field(
@@ -104,6 +201,38 @@ class Settings(BaseSettings):
         description="Allowed CORS origins"
     )
     
+    # Host header allowlist; ["*"] disables the check (no TrustedHostMiddleware)
+    allowed_hosts: list[str] = Field(
+        default=["*"],
+        description="Allowed Host header values"
+    )
+    
+    # === Rate Limiting Configuration ===
+    max_requests_per_minute: int = Field(
+        default=100,
+        description="Maximum requests per client within the rate limit window",
+        ge=1
+    )
+    
+    rate_limit_window_seconds: int = Field(
+        default=60,
+        description="Rate limit window length in seconds",
+        ge=1
+    )
+    
+    rate_limit_max_clients: int = Field(
+        default=100_000,
+        description="Maximum number of clients tracked by the in-memory rate limiter",
+        ge=1
+    )
+    
+    # Shared Redis makes the limit global across uvicorn workers/pods.
+    # Without it every worker keeps its own in-memory counters.
+    redis_url: Optional[str] = Field(
+        default=None,
+        description="Redis URL for distributed rate limiting, e.g. redis://localhost:6379/0"
+    )
+    
     # === Logging Configuration ===
     log_level: str = Field(
         default="INFO",
@@ -119,11 +248,15 @@ class Settings(BaseSettings):
     app_name: str = Field(default="Document Search Service", description="Application name")
     app_version: str = Field(default="1.0.0", description="Application version")
     
-    class Config:
-        """Pydantic configuration for environment variable loading."""
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+    # Resolved documents directory, cached after the first successful check
+    _documents_path: Optional[Path] = PrivateAttr(default=None)
+    
+    # Pydantic configuration for environment variable loading
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False
+    )
     
     @property
     def documents_path_obj(self) -> Path:
@@ -131,40 +264,45 @@ class Settings(BaseSettings):
         Convert documents path string to Path object with validation.
         
         This property ensures that the path exists and is accessible,
-        which is critical for document processing.
+        which is critical for document processing. The check is a single
+        stat() and a successful result is cached; failures are not cached,
+        so a directory created later is picked up.
         """
-        path = Path(self.documents_path)
-        if not path.exists():
-            raise ValueError(f"Documents path does not exist: {path}")
-        if not path.is_dir():
-            raise ValueError(f"Documents path is not a directory: {path}")
-        return path
+        if self._documents_path is None:
+            path = Path(self.documents_path)
+            try:
+                path_stat = path.stat()
+            except (FileNotFoundError, NotADirectoryError):
+                raise ValueError(f"Documents path does not exist: {path}")
+            if not stat.S_ISDIR(path_stat.st_mode):
+                raise ValueError(f"Documents path is not a directory: {path}")
+            self._documents_path = path
+        return self._documents_path
     
     @property
     def qdrant_url(self) -> str:
         """Generate complete Qdrant connection URL."""
         return f"http://{self.qdrant_host}:{self.qdrant_port}"
     
-    def validate_ml_config(self) -> bool:
+    @model_validator(mode="after")
+    def validate_ml_config(self) -> "Settings":
         """
         Validate ML-specific configuration parameters.
         
-        This method checks if the embedding model exists and if
-        the chunk size is compatible with the model's context window.
+        Runs as part of Settings() construction, so every instance
+        is checked, not only the module-level one.
         """
         # Validate chunk size relative to model context
         if self.max_chunk_size > 6000:  # Conservative limit for most models
-            print("Warning: Large chunk size may exceed model context window")
+            warnings.warn("Large chunk size may exceed model context window", stacklevel=2)
         
         # Validate overlap settings
         if self.chunk_overlap >= self.max_chunk_size:
             raise ValueError("Chunk overlap must be less than chunk size")
         
-        return True
+        return self
 
 
 # Global settings instance - singleton pattern for configuration
-settings = Settings()
-
-# Validate configuration on module import
-settings.validate_ml_config()
\ No newline at end of file
+# (validated on construction by validate_ml_config)
+settings = Settings()
\ No newline at end of file
@@ -20,33 +20,178 @@ FastAPI Application Entry Point - Головна точка входу в сис
 - Infrastructure Layer (databases, external APIs)
 """
 
+import importlib.util
 import logging
+import os
 import time
-import traceback
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Tuple
 
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException, Depends
+from fastapi import APIRouter, FastAPI, Request, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from fastapi.openapi.utils import get_openapi
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+
+try:
+    import orjson
+except ImportError:  # Без orjson відповіді серіалізуються stdlib json
+    orjson = None
+
+try:
+    from prometheus_client import make_asgi_app
+except ImportError:  # prometheus_client опціональний - без нього /metrics не публікується
+    make_asgi_app = None
 
 # Наші внутрішні компоненти
 from app.config import settings
 from app.services.search_service import search_service
-from app.models.schemas import ErrorResponse, ErrorDetail
-from app.utils.logger import setup_logging
+from app.utils.logger import setup_logging, stop_logging, json_dumps
 from app.api.endpoints import search, documents
+from app.api.dependencies import get_request_context, check_rate_limit, get_search_service
 
-# Налаштовуємо логування перед створенням додатку
-setup_logging()
+# Логування налаштовується в lifespan кожного процесу сервера, а не тут:
+# модуль імпортується і в master процесі gunicorn/uvicorn до fork
 logger = logging.getLogger(__name__)
 
+# API версіонування - всі routes під /api/v1/
+API_V1_PREFIX = "/api/v1"
+
+# orjson серіалізує відповіді в кілька разів швидше за stdlib json
+JSON_RESPONSE_CLASS = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def _error_content(
+    message: str,
+    error_code: str,
+    error_message: str,
+    error_details: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Тіло відповіді про помилку у форматі ErrorResponse.
+    
+    Будується звичайним dict без Pydantic: дані формують наші handlers,
+    тож валідація та model_dump на шляху помилки - зайва робота.
+    ErrorResponse лишається схемою для OpenAPI документації.
+    """
+    return {
+        "success": False,
+        "message": message,
+        "error": {
+            "error_code": error_code,
+            "error_message": error_message,
+            "error_details": error_details
+        }
+    }
+
+
+def _http_error_content(status_code: int, detail: Any) -> Dict[str, Any]:
+    """Тіло відповіді для HTTPException у форматі ErrorResponse."""
+    return _error_content(
+        "HTTP Error occurred",
+        f"HTTP_{status_code}",
+        str(detail),
+        {"status_code": status_code}
+    )
+
+
+@lru_cache(maxsize=256)
+def _http_error_body(status_code: int, detail: str) -> bytes:
+    """
+    Серіалізоване тіло відповіді для (status_code, detail).
+    
+    Більшість HTTPException (404, 429, ліміти batch) повторюються з тим
+    самим detail, тому тіло помилки будується та кодується один раз
+    на пару, а не на кожну помилку.
+    """
+    return json_dumps(_http_error_content(status_code, detail)).encode("utf-8")
+
+
+def register_static_errors(*errors: Tuple[int, str]) -> None:
+    """
+    Попередня серіалізація відповідей для незмінних HTTP помилок.
+    
+    Такі помилки (підтвердження операції, ліміти batch) мають сталі
+    (status_code, detail), тому тіло відповіді кодується ще при старті.
+    """
+    for status_code, detail in errors:
+        _http_error_body(status_code, detail)
+
+
+def http_exception_response(request: Request, exc: HTTPException) -> Response:
+    """Консистентна JSON відповідь для HTTPException (handler та middleware)."""
+    logger.warning(
+        "HTTP Exception: %s %s Path: %s",
+        exc.status_code, exc.detail, request.scope["path"]
+    )
+    
+    if not exc.headers and isinstance(exc.detail, str):
+        return Response(
+            content=_http_error_body(exc.status_code, exc.detail),
+            status_code=exc.status_code,
+            media_type="application/json"
+        )
+    
+    return JSON_RESPONSE_CLASS(
+        status_code=exc.status_code,
+        content=_http_error_content(exc.status_code, exc.detail),
+        headers=exc.headers  # Retry-After / X-RateLimit-* для 429
+    )
+
 
-class TimingMiddleware(BaseHTTPMiddleware):
+class RequestContextMiddleware:
+    """
+    Middleware що один раз на запит створює RequestContext та застосовує rate limit.
+    
+    Раніше кожен endpoint оголошував Depends(get_request_context) та
+    Depends(check_rate_limit), і FastAPI резолвив їх для кожного маршруту окремо.
+    Тепер контекст лежить в scope["state"]["ctx"] (request.state.ctx) ще до
+    роутингу, а get_request_context лише повертає його - існуючі endpoints
+    не змінюються.
+    
+    Як і TimingMiddleware, реалізований як чистий ASGI middleware - без
+    task group та stream відповіді BaseHTTPMiddleware на кожен запит;
+    відповідь 429 надсилається напряму через send.
+    
+    Rate limit застосовується до всіх API маршрутів; /health, /docs та
+    інші системні endpoints не обмежуються. OPTIONS (CORS preflight) не
+    рахуються в ліміт. CORSMiddleware - зовнішній шар відносно цього
+    middleware, тому 429 теж отримує Access-Control-* заголовки.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # Request лише як обгортка над scope: state пишеться в scope["state"],
+        # тож endpoints бачать той самий контекст
+        request = Request(scope)
+        context = get_request_context(request)
+        
+        if scope["method"] != "OPTIONS" and scope["path"].startswith(API_V1_PREFIX):
+            try:
+                await check_rate_limit(context)
+            except HTTPException as exc:
+                response = http_exception_response(request, exc)
+                await response(scope, receive, send)
+                return
+        
+        await self.app(scope, receive, send)
+
+
+# Шляхи probes та документації - без таймінгу та логів запиту.
+# X-Process-Time для них не додається
+TIMING_SKIP_PATHS = frozenset({"/health", "/openapi.json", "/docs", "/redoc"})
+
+
+class TimingMiddleware:
     """
     Middleware для вимірювання часу обробки запитів.
     
@@ -54,49 +199,92 @@ class TimingMiddleware(BaseHTTPMiddleware):
     ML систем, де час відгуку може сильно варіюватися залежно від
     розміру запиту та навантаження на модель.
     
+    Реалізований як чистий ASGI middleware: на відміну від BaseHTTPMiddleware
+    не створює окрему task group та stream для тіла відповіді на кожен запит -
+    лише обгортає send, щоб додати X-Process-Time до заголовків відповіді.
+    
     Архітектурний патерн: Decorator Pattern
     Обгортає обробку запиту додатковою функціональністю без зміни основної логіки.
     """
     
-    async def dispatch(self, request: Request, call_next):
-        # Записуємо час початку обробки
-        start_time = time.time()
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in TIMING_SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
         
-        # Логуємо вхідний запит для debugging
-        logger.info(
-            f"🔄 Processing request: {request.method} {request.url.path} "
-            f"from {request.client.host if request.client else 'unknown'}"
-        )
+        # Записуємо час початку обробки - монотонний лічильник в ns (int)
+        start_ns = time.perf_counter_ns()
+        method = scope["method"]
+        path = scope["path"]
         
-        try:
-            # Виконуємо основну обробку запиту
-            response = await call_next(request)
-            
-            # Обчислюємо час обробки
-            processing_time = time.time() - start_time
-            
-            # Додаємо header з часом обробки для клієнта
-            response.headers["X-Process-Time"] = str(round(processing_time * 1000, 2))
-            
-            # Логуємо успішну відповідь
+        # Рівень логування перевіряється один раз на запит - на WARNING
+        # і вище middleware не виконує жодної роботи для логів
+        log_info = logger.isEnabledFor(logging.INFO)
+        
+        # Логуємо вхідний запит для debugging. Події в форматі key=value
+        # (без emoji) - ASCII рядок дешевше кодується та легко фільтрується
+        # за назвою події (grep event=request_start)
+        if log_info:
+            client = scope.get("client")
             logger.info(
-                f"✅ Request completed: {request.method} {request.url.path} "
-                f"Status: {response.status_code} Time: {processing_time:.3f}s"
+                "event=request_start method=%s path=%s remote=%s",
+                method, path, client[0] if client else "unknown"
             )
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                # Обчислюємо час обробки до відправки заголовків
+                elapsed_ns = time.perf_counter_ns() - start_ns
+                
+                # Додаємо header з часом обробки (мс) для клієнта - одразу bytes
+                message.setdefault("headers", []).append(
+                    (b"x-process-time", b"%.2f" % (elapsed_ns / 1e6))
+                )
+                
+                # Логуємо успішну відповідь
+                if log_info:
+                    logger.info(
+                        "event=request_complete method=%s path=%s status=%s time=%.3fs",
+                        method, path, message["status"], elapsed_ns / 1e9
+                    )
             
-            return response
-            
-        except Exception as exc:
-            # Логуємо помилку з повною трасою
-            processing_time = time.time() - start_time
-            logger.error(
-                f"❌ Request failed: {request.method} {request.url.path} "
-                f"Time: {processing_time:.3f}s Error: {str(exc)}\n"
-                f"Traceback: {traceback.format_exc()}"
+            await send(message)
+        
+        try:
+            # Виконуємо основну обробку запиту
+            await self.app(scope, receive, send_with_timing)
+        
+        except Exception:
+            # Логуємо помилку з повною трасою - logging форматує її лише при записі
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            logger.exception(
+                "event=request_failed method=%s path=%s time=%.3fs",
+                method, path, elapsed_ns / 1e9
             )
             
             # Перекидаємо виключення для обробки в exception handlers
-            raise exc
+            raise
+
+
+class ResponseCompressionMiddleware(GZipMiddleware):
+    """
+    GZip для великих JSON відповідей (результати пошуку, списки документів, OpenAPI).
+    
+    Streaming endpoints (NDJSON) не стискаються: gzip буферизує дані до
+    заповнення блоку, і клієнт перестав би отримувати результати поступово.
+    """
+    
+    def __init__(self, app, minimum_size: int = 1024, compresslevel: int = 5):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
 
 
 @asynccontextmanager
@@ -112,12 +300,14 @@ async def lifespan(app: FastAPI):
     Забезпечуємо правильне управління ресурсами в async середовищі.
     """
     # === STARTUP PHASE ===
+    # Потік логування запускається в процесі, що обслуговує запити
+    setup_logging()
     logger.info("🚀 Starting Document Search Service...")
     
     try:
         # Перевірка конфігурації
         logger.info("🔧 Validating configuration...")
-        if not settings.documents_path_obj.exists():
+        if not os.path.isdir(settings.documents_path):
             logger.warning(f"Documents path does not exist: {settings.documents_path}")
         
         # Ініціалізація пошукової системи
@@ -130,11 +320,30 @@ async def lifespan(app: FastAPI):
             # raise RuntimeError("Search system initialization failed")
         else:
             logger.info("✅ Search system initialized successfully")
+            
+            # Прогрів моделі та з'єднання з векторною БД до першого запиту
+            if settings.prewarm_on_startup:
+                try:
+                    warmup_stats = await search_service.warmup()
+                    logger.info(f"🔥 Warmup completed: {warmup_stats}")
+                except Exception as e:
+                    logger.warning(f"Warmup failed: {str(e)}")
+            
+            # Заповнюємо кеш health probe для Depends(get_search_service) -
+            # перші запити не чекають на перевірку векторної БД
+            try:
+                await get_search_service()
+            except HTTPException as e:
+                logger.warning(f"Search service dependency is not ready: {e.detail}")
         
         # Отримуємо статистику системи для початкового стану
         stats = search_service.get_document_stats()
         logger.info(f"📊 System stats: {stats}")
         
+        # Прогріваємо OpenAPI схему - перший запит до /openapi.json
+        # (Swagger UI завантажує її одразу) не генерує її на event loop
+        app.openapi()
+        
         logger.info("🎉 Application startup completed successfully!")
         
         # Yield означає що додаток готовий приймати запити
@@ -160,6 +369,9 @@ async def lifespan(app: FastAPI):
         
     except Exception as e:
         logger.error(f"⚠️ Error during shutdown: {str(e)}")
+    
+    # Дописуємо чергу логів до завершення процесу
+    stop_logging()
 
 
 def create_application() -> FastAPI:
@@ -196,6 +408,7 @@ def create_application() -> FastAPI:
         - Docker для контейнеризації
         """,
         lifespan=lifespan,  # Підключаємо lifecycle management
+        default_response_class=JSON_RESPONSE_CLASS,
         docs_url="/docs",   # Swagger UI доступна на /docs
         redoc_url="/redoc"  # ReDoc доступна на /redoc
     )
@@ -203,6 +416,15 @@ def create_application() -> FastAPI:
     return app
 
 
+# CORS параметри фіксовані - визначаються один раз.
+# Явний список headers замість "*": Starlette не відбиває кожен
+# Access-Control-Request-Headers preflight запиту, а перевіряє по готовій множині.
+# Тут усі headers, які читає API (X-Correlation-ID - для трасування запитів).
+CORS_ALLOW_METHODS = ("GET", "POST", "PUT", "DELETE")
+CORS_ALLOW_HEADERS = ("Authorization", "Content-Type", "Accept", "X-Requested-With", "X-Correlation-ID")
+CORS_MAX_AGE = 86400  # Браузери кешують preflight на добу замість 10 хвилин
+
+
 def configure_cors(app: FastAPI) -> None:
     """
     Налаштування CORS (Cross-Origin Resource Sharing).
@@ -214,9 +436,10 @@ def configure_cors(app: FastAPI) -> None:
         CORSMiddleware,
         allow_origins=settings.cors_origins,  # Дозволені домени
         allow_credentials=True,               # Дозволити cookies/auth headers
-        allow_methods=["GET", "POST", "PUT", "DELETE"],  # HTTP методи
-        allow_headers=["*"],                  # Дозволені headers
-        expose_headers=["X-Process-Time"]     # Headers видимі клієнту
+        allow_methods=CORS_ALLOW_METHODS,     # HTTP методи
+        allow_headers=CORS_ALLOW_HEADERS,     # Дозволені headers
+        expose_headers=["X-Process-Time"],    # Headers видимі клієнту
+        max_age=CORS_MAX_AGE
     )
     logger.info(f"✅ CORS configured for origins: {settings.cors_origins}")
 
@@ -229,15 +452,24 @@ def configure_security(app: FastAPI) -> None:
     - Host header injection
     - Timing attacks через consistent response times
     """
-    # Захист від Host header attacks
-    app.add_middleware(
-        TrustedHostMiddleware,
-        allowed_hosts=["*"]  # В production варто обмежити конкретними доменами
-    )
+    # Захист від Host header attacks. З wildcard middleware нічого не фільтрує,
+    # але додає ASGI шар на кожен запит - тому встановлюється лише зі списком хостів
+    if settings.allowed_hosts and "*" not in settings.allowed_hosts:
+        app.add_middleware(
+            TrustedHostMiddleware,
+            allowed_hosts=settings.allowed_hosts
+        )
+    
+    # Контекст запиту та rate limiting - до роутингу та dependency resolution
+    app.add_middleware(RequestContextMiddleware)
     
     # Додаємо кастомний timing middleware
     app.add_middleware(TimingMiddleware)
     
+    # Стиснення відповідей - зовнішній шар відносно timing та контексту:
+    # стискається вже готова відповідь; тіла менші за 1 KB не стискаються
+    app.add_middleware(ResponseCompressionMiddleware, minimum_size=1024, compresslevel=5)
+    
     logger.info("🔒 Security middleware configured")
 
 
@@ -251,72 +483,54 @@ def configure_exception_handlers(app: FastAPI) -> None:
     Архітектурний патерн: Chain of Responsibility
     Різні типи помилок обробляються різними handlers.
     """
+    register_static_errors(*documents.STATIC_ERRORS)
     
     @app.exception_handler(HTTPException)
     async def http_exception_handler(request: Request, exc: HTTPException):
         """Обробка стандартних HTTP помилок."""
-        logger.warning(
-            f"HTTP Exception: {exc.status_code} {exc.detail} "
-            f"Path: {request.url.path}"
-        )
-        
-        return JSONResponse(
-            status_code=exc.status_code,
-            content=ErrorResponse(
-                success=False,
-                message="HTTP Error occurred",
-                error=ErrorDetail(
-                    error_code=f"HTTP_{exc.status_code}",
-                    error_message=str(exc.detail),
-                    error_details={"status_code": exc.status_code}
-                )
-            ).dict()
-        )
+        return http_exception_response(request, exc)
     
     @app.exception_handler(ValueError)
     async def value_error_handler(request: Request, exc: ValueError):
         """Обробка помилок валідації даних."""
-        logger.error(f"Validation Error: {str(exc)} Path: {request.url.path}")
+        logger.error("Validation Error: %s Path: %s", exc, request.scope["path"])
         
-        return JSONResponse(
+        return JSON_RESPONSE_CLASS(
             status_code=400,
-            content=ErrorResponse(
-                success=False,
-                message="Validation error",
-                error=ErrorDetail(
-                    error_code="VALIDATION_ERROR",
-                    error_message=str(exc),
-                    error_details={"path": str(request.url.path)}
-                )
-            ).dict()
+            content=_error_content(
+                "Validation error",
+                "VALIDATION_ERROR",
+                str(exc),
+                {"path": request.scope["path"]}
+            )
         )
     
     @app.exception_handler(Exception)
     async def general_exception_handler(request: Request, exc: Exception):
         """Обробка всіх неочікуваних помилок."""
-        # Логуємо повну трасу помилки для debugging
+        # Логуємо повну трасу помилки - handler форматує її лише якщо запис пройде фільтр рівня
         logger.error(
-            f"Unhandled Exception: {type(exc).__name__}: {str(exc)} "
-            f"Path: {request.url.path}\n"
-            f"Traceback: {traceback.format_exc()}"
+            "event=unhandled_exception type=%s path=%s error=%s",
+            type(exc).__name__, request.scope["path"], exc,
+            exc_info=exc
         )
         
-        return JSONResponse(
+        error_details = {
+            "error_type": type(exc).__name__,
+            "path": request.scope["path"]
+        }
+        # В production не включаємо детальну інформацію про помилки
+        if settings.log_level == "DEBUG":
+            error_details["debug_info"] = str(exc)
+        
+        return JSON_RESPONSE_CLASS(
             status_code=500,
-            content=ErrorResponse(
-                success=False,
-                message="Internal server error occurred",
-                error=ErrorDetail(
-                    error_code="INTERNAL_SERVER_ERROR",
-                    error_message="An unexpected error occurred. Please try again later.",
-                    error_details={
-                        "error_type": type(exc).__name__,
-                        "path": str(request.url.path),
-                        # В production не включаємо детальну інформацію про помилки
-                        "debug_info": str(exc) if settings.log_level == "DEBUG" else None
-                    }
-                )
-            ).dict()
+            content=_error_content(
+                "Internal server error occurred",
+                "INTERNAL_SERVER_ERROR",
+                "An unexpected error occurred. Please try again later.",
+                error_details
+            )
         )
     
     logger.info("🚨 Exception handlers configured")
@@ -329,34 +543,60 @@ def register_routes(app: FastAPI) -> None:
     Організовуємо endpoints в логічні групи для кращої структури API.
     Кожна група endpoints знаходиться в окремому модулі.
     """
-    # API версіонування - всі routes під /api/v1/
-    API_V1_PREFIX = "/api/v1"
-    
-    # Endpoints для пошуку документів
-    app.include_router(
-        search.router,
-        prefix=f"{API_V1_PREFIX}/search",
-        tags=["Search"],  # Для групування в Swagger UI
+    # Один router версії API: префікс /api/v1 та спільні responses задаються
+    # в одному місці, модулі endpoints підключаються лише з власним сегментом
+    v1_router = APIRouter(
+        prefix=API_V1_PREFIX,
         responses={
             404: {"description": "Not found"},
             500: {"description": "Internal server error"}
         }
     )
     
+    # Endpoints для пошуку документів
+    v1_router.include_router(
+        search.router,
+        prefix="/search",
+        tags=["Search"]  # Для групування в Swagger UI
+    )
+    
     # Endpoints для управління документами
-    app.include_router(
+    v1_router.include_router(
         documents.router,
-        prefix=f"{API_V1_PREFIX}/documents", 
-        tags=["Documents"],
-        responses={
-            404: {"description": "Not found"},
-            500: {"description": "Internal server error"}
-        }
+        prefix="/documents",
+        tags=["Documents"]
     )
     
+    app.include_router(v1_router)
+    
+    # Prometheus метрики (латентність endpoints з track_endpoint_metrics)
+    if make_asgi_app is not None:
+        app.mount("/metrics", make_asgi_app())
+    
     logger.info("🛣️ API routes registered")
 
 
+# Загальні responses для всіх endpoints в OpenAPI схемі
+OPENAPI_COMMON_RESPONSES = {
+    "ValidationError": {
+        "description": "Validation error",
+        "content": {
+            "application/json": {
+                "schema": {"$ref": "#/components/schemas/ErrorResponse"}
+            }
+        }
+    },
+    "InternalError": {
+        "description": "Internal server error",
+        "content": {
+            "application/json": {
+                "schema": {"$ref": "#/components/schemas/ErrorResponse"}
+            }
+        }
+    }
+}
+
+
 def customize_openapi_schema(app: FastAPI) -> None:
     """
     Кастомізація OpenAPI схеми для кращої документації.
@@ -388,24 +628,7 @@ def customize_openapi_schema(app: FastAPI) -> None:
         })
         
         # Додаємо загальні responses для всіх endpoints
-        openapi_schema["components"]["responses"] = {
-            "ValidationError": {
-                "description": "Validation error",
-                "content": {
-                    "application/json": {
-                        "schema": {"$ref": "#/components/schemas/ErrorResponse"}
-                    }
-                }
-            },
-            "InternalError": {
-                "description": "Internal server error", 
-                "content": {
-                    "application/json": {
-                        "schema": {"$ref": "#/components/schemas/ErrorResponse"}
-                    }
-                }
-            }
-        }
+        openapi_schema["components"]["responses"] = OPENAPI_COMMON_RESPONSES
         
         app.openapi_schema = openapi_schema
         return app.openapi_schema
@@ -419,9 +642,11 @@ def customize_openapi_schema(app: FastAPI) -> None:
 # Створюємо головний екземпляр додатку
 app = create_application()
 
-# Налаштовуємо всі компоненти
-configure_cors(app)
+# Налаштовуємо всі компоненти. CORS додається останнім - найзовнішній шар:
+# preflight обробляється до rate limit, а всі відповіді (включно з 429)
+# отримують Access-Control-* заголовки
 configure_security(app)
+configure_cors(app)
 configure_exception_handlers(app)
 register_routes(app)
 customize_openapi_schema(app)
@@ -429,6 +654,12 @@ customize_openapi_schema(app)
 
 # === Health Check Endpoint ===
 
+# Load balancers та k8s probes опитують /health кожні кілька секунд з кожної
+# репліки - тіло успішної відповіді кешується на секунду: [monotonic час, bytes]
+_HEALTH_CACHE_TTL = 1.0
+_health_cache = [float("-inf"), b""]
+
+
 @app.get("/health", tags=["System"])
 async def health_check():
     """
@@ -439,12 +670,19 @@ async def health_check():
     - Monitoring систем для алертів
     - Kubernetes health probes
     - CI/CD pipelines для перевірки deployment
+    
+    Успішна відповідь кешується на _HEALTH_CACHE_TTL секунд,
+    помилка (503) не кешується.
     """
+    now = time.monotonic()
+    if now - _health_cache[0] < _HEALTH_CACHE_TTL:
+        return Response(content=_health_cache[1], media_type="application/json")
+    
     try:
-        # Перевіряємо стан основних компонентів
-        search_stats = search_service.get_document_stats()
+        # Перевіряємо стан основних компонентів (без блокування event loop)
+        search_stats = await search_service.aget_document_stats()
         
-        return {
+        body = json_dumps({
             "status": "healthy",
             "timestamp": time.time(),
             "version": settings.app_version,
@@ -453,10 +691,14 @@ async def health_check():
                 "vector_database": search_stats.get("system_health", {}).get("vector_db_healthy", False),
                 "ml_model": search_stats.get("system_health", {}).get("model_loaded", False)
             }
-        }
+        }).encode("utf-8")
+        
+        _health_cache[0] = now
+        _health_cache[1] = body
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        return JSONResponse(
+        return JSON_RESPONSE_CLASS(
             status_code=503,  # Service Unavailable
             content={
                 "status": "unhealthy",
@@ -489,24 +731,90 @@ async def root():
 
 # === Функція для запуску в development режимі ===
 
+def _server_implementations() -> Tuple[str, str]:
+    """
+    Event loop та HTTP parser для uvicorn: uvloop + httptools, якщо встановлені.
+    
+    uvloop (libuv) та httptools (C parser) входять в uvicorn[standard],
+    але uvloop недоступний на Windows - тоді лишаються asyncio + h11.
+    """
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    return loop, http
+
+
 def run_development_server():
     """
     Запуск development сервера.
     
     Ця функція використовується тільки для локальної розробки.
-    В production використовуємо gunicorn або інший WSGI сервер.
+    В production використовуємо run_production_server.
     """
+    loop, http = _server_implementations()
     uvicorn.run(
         "app.main:app",
         host=settings.api_host,
         port=settings.api_port,
         reload=True,      # Автоматичний перезапуск при зміні коду
+        loop=loop,
+        http=http,
         log_level=settings.log_level.lower(),
         access_log=True   # Логування всіх HTTP запитів
     )
 
 
+def run_production_server():
+    """
+    Запуск production сервера з worker процесом на кожне CPU ядро.
+    
+    З gunicorn - preforking з UvicornWorker, без preload_app: ML модель,
+    з'єднання з векторною БД та потік логування створюються в lifespan
+    кожного worker після fork - потоки та CUDA контекст fork не переживають.
+    Без gunicorn - вбудований multiprocess режим uvicorn.
+    """
+    workers = settings.api_workers or os.cpu_count() or 1
+    
+    # FAISS індекс живе в пам'яті процесу - кожен worker мав би власну
+    # незалежну копію, і зміни через один worker не бачили б інші
+    if settings.vector_store_backend.lower() == "faiss" and workers > 1:
+        if settings.api_workers:
+            raise RuntimeError(
+                f"VECTOR_STORE_BACKEND=faiss keeps the index in process memory and "
+                f"cannot be shared by API_WORKERS={workers}; use Qdrant or API_WORKERS=1"
+            )
+        logger.warning("FAISS vector store is in-process, starting a single API worker")
+        workers = 1
+    
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        loop, http = _server_implementations()
+        uvicorn.run(
+            "app.main:app",
+            host=settings.api_host,
+            port=settings.api_port,
+            workers=workers,
+            loop=loop,
+            http=http,
+            log_level=settings.log_level.lower()
+        )
+        return
+    
+    class GunicornApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{settings.api_host}:{settings.api_port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("loglevel", settings.log_level.lower())
+        
+        def load(self):
+            return app
+    
+    GunicornApplication().run()
+
+
 # Точка входу для direct execution
 if __name__ == "__main__":
+    setup_logging()
     logger.info("🚀 Starting development server...")
     run_development_server()
\ No newline at end of file
@@ -11,22 +11,69 @@ Document Processor Service - Екстракція та підготовка те
 4) екстракцію метаданих
 """
 
+import multiprocessing
 import os
 import re
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
+from itertools import accumulate
 import logging
 
 # Document parsing libraries
 from docx import Document
 import PyPDF2
 
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # PyMuPDF опціональний - без нього основний екстрактор PyPDF2
+    fitz = None
+
 # Our configuration
 from app.config import settings
+from app.utils.logger import setup_worker_logging
 
 logger = logging.getLogger(__name__)
 
+# Регулярні вирази clean_text компілюються один раз при імпорті модуля
+_RE_WS = re.compile(r'\s+')
+_RE_NONCHAR = re.compile(r'[^\w\s\.\,\!\?\;\:\-\(\)\[\]\"\']+', re.UNICODE)
+_RE_DOTS = re.compile(r'[\.]{2,}')
+_RE_BANGS = re.compile(r'[\!\?]{2,}')
+
+
+def _iter_pages(page_texts: Iterable[Optional[str]]) -> Iterator[str]:
+    """Непорожні сторінки PDF з маркером номера сторінки, по одній."""
+    for page_num, page_text in enumerate(page_texts, 1):
+        if page_text and page_text.strip():
+            yield f"[Сторінка {page_num}]\n{page_text}"
+
+
+@lru_cache(maxsize=settings.clean_text_cache_size)
+def _clean_text_cached(line: str) -> str:
+    """
+    Очищення одного рядка тексту (див. DocumentProcessor.clean_text).
+    
+    Функція чиста, тому повторювані рядки (колонтитули, юридичні примітки)
+    очищуються один раз, а далі беруться з кешу.
+    """
+    # Заміна множинних пробілів та переносів рядків
+    line = _RE_WS.sub(' ', line)
+    
+    # Видалення зайвих символів, але зберігання пунктуації (важливо для семантики)
+    line = _RE_NONCHAR.sub(' ', line)
+    
+    # Видалення множинних розділових знаків
+    line = _RE_DOTS.sub('.', line)
+    line = _RE_BANGS.sub('!', line)
+    
+    # Прибираємо зайві пробіли
+    return line.strip()
+
 
 class DocumentChunk:
     """
@@ -34,8 +81,16 @@ class DocumentChunk:
     
     Ця модель використовує composition pattern - вона містить не лише текст,
     але й контекстну інформацію, яка критично важлива для якісного пошуку.
+    
+    metadata - спільний dict для всіх чанків одного документа (не копія),
+    тому його не можна змінювати через окремий чанк.
     """
     
+    __slots__ = (
+        "text", "chunk_id", "source_file", "page_number", "chunk_index",
+        "metadata", "word_count", "char_count", "created_at"
+    )
+    
     def __init__(
         self, 
         text: str, 
@@ -43,7 +98,8 @@ class DocumentChunk:
         source_file: str,
         page_number: Optional[int] = None,
         chunk_index: int = 0,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        created_at: Optional[str] = None
     ):
         self.text = text
         self.chunk_id = chunk_id
@@ -55,7 +111,8 @@ class DocumentChunk:
         # Автоматично генеруємо додаткові метадані
         self.word_count = len(text.split())
         self.char_count = len(text)
-        self.created_at = datetime.now().isoformat()
+        # Чанки одного документа можуть передати спільний час створення
+        self.created_at = created_at or datetime.now().isoformat()
     
     def to_dict(self) -> Dict[str, Any]:
         """Конвертує чанк в словник для зберігання в векторній БД."""
@@ -104,10 +161,16 @@ class DocumentProcessor:
         documents = []
         
         try:
-            # Рекурсивний обхід всіх файлів
-            for file_path in self.documents_path.rglob("*"):
-                if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions:
-                    documents.append(file_path)
+            # Рекурсивний обхід через os.scandir: DirEntry вже знає тип запису,
+            # тому на кожен файл не потрібен окремий stat() як у Path.is_file()
+            pending = [self.documents_path]
+            while pending:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):  # як rglob - без symlink директорій
+                            pending.append(entry.path)
+                        elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in self.supported_extensions:
+                            documents.append(Path(entry.path))
                     
             logger.info(f"Discovered {len(documents)} documents")
             return documents
@@ -171,53 +234,78 @@ class DocumentProcessor:
             logger.error(f"Error extracting text from {file_path}: {str(e)}")
             return "", {}
     
+    def _extract_pdf_pymupdf(self, file_path: Path) -> Tuple[str, Dict[str, Any]]:
+        """Текст та метадані PDF через PyMuPDF."""
+        with fitz.open(str(file_path)) as doc:
+            full_text = "\n\n".join(_iter_pages(page.get_text("text") for page in doc))
+            
+            metadata = {
+                "page_count": doc.page_count,
+                "extraction_method": "PyMuPDF"
+            }
+            
+            # PyMuPDF повертає порожні рядки для відсутніх полів
+            pdf_metadata = doc.metadata or {}
+            if pdf_metadata.get("title"):
+                metadata["title"] = pdf_metadata["title"]
+            if pdf_metadata.get("author"):
+                metadata["author"] = pdf_metadata["author"]
+            if pdf_metadata.get("creationDate"):
+                metadata["created_date"] = pdf_metadata["creationDate"]
+        
+        return full_text, metadata
+    
+    def _extract_pdf_pypdf2(self, file_path: Path) -> Tuple[str, Dict[str, Any]]:
+        """Текст та метадані PDF через PyPDF2."""
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            full_text = "\n\n".join(_iter_pages(page.extract_text() for page in pdf_reader.pages))
+            
+            # Базові метадані
+            metadata = {
+                "page_count": len(pdf_reader.pages),
+                "extraction_method": "PyPDF2"
+            }
+            
+            # Екстракція метаданих PDF
+            if pdf_reader.metadata:
+                if pdf_reader.metadata.get('/Title'):
+                    metadata["title"] = str(pdf_reader.metadata['/Title'])
+                if pdf_reader.metadata.get('/Author'):
+                    metadata["author"] = str(pdf_reader.metadata['/Author'])
+                if pdf_reader.metadata.get('/CreationDate'):
+                    metadata["created_date"] = str(pdf_reader.metadata['/CreationDate'])
+        
+        return full_text, metadata
+    
     def extract_text_from_pdf(self, file_path: Path) -> Tuple[str, Dict[str, Any]]:
         """
         Робастна екстракція тексту з PDF файлу з fallback стратегією.
         
-        1. Спочатку PyPDF2 (швидко, для простих PDF)
-        2. Fallback до pdfplumber (для складних макетів)
+        1. Спочатку PyMuPDF (C екстрактор, в рази швидший), або PyPDF2 якщо його немає
+        2. Fallback до pdfplumber (для складних макетів та таблиць)
         3. Додаткові метадані про метод екстракції
         """
         metadata = {"file_type": "pdf"}
         
-        # Метод 1: PyPDF2 - найшвидший для простих PDF
+        # Метод 1: PyMuPDF (C бібліотека MuPDF), без нього - PyPDF2
+        primary_method = "PyMuPDF" if fitz is not None else "PyPDF2"
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                text_parts = []
-                for page_num, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        text_parts.append(f"[Сторінка {page_num + 1}]\n{page_text}")
-                
-                full_text = "\n\n".join(text_parts)
-                
-                # Базові метадані
-                metadata.update({
-                    "page_count": len(pdf_reader.pages),
-                    "extraction_method": "PyPDF2"
-                })
-                
-                # Екстракція метаданих PDF
-                if pdf_reader.metadata:
-                    if pdf_reader.metadata.get('/Title'):
-                        metadata["title"] = str(pdf_reader.metadata['/Title'])
-                    if pdf_reader.metadata.get('/Author'):
-                        metadata["author"] = str(pdf_reader.metadata['/Author'])
-                    if pdf_reader.metadata.get('/CreationDate'):
-                        metadata["created_date"] = str(pdf_reader.metadata['/CreationDate'])
+            if fitz is not None:
+                full_text, primary_metadata = self._extract_pdf_pymupdf(file_path)
+            else:
+                full_text, primary_metadata = self._extract_pdf_pypdf2(file_path)
+            metadata.update(primary_metadata)
+            
+            # Якщо витягнули достатньо тексту, повертаємо результат
+            if len(full_text.strip()) > 50:  # Мінімальна кількість символів
+                logger.debug(f"PDF extracted with {primary_method}: {len(full_text)} chars")
+                return full_text, metadata
+            else:
+                logger.warning(f"{primary_method} extracted insufficient text ({len(full_text)} chars), trying fallback")
                 
-                # Якщо витягнули достатньо тексту, повертаємо результат
-                if len(full_text.strip()) > 50:  # Мінімальна кількість символів
-                    logger.debug(f"PDF extracted with PyPDF2: {len(full_text)} chars")
-                    return full_text, metadata
-                else:
-                    logger.warning(f"PyPDF2 extracted insufficient text ({len(full_text)} chars), trying fallback")
-                    
         except Exception as e:
-            logger.warning(f"PyPDF2 failed for {file_path}: {str(e)}, trying fallback")
+            logger.warning(f"{primary_method} failed for {file_path}: {str(e)}, trying fallback")
         
         # Метод 2: Fallback до pdfplumber для складних PDF
         try:
@@ -225,6 +313,7 @@ class DocumentProcessor:
             
             with pdfplumber.open(file_path) as pdf:
                 text_parts = []
+                has_tables = False
                 
                 for page_num, page in enumerate(pdf.pages):
                     # Витягуємо звичайний текст
@@ -233,21 +322,22 @@ class DocumentProcessor:
                         text_parts.append(f"[Сторінка {page_num + 1}]\n{page_text}")
                     
                     # Витягуємо таблиці окремо (важливо для структурованих документів)
+                    # (таблиці сторінки витягуються один раз - і для тексту, і для has_tables)
                     tables = page.extract_tables()
+                    has_tables = has_tables or bool(tables)
                     for table_num, table in enumerate(tables):
                         if table:
-                            table_text = f"[Таблиця {table_num + 1} на сторінці {page_num + 1}]\n"
+                            table_lines = [f"[Таблиця {table_num + 1} на сторінці {page_num + 1}]"]
                             for row in table:
                                 if row and any(cell for cell in row if cell):
-                                    row_text = " | ".join([str(cell or "") for cell in row])
-                                    table_text += row_text + "\n"
-                            text_parts.append(table_text)
+                                    table_lines.append(" | ".join([str(cell or "") for cell in row]))
+                            text_parts.append("\n".join(table_lines) + "\n")
                 
                 full_text = "\n\n".join(text_parts)
                 metadata.update({
                     "page_count": len(pdf.pages),
                     "extraction_method": "pdfplumber",
-                    "has_tables": any(page.extract_tables() for page in pdf.pages)
+                    "has_tables": has_tables
                 })
                 
                 if len(full_text.strip()) > 10:
@@ -301,82 +391,53 @@ class DocumentProcessor:
         Цей метод реалізує preprocessing pipeline для покращення якості
         векторизації та пошуку. Кожна операція має конкретне обґрунтування.
         """
-        # Заміна множинних пробілів та переносів рядків
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Видалення зайвих символів, але зберігання пунктуації (важливо для семантики)
-        text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)\[\]\"\']+', ' ', text, flags=re.UNICODE)
-        
-        # Видалення множинних розділових знаків
-        text = re.sub(r'[\.]{2,}', '.', text)
-        text = re.sub(r'[\!\?]{2,}', '!', text)
-        
-        # Прибираємо зайві пробіли
-        text = text.strip()
-        
-        return text
+        # Очищуємо кожен рядок окремо через кеш і склеюємо пробілом -
+        # перенос рядка все одно замінився б на пробіл
+        cleaned_lines = (_clean_text_cached(line) for line in text.splitlines())
+        return " ".join(line for line in cleaned_lines if line)
     
     def split_into_chunks(self, text: str, metadata: Dict[str, Any]) -> List[str]:
         """
         Розбиття тексту на чанки з overlap для збереження контексту.
         
-        Алгоритм:
-        1. Намагаємося розбивати по реченнях (семантично значущі границі)
-        2. Якщо речення довше за максимальний розмір, розбиваємо по словах
-        3. Додаємо overlap між чанками для збереження контексту
+        Алгоритм - ковзне вікно по словах за O(n):
+        1. Вікно - найбільша кількість слів, що вміщується в chunk_size символів
+        2. Якщо в другій половині вікна закінчується речення, чанк ріжеться по ньому
+        3. Наступне вікно перекриває поточне на chunk_overlap символів (цілими словами)
         """
         if not text or len(text) < self.chunk_size:
             return [text] if text else []
         
-        # Спочатку розбиваємо по реченнях
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        # Токенізуємо один раз; offsets[i] - сума (len(token) + 1) перших i слів,
+        # тож довжина " ".join(tokens[a:b]) = offsets[b] - offsets[a] - 1
+        tokens = text.split()
+        offsets = [0, *accumulate(len(token) + 1 for token in tokens)]
+        token_count = len(tokens)
         
         chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            # Якщо додавання речення не перевищує розмір чанку
-            if len(current_chunk + " " + sentence) <= self.chunk_size:
-                current_chunk += " " + sentence if current_chunk else sentence
-            else:
-                # Зберігаємо поточний чанк, якщо він не порожній
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                
-                # Починаємо новий чанк
-                if len(sentence) <= self.chunk_size:
-                    current_chunk = sentence
-                else:
-                    # Якщо речення довше за максимальний розмір, розбиваємо по словах
-                    words = sentence.split()
-                    word_chunk = ""
-                    
-                    for word in words:
-                        if len(word_chunk + " " + word) <= self.chunk_size:
-                            word_chunk += " " + word if word_chunk else word
-                        else:
-                            if word_chunk:
-                                chunks.append(word_chunk.strip())
-                            word_chunk = word
-                    
-                    current_chunk = word_chunk
-        
-        # Додаємо останній чанк
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        # Додаємо overlap між чанками для збереження контексту
-        overlapped_chunks = []
-        for i, chunk in enumerate(chunks):
-            if i > 0 and self.chunk_overlap > 0:
-                # Берємо останні слова з попереднього чанку
-                prev_words = chunks[i-1].split()[-self.chunk_overlap//10:]  # Приблизно
-                overlap_text = " ".join(prev_words)
-                chunk = overlap_text + " " + chunk
+        start = 0
+        while start < token_count:
+            # Найдовше вікно tokens[start:end], що вміщується в chunk_size символів
+            # (одне слово, довше за chunk_size, стає окремим чанком)
+            end = bisect_right(offsets, offsets[start] + self.chunk_size + 1, lo=start + 1) - 1
+            end = max(end, start + 1)
+            
+            # Якщо в другій половині вікна є кінець речення - ріжемо по ньому
+            if end < token_count:
+                for boundary in range(end, start + (end - start) // 2, -1):
+                    if tokens[boundary - 1][-1] in ".!?":
+                        end = boundary
+                        break
             
-            overlapped_chunks.append(chunk)
+            chunks.append(" ".join(tokens[start:end]))
+            if end >= token_count:
+                break
+            
+            # Overlap: наступне вікно починається з останніх слів поточного,
+            # сумарно не довших за chunk_overlap символів
+            start = bisect_left(offsets, offsets[end] - self.chunk_overlap - 1, lo=start + 1, hi=end)
         
-        return overlapped_chunks
+        return chunks
     
     def process_document(self, file_path: Path) -> List[DocumentChunk]:
         """
@@ -413,27 +474,34 @@ class DocumentProcessor:
         # Розбиття на чанки
         text_chunks = self.split_into_chunks(cleaned_text, doc_metadata)
         
+        # Один stat() на файл замість двох на кожен чанк
+        file_stat = file_path.stat()
+        
+        # Метадані файлу однакові для всіх чанків - один dict на документ
+        source_file = str(file_path)
+        file_metadata = {
+            **doc_metadata,
+            "document_id": file_path.stem,  # Спільний для всіх чанків файлу
+            "file_name": file_path.name,
+            "file_path": source_file,
+            "file_size": file_stat.st_size,
+            "file_modified": datetime.fromtimestamp(file_stat.st_mtime).isoformat(),
+        }
+        created_at = datetime.now().isoformat()
+        
         # Створення об'єктів DocumentChunk
         document_chunks = []
         for i, chunk_text in enumerate(text_chunks):
             # Генеруємо унікальний ID для чанку
             chunk_id = f"{file_path.stem}_{i:04d}"
             
-            # Додаємо метадані файлу
-            chunk_metadata = {
-                **doc_metadata,
-                "file_name": file_path.name,
-                "file_path": str(file_path),
-                "file_size": file_path.stat().st_size,
-                "file_modified": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-            }
-            
             chunk = DocumentChunk(
                 text=chunk_text,
                 chunk_id=chunk_id,
-                source_file=str(file_path),
+                source_file=source_file,
                 chunk_index=i,
-                metadata=chunk_metadata
+                metadata=file_metadata,
+                created_at=created_at
             )
             
             document_chunks.append(chunk)
@@ -441,6 +509,18 @@ class DocumentProcessor:
         logger.info(f"Created {len(document_chunks)} chunks from {file_path}")
         return document_chunks
     
+    def _process_document_safe(self, file_path: Path) -> Tuple[List[DocumentChunk], Optional[str]]:
+        """
+        process_document, що повертає помилку замість виключення.
+        
+        Виконується і в дочірніх процесах: помилка повертається як рядок,
+        щоб батьківський процес залогував її та продовжив обробку.
+        """
+        try:
+            return self.process_document(file_path), None
+        except Exception as e:
+            return [], str(e)
+    
     def process_all_documents(self) -> List[DocumentChunk]:
         """
         Обробка всіх документів в директорії.
@@ -453,13 +533,31 @@ class DocumentProcessor:
         
         logger.info(f"Starting processing of {len(documents)} documents")
         
-        for doc_path in documents:
+        workers = min(settings.ingest_workers or os.cpu_count() or 1, len(documents))
+        if workers > 1:
+            # Парсинг PDF/DOCX та chunking - CPU-bound і незалежні для кожного
+            # файлу, а GIL не дає потокам працювати паралельно - тому процеси
+            # spawn замість fork: сервер багатопотоковий (QueueListener логів,
+            # torch/OpenMP, threadpool індексації) - fork такого процесу може
+            # зависнути, а успадкована черга логів не має listener'а в дочірньому
             try:
-                chunks = self.process_document(doc_path)
-                all_chunks.extend(chunks)
-            except Exception as e:
-                logger.error(f"Failed to process {doc_path}: {str(e)}")
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=setup_worker_logging
+                ) as executor:
+                    results = list(executor.map(self._process_document_safe, documents, chunksize=4))
+            except BrokenProcessPool as e:
+                logger.warning(f"Process pool failed, falling back to serial processing: {str(e)}")
+                results = [self._process_document_safe(doc_path) for doc_path in documents]
+        else:
+            results = [self._process_document_safe(doc_path) for doc_path in documents]
+        
+        for doc_path, (chunks, error) in zip(documents, results):
+            if error is not None:
+                logger.error(f"Failed to process {doc_path}: {error}")
                 continue
+            all_chunks.extend(chunks)
         
         logger.info(f"Processed {len(documents)} documents into {len(all_chunks)} chunks")
         return all_chunks
\ No newline at end of file
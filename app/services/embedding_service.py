@@ -14,17 +14,20 @@ Embedding Service - Генерація векторних представлен
 Архітектурний патерн: Singleton + Factory для ефективного управління ML моделями.
 """
 
+import asyncio
+import base64
 import logging
 import numpy as np
-import torch
-from typing import List, Union, Optional, Tuple
-from sentence_transformers import SentenceTransformer
+from typing import TYPE_CHECKING, List, Union, Optional, Tuple
 import pickle
 import hashlib
 from pathlib import Path
 
 from app.config import settings
 
+if TYPE_CHECKING:
+    import torch  # лише для анотацій - runtime імпорт у PyTorch методах
+
 logger = logging.getLogger(__name__)
 
 
@@ -84,6 +87,10 @@ class EmbeddingCache:
         
         return None
     
+    def get_memory(self, text: str) -> Optional[np.ndarray]:
+        """Пошук лише в memory cache - без дискового I/O, безпечно викликати з event loop."""
+        return self.memory_cache.get(self._get_text_hash(text))
+    
     def put(self, text: str, embedding: np.ndarray) -> None:
         """Зберегти ембединг в кеш."""
         text_hash = self._get_text_hash(text)
@@ -102,6 +109,31 @@ class EmbeddingCache:
             logger.warning(f"Failed to cache embedding: {e}")
 
 
+def _cpu_has_native_bf16() -> bool:
+    """
+    Чи виконує CPU bfloat16 matmul апаратно (AVX512-BF16 або AMX).
+    
+    Без цих інструкцій PyTorch емулює bf16 і inference повільніший за fp32.
+    Обидва розширення потребують AVX512, тому спершу дешева перевірка
+    torch.backends.cpu.get_cpu_capability(), далі прапорці з /proc/cpuinfo
+    (Linux - цільова платформа Docker образу; на інших ОС - float32).
+    """
+    import torch
+    
+    if torch.backends.cpu.get_cpu_capability() != "AVX512":
+        return False
+    
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    flags = line.split(":", 1)[1].split()
+                    return "avx512_bf16" in flags or "amx_bf16" in flags
+    except OSError:
+        pass
+    return False
+
+
 class EmbeddingService:
     """
     Основний сервіс для генерації та управління ембедингами.
@@ -128,11 +160,26 @@ class EmbeddingService:
         
         self._initialized = True
         self.model_name = settings.embedding_model
-        self.device = self._determine_device()
+        self._device: Optional[str] = None  # Визначається при першому зверненні
         self.model = None  # Lazy loading
+        self.dtype = None  # torch.dtype, визначається у _load_model
+        self.jit_backend = "none"
         self.cache = EmbeddingCache()
         
-        logger.info(f"EmbeddingService initialized with model: {self.model_name}, device: {self.device}")
+        logger.info(f"EmbeddingService initialized with model: {self.model_name}")
+    
+    @property
+    def device(self) -> str:
+        """
+        Пристрій для обчислень, визначений ліниво.
+        
+        Сервіс створюється при імпорті, зокрема в master процесі gunicorn
+        до fork - перевірка CUDA там ініціалізувала б драйвер, який
+        не переживає fork. Тому torch торкається лише worker.
+        """
+        if self._device is None:
+            self._device = self._determine_device()
+        return self._device
     
     def _determine_device(self) -> str:
         """
@@ -143,6 +190,8 @@ class EmbeddingService:
         if settings.device != "auto":
             return settings.device
         
+        import torch
+        
         # Перевіряємо доступність CUDA (NVIDIA GPU)
         if torch.cuda.is_available():
             device = "cuda"
@@ -171,14 +220,26 @@ class EmbeddingService:
         try:
             logger.info(f"Loading embedding model: {self.model_name}")
             
+            # torch імпортується лише тут - альтернативні backends
+            # (FastEmbedEmbeddingService) не завантажують його взагалі
+            import torch
+            from sentence_transformers import SentenceTransformer
+            
             # Завантажуємо pre-trained модель з HuggingFace
             self.model = SentenceTransformer(self.model_name, device=self.device)
             
             # Налаштування для оптимізації inference
             self.model.eval()  # Переводимо в evaluation mode
             
+            self.dtype = self._resolve_dtype()
+            if self.dtype != torch.float32:
+                self.model.to(self.dtype)
+                logger.info(f"Embedding model weights cast to {self.dtype}")
+            
+            self._apply_jit()
+            
             # Отримуємо розмірність ембедингів для валідації
-            test_embedding = self.model.encode(["test"], convert_to_numpy=True)
+            test_embedding = self._encode(["test"], batch_size=1)
             actual_dim = test_embedding.shape[1]
             
             if actual_dim != settings.embedding_dimension:
@@ -194,6 +255,120 @@ class EmbeddingService:
             logger.error(f"Failed to load embedding model: {str(e)}")
             raise RuntimeError(f"Could not initialize embedding model: {str(e)}")
     
+    def _resolve_dtype(self) -> "torch.dtype":
+        """
+        Точність ваг моделі з settings.embedding_dtype.
+        
+        bfloat16 використовується лише там, де є нативна підтримка, і лише
+        для моделей з mean pooling - саме його виконує _encode_reduced_precision.
+        """
+        import torch
+        from sentence_transformers.models import Pooling
+        
+        if settings.embedding_dtype.lower() != "bfloat16":
+            return torch.float32
+        
+        if self.device == "mps" or (self.device.startswith("cuda") and not torch.cuda.is_bf16_supported()):
+            logger.info(f"bfloat16 is not supported on {self.device}, using float32")
+            return torch.float32
+        
+        if self.device == "cpu" and not _cpu_has_native_bf16():
+            logger.info("CPU has no native bfloat16 (AVX512-BF16/AMX), using float32")
+            return torch.float32
+        
+        modules = list(self.model.children())
+        if len(modules) < 2 or not isinstance(modules[1], Pooling) or not modules[1].pooling_mode_mean_tokens:
+            logger.info("Model does not use mean pooling, using float32")
+            return torch.float32
+        
+        return torch.bfloat16
+    
+    def _apply_jit(self) -> None:
+        """
+        JIT компіляція HuggingFace моделі всередині sentence-transformers.
+        
+        Компілюється лише auto_model - tokenizer, pooling та нормалізація
+        лишаються без змін. dynamic=True потрібен, бо довжина послідовності
+        змінюється між батчами. torch.compile компілює ліниво, тому
+        warmup виконується тут - при помилці повертаємо eager модель.
+        """
+        backend = settings.jit_backend.lower()
+        if backend == "none":
+            return
+        
+        transformer = self.model[0]
+        eager_model = transformer.auto_model
+        try:
+            if backend == "torch_compile":
+                import torch
+                
+                # CUDA graphs з reduce-overhead мають сенс лише на GPU
+                mode = "reduce-overhead" if self.device.startswith("cuda") else "default"
+                transformer.auto_model = torch.compile(transformer.auto_model, mode=mode, dynamic=True)
+            elif backend == "ipex":
+                import intel_extension_for_pytorch as ipex
+                
+                transformer.auto_model = ipex.optimize(transformer.auto_model, dtype=self.dtype)
+            else:
+                logger.warning(f"Unknown JIT backend '{settings.jit_backend}', using eager mode")
+                return
+            
+            self._encode(["test"], batch_size=1)
+            self.jit_backend = backend
+            logger.info(f"Embedding model compiled with {backend}")
+        
+        except Exception as e:
+            transformer.auto_model = eager_model
+            logger.warning(f"JIT backend '{backend}' unavailable, using eager mode: {str(e)}")
+    
+    def _encode_reduced_precision(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """
+        Inference у bfloat16 з pooling та нормалізацією у float32.
+        
+        Transformer працює з bf16 вагами, а token embeddings переводяться
+        у float32 перед mean pooling - для стабільності нормалізації.
+        Токенізація - один виклик tokenizer на батч.
+        """
+        import torch
+        
+        transformer = self.model[0]
+        batches = []
+        
+        with torch.inference_mode():
+            for start in range(0, len(texts), batch_size):
+                features = self.model.tokenize(texts[start:start + batch_size])
+                features = {name: tensor.to(self.model.device) for name, tensor in features.items()}
+                
+                token_embeddings = transformer(features)["token_embeddings"].float()
+                mask = features["attention_mask"].unsqueeze(-1).float()
+                pooled = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                
+                batches.append(torch.nn.functional.normalize(pooled, p=2, dim=1).cpu().numpy())
+        
+        return np.vstack(batches)
+    
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """
+        Прямий виклик моделі без кешу. Повертає матрицю (len(texts), dim).
+        
+        Єдина точка звернення до ML backend - альтернативні backends
+        (див. FastEmbedEmbeddingService) перевизначають тільки цей метод
+        та _load_model.
+        """
+        import torch
+        
+        if self.dtype != torch.float32:
+            return self._encode_reduced_precision(texts, batch_size)
+        
+        with torch.no_grad():  # Відключаємо gradient computation для економії пам'яті
+            return self.model.encode(
+                texts,
+                convert_to_numpy=True,
+                normalize_embeddings=True,  # L2 normalization для косинусної схожості
+                batch_size=batch_size,
+                show_progress_bar=len(texts) > 50  # Показуємо прогрес для великих батчів
+            )
+    
     def encode_single(self, text: str, use_cache: bool = True) -> np.ndarray:
         """
         Генерація ембединга для одного тексту.
@@ -223,13 +398,7 @@ class EmbeddingService:
         
         try:
             # Генеруємо ембединг
-            with torch.no_grad():  # Відключаємо gradient computation для економії пам'яті
-                embedding = self.model.encode(
-                    [normalized_text],
-                    convert_to_numpy=True,
-                    normalize_embeddings=True,  # L2 normalization для косинусної схожості
-                    batch_size=1
-                )[0]
+            embedding = self._encode([normalized_text], batch_size=1)[0]
             
             # Зберігаємо в кеш
             if use_cache:
@@ -289,15 +458,8 @@ class EmbeddingService:
             self._load_model()
             
             try:
-                with torch.no_grad():
-                    # Батчева обробка для ефективності
-                    computed_embeddings = self.model.encode(
-                        texts_to_compute,
-                        convert_to_numpy=True,
-                        normalize_embeddings=True,
-                        batch_size=batch_size,
-                        show_progress_bar=len(texts_to_compute) > 50  # Показуємо прогрес для великих батчів
-                    )
+                # Батчева обробка для ефективності
+                computed_embeddings = self._encode(texts_to_compute, batch_size=batch_size)
                 
                 # Розміщуємо обчислені ембединги в правильних позиціях
                 for i, (computed_embedding, original_index) in enumerate(zip(computed_embeddings, indices_to_compute)):
@@ -388,10 +550,132 @@ class EmbeddingService:
             "model_name": self.model_name,
             "loaded": True,
             "device": str(self.model.device),
+            "dtype": str(self.dtype).replace("torch.", ""),
+            "jit_backend": self.jit_backend,
             "max_seq_length": getattr(self.model, 'max_seq_length', 'unknown'),
             "embedding_dimension": settings.embedding_dimension
         }
 
 
+def encode_embedding_base64(embedding: np.ndarray) -> str:
+    """
+    Компактне представлення ембединга для API відповідей.
+    
+    Ембединги L2-нормалізовані, тому FP16 зберігає їх з похибкою
+    значно меншою за різницю між релевантними результатами.
+    Base64 від FP16 байтів приблизно в 6 разів менший за JSON список float.
+    """
+    return base64.b64encode(np.asarray(embedding, dtype=np.float16).tobytes()).decode("ascii")
+
+
+def decode_embedding_base64(encoded: str) -> np.ndarray:
+    """Зворотне перетворення encode_embedding_base64 у float32 вектор."""
+    return np.frombuffer(base64.b64decode(encoded), dtype=np.float16).astype(np.float32)
+
+
+class BatchedEmbedder:
+    """
+    Micro-batcher для конкурентних запитів на ембединги.
+    
+    Transformer модель обробляє батч з N текстів значно швидше ніж
+    N окремих викликів. Конкурентні async запити складаються в чергу,
+    фоновий worker чекає до `max_wait_ms` або до `max_batch` текстів
+    і виконує один encode_batch в thread executor.
+    
+    Використання:
+    embedding = await embedding_batcher.submit("текст запиту")
+    """
+    
+    def __init__(self, service: EmbeddingService, max_batch: int = 32, max_wait_ms: float = 5.0):
+        self.service = service
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    def _ensure_worker(self) -> asyncio.Queue:
+        """Lazy запуск worker в поточному event loop."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        return self._queue
+    
+    async def submit(self, text: str) -> np.ndarray:
+        """
+        Ставить текст у чергу та чекає його ембединг.
+        
+        Попадання в memory cache повертається одразу, без черги
+        та очікування вікна батчу.
+        """
+        cached_embedding = self.service.cache.get_memory(text.strip())
+        if cached_embedding is not None:
+            return cached_embedding
+        
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((text, future))
+        return await future
+    
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """Чекає перший текст, потім добирає інші до дедлайну або max_batch."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _run(self) -> None:
+        """Головний цикл worker: один encode_batch на зібраний батч."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = await self._collect_batch()
+            # Однакові конкурентні запити (популярний запит) рахуються один раз
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            
+            try:
+                computed = await loop.run_in_executor(
+                    None, self.service.encode_batch, texts, self.max_batch
+                )
+            except Exception as e:
+                logger.error(f"Batched embedding failed for {len(texts)} texts: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            embeddings = dict(zip(texts, computed))
+            for text, future in batch:
+                if not future.done():  # Клієнт міг скасувати запит
+                    future.set_result(embeddings[text])
+
+
+def create_embedding_service() -> EmbeddingService:
+    """
+    Factory для вибору ML backend ембедингів з конфігурації.
+    
+    FastEmbed модуль імпортується ліниво - fastembed опціональна залежність.
+    """
+    backend = settings.embedding_backend.lower()
+    if backend == "fastembed":
+        from app.services.embedding_service_fastembed import FastEmbedEmbeddingService
+        return FastEmbedEmbeddingService()
+    if backend != "sentence-transformers":
+        logger.warning(f"Unknown embedding backend '{backend}', falling back to sentence-transformers")
+    return EmbeddingService()
+
+
 # Глобальний екземпляр сервісу для використання в інших модулях
-embedding_service = EmbeddingService()
\ No newline at end of file
+embedding_service = create_embedding_service()
+
+# Глобальний micro-batcher для async endpoints
+embedding_batcher = BatchedEmbedder(embedding_service)
\ No newline at end of file
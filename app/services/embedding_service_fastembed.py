@@ -0,0 +1,106 @@
+# FastEmbed (ONNX) embedding backend
+
+"""
+FastEmbed Embedding Service - ONNX Runtime backend для генерації ембедингів.
+
+Альтернатива PyTorch/sentence-transformers для CPU deployment:
+1. ONNX Runtime з оптимізованими (квантизованими) моделями - в рази швидше на CPU
+2. Не потребує torch в runtime - значно менший RSS та швидший cold start
+3. Той самий публічний API що й EmbeddingService (кеш, batch, model info)
+
+Вмикається через EMBEDDING_BACKEND=fastembed. Модель береться з
+EMBEDDING_MODEL - paraphrase-multilingual-MiniLM-L12-v2 FastEmbed (від 0.3)
+постачає як int8 квантизований ONNX експорт (qdrant/...-onnx-Q), тому
+модель та мова пошуку не змінюються. Чи квантизована обрана модель,
+визначається з реєстру FastEmbed і видно в get_model_info.
+"""
+
+import logging
+import os
+from typing import List
+
+import numpy as np
+
+from app.config import settings
+from app.services.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+class FastEmbedEmbeddingService(EmbeddingService):
+    """
+    EmbeddingService з inference через fastembed.TextEmbedding.
+    
+    Перевизначає тільки завантаження моделі та прямий виклик encode -
+    кешування, батчинг та fallback логіка успадковуються.
+    """
+    
+    _instance = None  # Окремий singleton, не спільний з PyTorch backend
+    
+    # Квантизовані експорти FastEmbed мають суфікс -q/-quantized у назві джерела
+    _QUANTIZED_SUFFIXES = ("-q", "-quantized")
+    quantized = False
+    
+    def _determine_device(self) -> str:
+        """ONNX backend завжди працює на CPU."""
+        return "cpu"
+    
+    def _load_model(self) -> None:
+        """Lazy loading ONNX моделі."""
+        if self.model is not None:
+            return
+        
+        try:
+            from fastembed import TextEmbedding
+            
+            logger.info(f"Loading FastEmbed model: {self.model_name}")
+            self.model = TextEmbedding(self.model_name, threads=os.cpu_count())
+            
+            description = next(
+                (model for model in TextEmbedding.list_supported_models() if model["model"] == self.model_name),
+                {}
+            )
+            source = description.get("sources", {}).get("hf", "")
+            self.quantized = source.lower().endswith(self._QUANTIZED_SUFFIXES)
+            if not self.quantized:
+                logger.warning(f"FastEmbed model {self.model_name} ({source or 'unknown source'}) is not int8 quantized")
+            
+            actual_dim = self.embed_batch(["test"]).shape[1]
+            if actual_dim != settings.embedding_dimension:
+                logger.warning(
+                    f"Model dimension ({actual_dim}) differs from config ({settings.embedding_dimension})."
+                )
+            
+            logger.info(f"FastEmbed model loaded successfully. Embedding dimension: {actual_dim}")
+        
+        except Exception as e:
+            self.model = None
+            logger.error(f"Failed to load FastEmbed model: {str(e)}")
+            raise RuntimeError(f"Could not initialize embedding model: {str(e)}")
+    
+    def embed_batch(self, texts: List[str], batch_size: int = 256) -> np.ndarray:
+        """
+        Ембединги для списку текстів як матриця (len(texts), dim) float32.
+        
+        Вектори L2-нормалізуються, щоб скалярний добуток дорівнював
+        косинусній схожості - як і для sentence-transformers backend.
+        """
+        self._load_model()
+        embeddings = np.asarray(list(self.model.embed(texts, batch_size=batch_size)), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+    
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Прямий виклик ONNX моделі без кешу."""
+        return self.embed_batch(texts, batch_size=batch_size)
+    
+    def get_model_info(self) -> dict:
+        """Отримання інформації про завантажену модель."""
+        return {
+            "model_name": self.model_name,
+            "backend": "fastembed",
+            "loaded": self.model is not None,
+            "device": self.device,
+            "quantized": self.quantized,
+            "embedding_dimension": settings.embedding_dimension
+        }
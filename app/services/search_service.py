@@ -20,15 +20,19 @@ Search Service - Високорівнева оркестрація семант
 
 import logging
 import asyncio
+import threading
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 import time
 
+import numpy as np
+
 from app.config import settings
 from app.services.document_processor import DocumentProcessor, DocumentChunk
 from app.services.embedding_service import embedding_service
-from app.services.vector_store import vector_store, SearchResult
+from app.services.vector_store import vector_store, SearchResult, chunk_content_hash
+from app.utils.rerank import fuse_scores
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +92,9 @@ class SearchService:
         # Кеш для часто використовуваних запитів
         self.query_cache: Dict[str, Tuple[List[SearchResult], float]] = {}
         self.cache_ttl = 300  # 5 хвилин TTL для кешу
+        # search() виконується в потоках threadpool - читання, запис
+        # та витіснення з query_cache виконуються під цим lock
+        self._query_cache_lock = threading.Lock()
         
         logger.info("SearchService initialized with all dependencies")
     
@@ -127,7 +134,42 @@ class SearchService:
             logger.error(f"Failed to initialize search system: {str(e)}")
             return False
     
-    def index_documents_from_path(self, custom_path: Optional[str] = None) -> Dict[str, Any]:
+    def _warmup(self, sample_queries: List[str]) -> Dict[str, Any]:
+        """
+        Прогрів моделі та векторної БД перед першими запитами.
+        
+        Перші forward passes з новими розмірами батчу вибирають kernels
+        (CUDA autotune, oneDNN), а з'єднання з Qdrant ще холодне. Кеш
+        ембедингів та запитів оминається - прогрів не заповнює їх
+        штучними запитами.
+        """
+        started = time.time()
+        
+        embedding = None
+        for text in sample_queries:
+            embedding = self.embedding_service.encode_single(text, use_cache=False)
+        self.embedding_service.encode_batch(sample_queries, batch_size=len(sample_queries), use_cache=False)
+        
+        if embedding is not None and len(embedding) > 0:
+            self.vector_store.search_similar(query_embedding=embedding, limit=1)
+        
+        return {
+            "queries": len(sample_queries),
+            "duration_ms": round((time.time() - started) * 1000, 2)
+        }
+    
+    async def warmup(self, sample_queries: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Async прогрів системи у threadpool - event loop не блокується."""
+        sample_queries = sample_queries or ["hello world", "тестовий запит"]
+        return await asyncio.to_thread(self._warmup, sample_queries)
+    
+    def index_documents_from_path(
+        self,
+        custom_path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        bulk_load: bool = False
+    ) -> Dict[str, Any]:
         """
         Повна індексація документів з заданого шляху.
         
@@ -136,6 +178,9 @@ class SearchService:
         
         Args:
             custom_path: Опціональний шлях до документів (за замовчуванням з config)
+            batch_size: Розмір батчу upsert у векторну БД (за замовчуванням з config)
+            concurrency: Кількість паралельних upsert (за замовчуванням з config)
+            bulk_load: Завантаження без індексації по батчах, якщо колекція порожня
             
         Returns:
             Dict з результатами індексації та статистикою
@@ -179,11 +224,24 @@ class SearchService:
             
             # Етап 3: Індексація у векторну БД
             indexing_start = time.time()
-            indexed_count = self.vector_store.index_document_chunks_batch(
-                chunks=all_chunks,
-                embeddings=embeddings,
-                batch_size=100  # Більший batch для векторної БД
-            )
+            indexed_count = None
+            if bulk_load:
+                indexed_count = self.vector_store.bulk_load_chunks(
+                    chunks=all_chunks,
+                    embeddings=embeddings,
+                    concurrency=concurrency or settings.indexing_concurrency
+                )
+                if indexed_count is None:
+                    logger.info("Collection is not empty - falling back to batch upsert")
+            bulk_load_used = indexed_count is not None
+            
+            if not bulk_load_used:
+                indexed_count = self.vector_store.index_document_chunks_batch(
+                    chunks=all_chunks,
+                    embeddings=embeddings,
+                    batch_size=batch_size or settings.indexing_batch_size,
+                    concurrency=concurrency or settings.indexing_concurrency
+                )
             indexing_time = time.time() - indexing_start
             
             total_time = time.time() - start_time
@@ -198,7 +256,8 @@ class SearchService:
                 "embedding_time_s": round(embedding_time, 2),
                 "indexing_time_s": round(indexing_time, 2),
                 "total_time_s": round(total_time, 2),
-                "avg_time_per_chunk_ms": round((total_time / len(all_chunks)) * 1000, 2) if all_chunks else 0
+                "avg_time_per_chunk_ms": round((total_time / len(all_chunks)) * 1000, 2) if all_chunks else 0,
+                "bulk_load_used": bulk_load_used
             }
             
             # Відновлюємо оригінальний шлях якщо змінювали
@@ -229,13 +288,104 @@ class SearchService:
                 "stats": {"total_time_s": time.time() - start_time}
             }
     
+    def reindex_document(self, document_id: str) -> Dict[str, Any]:
+        """
+        Переіндексація одного документа з мінімальною кількістю записів.
+        
+        Чанки мають детерміновані ID (chunk_id), а payload містить хеш тексту.
+        Тому ембединги генеруються і записуються лише для змінених чанків,
+        а чанки, яких більше немає в документі, видаляються одним запитом.
+        
+        Args:
+            document_id: ID документа (назва файлу без розширення)
+            
+        Returns:
+            Dict з результатами переіндексації та статистикою
+        """
+        start_time = time.time()
+        
+        try:
+            # Етап 1: Пошук та обробка файлу
+            processing_start = time.time()
+            file_path = next(
+                (path for path in self.document_processor.discover_documents() if path.stem == document_id),
+                None
+            )
+            if file_path is None:
+                return {
+                    "success": False,
+                    "not_found": True,
+                    "message": f"Source file for document {document_id} not found"
+                }
+            
+            chunks = self.document_processor.process_document(file_path)
+            processing_time = time.time() - processing_start
+            
+            # Етап 2: Порівняння з проіндексованими чанками
+            existing = self.vector_store.get_document_chunk_hashes(document_id)
+            changed = [
+                chunk for chunk in chunks
+                if existing.get(chunk.chunk_id) != chunk_content_hash(chunk.text)
+            ]
+            current_ids = {chunk.chunk_id for chunk in chunks}
+            stale_ids = [chunk_id for chunk_id in existing if chunk_id not in current_ids]
+            
+            # Етап 3: Ембединги тільки для змінених чанків
+            embedding_start = time.time()
+            embeddings = self.embedding_service.encode_batch(
+                [chunk.text for chunk in changed],
+                batch_size=32,
+                use_cache=True
+            ) if changed else []
+            embedding_time = time.time() - embedding_start
+            
+            # Етап 4: Один upsert змінених + один delete застарілих
+            indexing_start = time.time()
+            indexed_count = self.vector_store.replace_document_chunks(changed, embeddings, stale_ids)
+            indexing_time = time.time() - indexing_start
+            
+            total_time = time.time() - start_time
+            
+            stats = {
+                "total_documents_found": 1,
+                "chunks_processed": len(chunks),
+                "chunks_indexed": indexed_count,
+                "success_rate": 100.0,
+                "processing_time_s": round(processing_time, 2),
+                "embedding_time_s": round(embedding_time, 2),
+                "indexing_time_s": round(indexing_time, 2),
+                "total_time_s": round(total_time, 2),
+                "avg_time_per_chunk_ms": round((total_time / len(chunks)) * 1000, 2) if chunks else 0
+            }
+            
+            message = (
+                f"Document {document_id} reindexed: {indexed_count} chunks updated, "
+                f"{len(chunks) - len(changed)} unchanged, {len(stale_ids)} removed"
+            )
+            logger.info(message)
+            
+            return {
+                "success": True,
+                "message": message,
+                "stats": stats
+            }
+            
+        except Exception as e:
+            logger.error(f"Document reindexing failed for {document_id}: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Reindexing failed: {str(e)}",
+                "stats": {"total_time_s": time.time() - start_time}
+            }
+    
     def search(
         self,
         query: str,
         limit: int = None,
         score_threshold: float = None,
         filters: Optional[Dict[str, Any]] = None,
-        include_stats: bool = True
+        include_stats: bool = True,
+        query_embedding: Optional[np.ndarray] = None
     ) -> Dict[str, Any]:
         """
         Основний метод семантичного пошуку.
@@ -254,6 +404,8 @@ class SearchService:
             score_threshold: Мінімальний поріг схожості
             filters: Фільтри за метаданими документів
             include_stats: Чи включати статистику виконання
+            query_embedding: Заздалегідь обчислений ембединг запиту
+                (наприклад, з BatchedEmbedder) - тоді модель не викликається
             
         Returns:
             Dict з результатами пошуку та опціональною статистикою
@@ -278,8 +430,10 @@ class SearchService:
             cache_key = None
             if not filters:
                 cache_key = f"{normalized_query}:{limit}:{score_threshold}"
-                if cache_key in self.query_cache:
-                    cached_results, cache_time = self.query_cache[cache_key]
+                with self._query_cache_lock:
+                    cached = self.query_cache.get(cache_key)
+                if cached is not None:
+                    cached_results, cache_time = cached
                     # Перевіряємо TTL кеша
                     if time.time() - cache_time < self.cache_ttl:
                         logger.debug(f"Cache hit for query: {normalized_query[:50]}...")
@@ -292,10 +446,11 @@ class SearchService:
                             "stats": stats.to_dict() if include_stats else None
                         }
             
-            # Генерація ембединга для запиту
-            embedding_start = time.time()
-            query_embedding = self.embedding_service.encode_single(normalized_query)
-            stats.embedding_time = time.time() - embedding_start
+            # Генерація ембединга для запиту (якщо не передано ззовні)
+            if query_embedding is None:
+                embedding_start = time.time()
+                query_embedding = self.embedding_service.encode_single(normalized_query)
+                stats.embedding_time = time.time() - embedding_start
             
             if query_embedding is None or len(query_embedding) == 0:
                 logger.error("Failed to generate embedding for query")
@@ -324,13 +479,14 @@ class SearchService:
             
             # Кешування результатів (тільки для запитів без фільтрів)
             if cache_key and processed_results:
-                self.query_cache[cache_key] = (processed_results, time.time())
-                # Обмежуємо розмір кеша
-                if len(self.query_cache) > 100:
-                    # Видаляємо найстаріші записи
-                    oldest_key = min(self.query_cache.keys(), 
-                                   key=lambda k: self.query_cache[k][1])
-                    del self.query_cache[oldest_key]
+                with self._query_cache_lock:
+                    self.query_cache[cache_key] = (processed_results, time.time())
+                    # Обмежуємо розмір кеша
+                    if len(self.query_cache) > 100:
+                        # Видаляємо найстаріші записи
+                        oldest_key = min(self.query_cache.keys(), 
+                                       key=lambda k: self.query_cache[k][1])
+                        del self.query_cache[oldest_key]
             
             stats.total_time = time.time() - start_time
             
@@ -373,63 +529,108 @@ class SearchService:
             return results
         
         query_words = set(query.lower().split())
-        processed_results = []
         
-        for result in results:
-            # Створюємо копію для модифікації
-            enhanced_result = SearchResult(
-                chunk_id=result.chunk_id,
-                text=result.text,
-                score=result.score,
-                source_file=result.source_file,
-                metadata=result.metadata.copy()
-            )
-            
-            # Keyword Boost: підвищуємо score при точному співпадінні слів
-            text_words = set(result.text.lower().split())
-            common_words = query_words.intersection(text_words)
-            if common_words:
-                keyword_boost = min(0.1, len(common_words) / len(query_words) * 0.1)
-                enhanced_result.score = min(1.0, enhanced_result.score + keyword_boost)
-                enhanced_result.metadata['keyword_matches'] = list(common_words)
-                enhanced_result.metadata['keyword_boost'] = keyword_boost
-            
-            # Length Normalization: штрафуємо занадто короткі або довгі тексти
-            text_length = len(result.text.split())
-            if text_length < 10:  # Занадто короткий текст
-                enhanced_result.score *= 0.9
-            elif text_length > 500:  # Занадто довгий текст
-                enhanced_result.score *= 0.95
-            
-            # Додаємо метадані для debugging
-            enhanced_result.metadata['original_score'] = result.score
-            enhanced_result.metadata['text_length_words'] = text_length
-            
-            processed_results.append(enhanced_result)
+        # Рядкова частина - в Python, арифметика score - одним kernel викликом
+        keyword_sets = []
+        text_lengths = np.empty(len(results), dtype=np.int64)
+        for i, result in enumerate(results):
+            words = result.text.lower().split()
+            keyword_sets.append(query_words.intersection(words))
+            text_lengths[i] = len(words)
         
-        # Document Diversity: групуємо за файлами та обмежуємо кількість результатів з одного файлу
+        keyword_matches = np.fromiter((len(common) for common in keyword_sets), dtype=np.int64, count=len(results))
+        original_scores = np.fromiter((result.score for result in results), dtype=np.float64, count=len(results))
+        scores = fuse_scores(original_scores, keyword_matches, text_lengths, len(query_words))
+        
+        # Document Diversity: обмежуємо кількість результатів з одного файлу
         file_counts = {}
-        diverse_results = []
         max_per_file = max(1, len(results) // 3)  # Максимум 1/3 результатів з одного файлу
+        order = np.argsort(-scores, kind="stable")
+        penalized = np.zeros(len(results), dtype=bool)
         
-        for result in sorted(processed_results, key=lambda r: r.score, reverse=True):
-            file_key = result.source_file
+        for i in order:
+            file_key = results[i].source_file
             current_count = file_counts.get(file_key, 0)
             
             if current_count < max_per_file:
-                diverse_results.append(result)
                 file_counts[file_key] = current_count + 1
             else:
-                # Додаємо до кінця списку з пониженим score для різноманітності
-                result.score *= 0.8
-                result.metadata['diversity_penalty'] = True
-                diverse_results.append(result)
+                # Понижений score для різноманітності
+                penalized[i] = True
         
-        # Повторно сортуємо за фінальним score
-        diverse_results.sort(key=lambda r: r.score, reverse=True)
+        scores[penalized] *= 0.8
+        
+        # Повторно сортуємо за фінальним score (stable відносно першого сортування)
+        final_order = order[np.argsort(-scores[order], kind="stable")]
+        
+        diverse_results = []
+        for i in final_order:
+            result = results[i]
+            metadata = result.metadata.copy()
+            
+            common_words = keyword_sets[i]
+            if common_words:
+                metadata['keyword_matches'] = list(common_words)
+                metadata['keyword_boost'] = min(0.1, len(common_words) / len(query_words) * 0.1)
+            
+            # Додаємо метадані для debugging
+            metadata['original_score'] = result.score
+            metadata['text_length_words'] = int(text_lengths[i])
+            if penalized[i]:
+                metadata['diversity_penalty'] = True
+            
+            diverse_results.append(SearchResult(
+                chunk_id=result.chunk_id,
+                text=result.text,
+                score=float(scores[i]),
+                source_file=result.source_file,
+                metadata=metadata
+            ))
         
         return diverse_results
     
+    def _get_discovery_stats(self) -> Dict[str, Any]:
+        """Статистика документів на файловій системі."""
+        documents = self.document_processor.discover_documents()
+        file_types = {}
+        total_size = 0
+        
+        for doc_path in documents:
+            ext = doc_path.suffix.lower()
+            file_types[ext] = file_types.get(ext, 0) + 1
+            total_size += doc_path.stat().st_size
+        
+        return {
+            "total_files_found": len(documents),
+            "file_types": file_types,
+            "total_size_bytes": total_size,
+            "total_size_mb": round(total_size / (1024 * 1024), 2)
+        }
+    
+    def _combine_stats(
+        self,
+        discovery_stats: Dict[str, Any],
+        vector_stats: Dict[str, Any],
+        vector_db_healthy: bool
+    ) -> Dict[str, Any]:
+        """
+        Збирає загальну статистику з окремих частин.
+        
+        Повертає новий dict на кожен виклик - викликач може змінювати його на місці.
+        """
+        model_info = self.embedding_service.get_model_info()
+        
+        return {
+            "document_discovery": discovery_stats,
+            "vector_database": vector_stats,
+            "embedding_model": model_info,
+            "system_health": {
+                "vector_db_healthy": vector_db_healthy,
+                "model_loaded": model_info.get('loaded', False),
+                "cache_size": len(self.query_cache)
+            }
+        }
+    
     def get_document_stats(self) -> Dict[str, Any]:
         """
         Отримання статистики про проіндексовані документи.
@@ -441,44 +642,70 @@ class SearchService:
         4. Продуктивність системи
         """
         try:
-            # Статистика з векторної БД
-            vector_stats = self.vector_store.get_collection_stats()
-            
-            # Статистика з файлової системи
-            documents = self.document_processor.discover_documents()
-            file_types = {}
-            total_size = 0
-            
-            for doc_path in documents:
-                ext = doc_path.suffix.lower()
-                file_types[ext] = file_types.get(ext, 0) + 1
-                total_size += doc_path.stat().st_size
-            
-            # Статистика моделі
-            model_info = self.embedding_service.get_model_info()
-            
-            combined_stats = {
-                "document_discovery": {
-                    "total_files_found": len(documents),
-                    "file_types": file_types,
-                    "total_size_bytes": total_size,
-                    "total_size_mb": round(total_size / (1024 * 1024), 2)
-                },
-                "vector_database": vector_stats,
-                "embedding_model": model_info,
-                "system_health": {
-                    "vector_db_healthy": self.vector_store.health_check(),
-                    "model_loaded": model_info.get('loaded', False),
-                    "cache_size": len(self.query_cache)
-                }
-            }
+            return self._combine_stats(
+                discovery_stats=self._get_discovery_stats(),
+                vector_stats=self.vector_store.get_collection_stats(),
+                vector_db_healthy=self.vector_store.health_check()
+            )
             
-            return combined_stats
+        except Exception as e:
+            logger.error(f"Failed to get document stats: {str(e)}")
+            return {"error": str(e)}
+    
+    async def aget_vector_stats(self) -> Dict[str, Any]:
+        """Статистика колекції векторної БД (мережевий виклик в окремому потоці)."""
+        return await asyncio.to_thread(self.vector_store.get_collection_stats)
+    
+    async def aget_discovery_stats(self) -> Dict[str, Any]:
+        """Статистика файлової системи (обхід директорії в окремому потоці)."""
+        return await asyncio.to_thread(self._get_discovery_stats)
+    
+    async def aget_vector_health(self) -> bool:
+        """Health check векторної БД в окремому потоці."""
+        return await asyncio.to_thread(self.vector_store.health_check)
+    
+    async def aget_document_stats(self) -> Dict[str, Any]:
+        """
+        Async версія get_document_stats.
+        
+        Статистика БД, health check та сканування файлової системи
+        незалежні, тому виконуються паралельно: загальний час дорівнює
+        найповільнішому з викликів, а не їх сумі.
+        """
+        try:
+            vector_stats, discovery_stats, vector_db_healthy = await asyncio.gather(
+                self.aget_vector_stats(),
+                self.aget_discovery_stats(),
+                self.aget_vector_health()
+            )
+            return self._combine_stats(discovery_stats, vector_stats, vector_db_healthy)
             
         except Exception as e:
             logger.error(f"Failed to get document stats: {str(e)}")
             return {"error": str(e)}
     
+    def clear_query_cache(self) -> int:
+        """Очищення кеша результатів пошуку. Повертає кількість видалених записів."""
+        with self._query_cache_lock:
+            query_cache_size = len(self.query_cache)
+            self.query_cache.clear()
+        return query_cache_size
+    
+    def clear_embedding_cache(self) -> int:
+        """Очищення in-memory кеша ембедингів. Повертає кількість видалених записів."""
+        memory_cache = self.embedding_service.cache.memory_cache
+        embedding_cache_size = len(memory_cache)
+        memory_cache.clear()
+        return embedding_cache_size
+    
+    async def aclear_query_cache(self) -> int:
+        """Async версія clear_query_cache."""
+        return await asyncio.to_thread(self.clear_query_cache)
+    
+    async def aclear_embedding_cache(self) -> int:
+        """Async версія clear_embedding_cache."""
+        return await asyncio.to_thread(self.clear_embedding_cache)
+    
     def clear_cache(self) -> Dict[str, Any]:
         """
         Очищення всіх кешів системи.
@@ -489,13 +716,8 @@ class SearchService:
         3. Debugging проблем з кешуванням
         """
         try:
-            # Очищення кеша запитів
-            query_cache_size = len(self.query_cache)
-            self.query_cache.clear()
-            
-            # Очищення кеша ембедингів
-            embedding_cache_size = len(self.embedding_service.cache.memory_cache)
-            self.embedding_service.cache.memory_cache.clear()
+            query_cache_size = self.clear_query_cache()
+            embedding_cache_size = self.clear_embedding_cache()
             
             logger.info(
                 f"Caches cleared: query_cache={query_cache_size}, "
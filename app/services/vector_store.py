@@ -18,11 +18,13 @@ Vector Store Service - Управління векторною базою дан
 - Filter: умови для фільтрації результатів за метаданими
 """
 
+import hashlib
 import logging
 import uuid
-from typing import List, Dict, Any, Optional, Tuple, Union
+from typing import List, Dict, Any, Optional, Tuple, Union, Protocol, Iterator
 from dataclasses import dataclass
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
 import numpy as np
@@ -30,13 +32,15 @@ from qdrant_client import QdrantClient
 from qdrant_client.models import (
     VectorParams, Distance, CollectionStatus,
     PointStruct, SearchRequest, Filter,
-    FieldCondition, MatchValue, Range,
-    UpdateResult, ScrollRequest
+    FieldCondition, MatchValue, MatchAny, Range,
+    UpdateResult, ScrollRequest, PointIdsList, OptimizersConfigDiff,
+    PayloadSchemaType, SearchParams
 )
 from qdrant_client.http.exceptions import UnexpectedResponse
 
 from app.config import settings
 from app.services.document_processor import DocumentChunk
+from app.utils.name_matcher import match_names
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +69,136 @@ class SearchResult:
             self.metadata['file_name'] = self.source_file.split('/')[-1]
 
 
+def chunk_point_id(chunk_id: str) -> str:
+    """Детермінований ID point для чанку - повторна індексація перезаписує point."""
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk_id))
+
+
+def chunk_content_hash(text: str) -> str:
+    """Хеш тексту чанку - дозволяє пропустити незмінені чанки при переіндексації."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def chunk_payload(chunk: DocumentChunk) -> Dict[str, Any]:
+    """
+    Payload чанку для векторного сховища.
+    
+    Важливо: Qdrant зберігає метадані окремо від векторів.
+    """
+    return {
+        "text": chunk.text,
+        "chunk_id": chunk.chunk_id,
+        "source_file": chunk.source_file,
+        "chunk_index": chunk.chunk_index,
+        "word_count": chunk.word_count,
+        "char_count": chunk.char_count,
+        "created_at": chunk.created_at,
+        "content_hash": chunk_content_hash(chunk.text),
+        **chunk.metadata  # Розпаковуємо всі додаткові метадані
+    }
+
+
+# Keyword поля з payload індексом - без індексу Qdrant не може відсікати
+# кандидатів фільтром під час обходу HNSW і перевіряє payload після пошуку
+INDEXED_PAYLOAD_FIELDS = ["document_id", "file_type", "file_name"]
+
+# Payload поля, потрібні для рядка списку документів
+DOCUMENT_LIST_FIELDS = [
+    "document_id", "source_file", "file_name", "file_type",
+    "file_size", "file_modified", "created_at"
+]
+
+
+def document_row(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Рядок списку документів з payload першого чанку документа."""
+    file_size = payload.get("file_size") or 0
+    return {
+        "id": payload.get("document_id") or payload.get("source_file"),
+        "file_name": payload.get("file_name"),
+        "file_path": payload.get("source_file"),
+        "file_type": payload.get("file_type"),
+        "file_size_mb": round(file_size / (1024 * 1024), 2),
+        "file_modified": payload.get("file_modified"),
+        "indexed_at": payload.get("created_at"),
+        "status": "indexed"
+    }
+
+
+class VectorStore(Protocol):
+    """
+    Strategy інтерфейс векторного сховища.
+    
+    SearchService та API залежності працюють з будь-якою реалізацією
+    цього протоколу: Qdrant (VectorStoreService) або in-process FAISS
+    (FaissVectorStore). Конкретний backend обирається в create_vector_store().
+    """
+    
+    async def ensure_collection_exists(self) -> bool: ...
+    
+    def index_document_chunk(self, chunk: DocumentChunk, embedding: np.ndarray) -> bool: ...
+    
+    def index_document_chunks_batch(
+        self,
+        chunks: List[DocumentChunk],
+        embeddings: List[np.ndarray],
+        batch_size: int = 100,
+        concurrency: int = 1
+    ) -> int: ...
+    
+    def bulk_load_chunks(
+        self,
+        chunks: List[DocumentChunk],
+        embeddings: List[np.ndarray],
+        batch_size: int = 256,
+        concurrency: int = 1
+    ) -> Optional[int]: ...
+    
+    def search_similar(
+        self,
+        query_embedding: np.ndarray,
+        limit: int = None,
+        score_threshold: float = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]: ...
+    
+    def search_by_text(
+        self,
+        query_text: str,
+        embedding_service,
+        limit: int = None,
+        score_threshold: float = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]: ...
+    
+    def delete_by_source_file(self, source_file: str) -> int: ...
+    
+    def batch_delete(self, document_ids: List[str]) -> int: ...
+    
+    def count_documents(self, file_type: Optional[str] = None, name_query: Optional[str] = None) -> int: ...
+    
+    def get_document_chunk_hashes(self, document_id: str) -> Dict[str, Optional[str]]: ...
+    
+    def replace_document_chunks(
+        self,
+        chunks: List[DocumentChunk],
+        embeddings: List[np.ndarray],
+        stale_chunk_ids: List[str]
+    ) -> int: ...
+    
+    def scroll_documents(
+        self,
+        offset: int = 0,
+        limit: int = 20,
+        file_type: Optional[str] = None,
+        batch_size: int = 64,
+        name_query: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]: ...
+    
+    def get_collection_stats(self) -> Dict[str, Any]: ...
+    
+    def health_check(self) -> bool: ...
+
+
 class VectorStoreService:
     """
     Основний сервіс для роботи з векторною базою даних Qdrant.
@@ -83,6 +217,8 @@ class VectorStoreService:
         self.embedding_dimension = settings.embedding_dimension
         self.host = settings.qdrant_host
         self.port = settings.qdrant_port
+        # Параметри HNSW пошуку не змінюються між запитами - будуємо один раз
+        self.search_params = SearchParams(hnsw_ef=settings.hnsw_ef_search, exact=settings.hnsw_exact)
         
         logger.info(
             f"VectorStoreService initialized for collection '{self.collection_name}' "
@@ -140,6 +276,7 @@ class VectorStoreService:
                     )
                     return False
                 
+                self._ensure_payload_indexes(client, collection_info.payload_schema or {})
                 return True
                 
             except UnexpectedResponse as e:
@@ -168,6 +305,8 @@ class VectorStoreService:
                         write_consistency_factor=1,
                     )
                     
+                    self._ensure_payload_indexes(client, {})
+                    
                     logger.info(f"Collection '{self.collection_name}' created successfully")
                     return True
                 else:
@@ -177,6 +316,18 @@ class VectorStoreService:
             logger.error(f"Failed to ensure collection exists: {str(e)}")
             return False
     
+    def _ensure_payload_indexes(self, client: QdrantClient, payload_schema: Dict[str, Any]) -> None:
+        """Створення keyword індексів для полів фільтрації, яких ще немає в колекції."""
+        for field_name in INDEXED_PAYLOAD_FIELDS:
+            if field_name in payload_schema:
+                continue
+            client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=PayloadSchemaType.KEYWORD
+            )
+            logger.info(f"Created payload index for '{field_name}'")
+    
     def index_document_chunk(self, chunk: DocumentChunk, embedding: np.ndarray) -> bool:
         """
         Індексація одного чанку документа з його ембедингом.
@@ -193,19 +344,10 @@ class VectorStoreService:
             
             # Підготовка метаданих для зберігання
             # Важливо: Qdrant зберігає метадані окремо від векторів
-            payload = {
-                "text": chunk.text,
-                "chunk_id": chunk.chunk_id,
-                "source_file": chunk.source_file,
-                "chunk_index": chunk.chunk_index,
-                "word_count": chunk.word_count,
-                "char_count": chunk.char_count,
-                "created_at": chunk.created_at,
-                **chunk.metadata  # Розпаковуємо всі додаткові метадані
-            }
+            payload = chunk_payload(chunk)
             
             # Генеруємо унікальний ID для point в Qdrant
-            point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk.chunk_id))
+            point_id = chunk_point_id(chunk.chunk_id)
             
             # Створюємо Point object для Qdrant
             point = PointStruct(
@@ -236,7 +378,8 @@ class VectorStoreService:
         self, 
         chunks: List[DocumentChunk], 
         embeddings: List[np.ndarray],
-        batch_size: int = 100
+        batch_size: int = 100,
+        concurrency: int = 1
     ) -> int:
         """
         Батчева індексація множинних чанків для ефективності.
@@ -245,10 +388,15 @@ class VectorStoreService:
         оскільки зменшує кількість мережевих викликів та використовує
         bulk операції Qdrant для максимальної продуктивності.
         
+        Вставка Qdrant має оптимум при невеликих батчах (~32) та 2
+        паралельних запитах - більша паралельність лише створює
+        конкуренцію на стороні сервера.
+        
         Args:
             chunks: Список чанків для індексації
             embeddings: Відповідні ембединги для кожного чанку  
             batch_size: Розмір батчу (компроміс між швидкістю та пам'яттю)
+            concurrency: Кількість одночасних upsert запитів
             
         Returns:
             int: Кількість успішно проіндексованих чанків
@@ -256,73 +404,139 @@ class VectorStoreService:
         if len(chunks) != len(embeddings):
             raise ValueError("Number of chunks must match number of embeddings")
         
-        indexed_count = 0
         total_chunks = len(chunks)
         
-        logger.info(f"Starting batch indexing of {total_chunks} chunks (batch_size={batch_size})")
+        logger.info(
+            f"Starting batch indexing of {total_chunks} chunks "
+            f"(batch_size={batch_size}, concurrency={concurrency})"
+        )
         
         try:
             client = self._get_client()
             
-            # Обробляємо чанки батчами
-            for i in range(0, total_chunks, batch_size):
-                batch_chunks = chunks[i:i + batch_size]
-                batch_embeddings = embeddings[i:i + batch_size]
-                
-                # Підготовляємо Points для батчу
-                points = []
-                for chunk, embedding in zip(batch_chunks, batch_embeddings):
-                    # Підготовка payload
-                    payload = {
-                        "text": chunk.text,
-                        "chunk_id": chunk.chunk_id,
-                        "source_file": chunk.source_file,
-                        "chunk_index": chunk.chunk_index,
-                        "word_count": chunk.word_count,
-                        "char_count": chunk.char_count,
-                        "created_at": chunk.created_at,
-                        **chunk.metadata
-                    }
-                    
-                    # Генеруємо унікальний ID
-                    point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk.chunk_id))
-                    
-                    point = PointStruct(
-                        id=point_id,
-                        vector=embedding.tolist(),
-                        payload=payload
-                    )
-                    points.append(point)
-                
-                # Виконуємо батчеву вставку
-                try:
-                    result = client.upsert(
-                        collection_name=self.collection_name,
-                        points=points,
-                        wait=True
-                    )
-                    
-                    if result.status == "completed":
-                        batch_indexed = len(points)
-                        indexed_count += batch_indexed
-                        logger.info(
-                            f"Batch {i//batch_size + 1}: indexed {batch_indexed} chunks "
-                            f"({indexed_count}/{total_chunks} total)"
-                        )
-                    else:
-                        logger.warning(f"Batch indexing returned unexpected status: {result.status}")
-                        
-                except Exception as batch_error:
-                    logger.error(f"Failed to index batch {i//batch_size + 1}: {str(batch_error)}")
-                    # Продовжуємо з наступним батчем
-                    continue
+            batches = [
+                (i // batch_size + 1, chunks[i:i + batch_size], embeddings[i:i + batch_size])
+                for i in range(0, total_chunks, batch_size)
+            ]
+            
+            def upsert(batch) -> int:
+                return self._upsert_batch(client, *batch)
+            
+            if concurrency > 1 and len(batches) > 1:
+                # Qdrant клієнт синхронний - паралельність через пул потоків,
+                # розмір пулу обмежує кількість одночасних запитів
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    indexed_count = sum(executor.map(upsert, batches))
+            else:
+                indexed_count = sum(map(upsert, batches))
             
             logger.info(f"Batch indexing completed: {indexed_count}/{total_chunks} chunks indexed")
             return indexed_count
             
         except Exception as e:
             logger.error(f"Failed during batch indexing: {str(e)}")
-            return indexed_count
+            return 0
+    
+    def bulk_load_chunks(
+        self,
+        chunks: List[DocumentChunk],
+        embeddings: List[np.ndarray],
+        batch_size: int = 256,
+        concurrency: int = 1
+    ) -> Optional[int]:
+        """
+        Швидке початкове завантаження у порожню колекцію.
+        
+        На час завантаження індексація вимикається (indexing_threshold=0),
+        тому Qdrant не перебудовує HNSW граф після кожного батчу - лише
+        записує сегменти. Після відновлення порогу оптимізатор будує
+        індекс один раз для всієї колекції.
+        
+        Компроміс: до завершення побудови індексу пошук працює повним
+        перебором, а частково завантажені дані видно одразу.
+        
+        Returns:
+            Optional[int]: Кількість завантажених чанків або None,
+            якщо колекція не порожня і потрібен звичайний upsert
+        """
+        if len(chunks) != len(embeddings):
+            raise ValueError("Number of chunks must match number of embeddings")
+        
+        client = self._get_client()
+        if client.count(collection_name=self.collection_name, exact=True).count > 0:
+            return None
+        
+        optimizer_config = client.get_collection(self.collection_name).config.optimizer_config
+        # 20000 - значення Qdrant за замовчуванням
+        indexing_threshold = optimizer_config.indexing_threshold or 20000
+        
+        logger.info(f"Starting bulk load of {len(chunks)} chunks into empty collection")
+        
+        client.update_collection(
+            collection_name=self.collection_name,
+            optimizer_config=OptimizersConfigDiff(indexing_threshold=0)
+        )
+        try:
+            client.upload_collection(
+                collection_name=self.collection_name,
+                vectors=np.vstack(embeddings),
+                payload=[chunk_payload(chunk) for chunk in chunks],
+                ids=[chunk_point_id(chunk.chunk_id) for chunk in chunks],
+                batch_size=batch_size,
+                parallel=concurrency
+            )
+        finally:
+            client.update_collection(
+                collection_name=self.collection_name,
+                optimizer_config=OptimizersConfigDiff(indexing_threshold=indexing_threshold)
+            )
+        
+        logger.info(f"Bulk load completed: {len(chunks)} chunks uploaded")
+        return len(chunks)
+    
+    def _upsert_batch(
+        self,
+        client: QdrantClient,
+        batch_number: int,
+        batch_chunks: List[DocumentChunk],
+        batch_embeddings: List[np.ndarray]
+    ) -> int:
+        """Вставка одного батчу. Повертає кількість проіндексованих чанків."""
+        # Підготовляємо Points для батчу
+        points = []
+        for chunk, embedding in zip(batch_chunks, batch_embeddings):
+            # Підготовка payload
+            payload = chunk_payload(chunk)
+            
+            # Генеруємо унікальний ID
+            point_id = chunk_point_id(chunk.chunk_id)
+            
+            point = PointStruct(
+                id=point_id,
+                vector=embedding.tolist(),
+                payload=payload
+            )
+            points.append(point)
+        
+        # Виконуємо батчеву вставку
+        try:
+            result = client.upsert(
+                collection_name=self.collection_name,
+                points=points,
+                wait=True
+            )
+            
+            if result.status == "completed":
+                logger.info(f"Batch {batch_number}: indexed {len(points)} chunks")
+                return len(points)
+            
+            logger.warning(f"Batch indexing returned unexpected status: {result.status}")
+            return 0
+            
+        except Exception as batch_error:
+            logger.error(f"Failed to index batch {batch_number}: {str(batch_error)}")
+            # Продовжуємо з наступним батчем
+            return 0
     
     def search_similar(
         self,
@@ -364,6 +578,11 @@ class VectorStoreService:
                         conditions.append(
                             FieldCondition(key=field, match=MatchValue(value=value))
                         )
+                    elif isinstance(value, (list, tuple)):
+                        # Будь-яке зі значень - pre-filter всередині HNSW
+                        conditions.append(
+                            FieldCondition(key=field, match=MatchAny(any=list(value)))
+                        )
                     elif isinstance(value, (int, float)):
                         # Для чисел також точне співпадіння
                         conditions.append(
@@ -390,6 +609,7 @@ class VectorStoreService:
                 collection_name=self.collection_name,
                 query_vector=query_embedding.tolist(),
                 query_filter=qdrant_filter,
+                search_params=self.search_params,
                 limit=limit,
                 score_threshold=score_threshold,
                 with_payload=True,  # Включаємо метадані в результати
@@ -491,6 +711,256 @@ class VectorStoreService:
             logger.error(f"Failed to delete chunks from {source_file}: {str(e)}")
             return 0
     
+    def batch_delete(self, document_ids: List[str]) -> int:
+        """
+        Видалення всіх чанків множини документів одним запитом.
+        
+        Один filter-based delete з MatchAny по document_id замість циклу
+        по документах: один мережевий round-trip та одне оновлення індексу
+        незалежно від кількості документів.
+        
+        Returns:
+            int: Кількість видалених чанків
+        """
+        if not document_ids:
+            return 0
+        
+        try:
+            client = self._get_client()
+            
+            delete_filter = Filter(
+                must=[
+                    FieldCondition(
+                        key="document_id",
+                        match=MatchAny(any=list(document_ids))
+                    )
+                ]
+            )
+            
+            # UpdateResult не містить кількості видалених points - рахуємо до видалення
+            deleted_count = client.count(
+                collection_name=self.collection_name,
+                count_filter=delete_filter,
+                exact=True
+            ).count
+            
+            if deleted_count:
+                client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=delete_filter,
+                    wait=True
+                )
+            
+            logger.info(f"Deleted {deleted_count} chunks of {len(document_ids)} documents")
+            return deleted_count
+            
+        except Exception as e:
+            logger.error(f"Failed to batch delete {len(document_ids)} documents: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _document_filter(file_type: Optional[str] = None) -> Filter:
+        """
+        Фільтр "один point на документ": перший чанк кожного документа.
+        
+        Перший чанк несе всі метадані файлу, тому підрахунок та
+        пагінація документів зводяться до звичайних count/scroll по points.
+        """
+        conditions = [FieldCondition(key="chunk_index", match=MatchValue(value=0))]
+        if file_type:
+            conditions.append(FieldCondition(key="file_type", match=MatchValue(value=file_type)))
+        return Filter(must=conditions)
+    
+    def get_document_chunk_hashes(self, document_id: str) -> Dict[str, Optional[str]]:
+        """chunk_id -> content_hash для всіх проіндексованих чанків документа."""
+        client = self._get_client()
+        document_filter = Filter(
+            must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))]
+        )
+        hashes: Dict[str, Optional[str]] = {}
+        offset = None
+        
+        while True:
+            points, offset = client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=document_filter,
+                limit=256,
+                offset=offset,
+                with_payload=["chunk_id", "content_hash"],
+                with_vectors=False
+            )
+            for point in points:
+                payload = point.payload or {}
+                hashes[payload.get("chunk_id")] = payload.get("content_hash")
+            
+            if offset is None:
+                break
+        
+        hashes.pop(None, None)
+        return hashes
+    
+    def replace_document_chunks(
+        self,
+        chunks: List[DocumentChunk],
+        embeddings: List[np.ndarray],
+        stale_chunk_ids: List[str]
+    ) -> int:
+        """
+        Оновлення чанків документа на місці.
+        
+        Змінені чанки перезаписуються одним upsert з тими ж point ID,
+        а чанки, яких більше немає в документі, видаляються одним delete.
+        Незмінені чанки не передаються взагалі - HNSW граф для них не змінюється.
+        
+        Returns:
+            int: Кількість записаних чанків
+        """
+        if len(chunks) != len(embeddings):
+            raise ValueError("Number of chunks must match number of embeddings")
+        
+        client = self._get_client()
+        
+        if chunks:
+            client.upsert(
+                collection_name=self.collection_name,
+                points=[
+                    PointStruct(
+                        id=chunk_point_id(chunk.chunk_id),
+                        vector=embedding.tolist(),
+                        payload=chunk_payload(chunk)
+                    )
+                    for chunk, embedding in zip(chunks, embeddings)
+                ],
+                wait=True
+            )
+        
+        if stale_chunk_ids:
+            client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(
+                    points=[chunk_point_id(chunk_id) for chunk_id in stale_chunk_ids]
+                ),
+                wait=True
+            )
+        
+        return len(chunks)
+    
+    def _document_ids_matching(self, file_type: Optional[str], name_query: str) -> List[str]:
+        """
+        ID документів, назва файлу яких містить name_query.
+        
+        Qdrant не має case-insensitive підрядкового фільтра без full-text
+        індексу, тому назви читаються одним scroll (лише два payload поля)
+        і фільтруються in-process через match_names.
+        """
+        client = self._get_client()
+        scroll_filter = self._document_filter(file_type)
+        document_ids: List[str] = []
+        file_names: List[str] = []
+        offset = None
+        
+        while True:
+            points, offset = client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=1024,
+                offset=offset,
+                with_payload=["document_id", "file_name"],
+                with_vectors=False
+            )
+            for point in points:
+                payload = point.payload or {}
+                document_ids.append(payload.get("document_id"))
+                file_names.append(payload.get("file_name") or "")
+            
+            if offset is None:
+                break
+        
+        return [document_ids[i] for i in match_names(file_names, name_query)]
+    
+    def count_documents(self, file_type: Optional[str] = None, name_query: Optional[str] = None) -> int:
+        """Кількість документів у колекції (один count запит до Qdrant)."""
+        if name_query:
+            return len(self._document_ids_matching(file_type, name_query))
+        
+        client = self._get_client()
+        return client.count(
+            collection_name=self.collection_name,
+            count_filter=self._document_filter(file_type),
+            exact=True
+        ).count
+    
+    def scroll_documents(
+        self,
+        offset: int = 0,
+        limit: int = 20,
+        file_type: Optional[str] = None,
+        batch_size: int = 64,
+        name_query: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Генератор сторінки списку документів.
+        
+        Пропуск offset документів виконується на сервері (scroll без payload
+        повертає лише курсор), далі документи читаються батчами по
+        batch_size - в пам'яті тримається один батч, а не вся сторінка.
+        З name_query сторінка вибирається серед знайдених за назвою ID
+        і читається одним scroll з MatchAny фільтром.
+        """
+        client = self._get_client()
+        
+        if name_query:
+            page_ids = self._document_ids_matching(file_type, name_query)[offset:offset + limit]
+            if not page_ids:
+                return
+            
+            points, _ = client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(must=[
+                    FieldCondition(key="chunk_index", match=MatchValue(value=0)),
+                    FieldCondition(key="document_id", match=MatchAny(any=page_ids))
+                ]),
+                limit=len(page_ids),
+                with_payload=DOCUMENT_LIST_FIELDS,
+                with_vectors=False
+            )
+            rows = {(point.payload or {}).get("document_id"): point.payload or {} for point in points}
+            for document_id in page_ids:
+                if document_id in rows:
+                    yield document_row(rows[document_id])
+            return
+        
+        scroll_filter = self._document_filter(file_type)
+        next_offset = None
+        
+        if offset > 0:
+            _, next_offset = client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            if next_offset is None:
+                return
+        
+        remaining = limit
+        while remaining > 0:
+            points, next_offset = client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=min(batch_size, remaining),
+                offset=next_offset,
+                with_payload=DOCUMENT_LIST_FIELDS,
+                with_vectors=False
+            )
+            for point in points:
+                yield document_row(point.payload or {})
+            
+            remaining -= len(points)
+            if next_offset is None or not points:
+                break
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """
         Отримання статистики колекції для моніторингу.
@@ -553,5 +1023,20 @@ class VectorStoreService:
             return False
 
 
+def create_vector_store() -> VectorStore:
+    """
+    Factory для вибору backend векторного сховища з конфігурації.
+    
+    FAISS модуль імпортується ліниво - faiss опціональна залежність.
+    """
+    backend = settings.vector_store_backend.lower()
+    if backend == "faiss":
+        from app.services.vector_store_faiss import FaissVectorStore
+        return FaissVectorStore()
+    if backend != "qdrant":
+        logger.warning(f"Unknown vector store backend '{backend}', falling back to Qdrant")
+    return VectorStoreService()
+
+
 # Глобальний екземпляр сервісу
-vector_store = VectorStoreService()
\ No newline at end of file
+vector_store = create_vector_store()
\ No newline at end of file
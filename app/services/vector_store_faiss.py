@@ -0,0 +1,625 @@
+# In-process FAISS vector store
+
+"""
+FAISS Vector Store - In-process HNSW індекс як альтернатива Qdrant.
+
+Цей модуль реалізує той самий інтерфейс VectorStore, що й VectorStoreService,
+але тримає вектори в пам'яті процесу в індексі FAISS HNSW:
+
+1. Немає мережевого round-trip на кожен пошук
+2. Відстані рахуються нативним SIMD кодом FAISS
+3. Конкурентні запити об'єднуються в один виклик index.search (micro-batching)
+
+Обмеження:
+- Індекс живе в пам'яті одного процесу: після кожної зміни він зберігається
+  у FAISS_INDEX_PATH і завантажується при старті, але кілька API workers
+  мали б незалежні копії - тому production сервер з faiss має один worker
+- HNSW не підтримує видалення, тому видалені points позначаються tombstone
+  та відфільтровуються при пошуку; коли tombstones накопичується забагато,
+  індекс перебудовується лише з живих векторів
+- Фільтри за метаданими застосовуються після пошуку з over-fetch
+"""
+
+import logging
+import os
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable, Iterator
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:  # FAISS опціональний - потрібен тільки для VECTOR_STORE_BACKEND=faiss
+    faiss = None
+
+from app.config import settings
+from app.services.document_processor import DocumentChunk
+from app.services.vector_store import SearchResult, document_row, chunk_payload
+from app.utils.name_matcher import match_names
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBatcher:
+    """
+    Об'єднує конкурентні пошукові запити в один виклик FAISS.
+    
+    `index.search` приймає матрицю запитів (nq, d) і обробляє її за один
+    прохід по графу, тому N запитів разом дешевші за N окремих викликів.
+    Запити з різних потоків (FastAPI threadpool) збираються в чергу,
+    worker чекає до `max_wait_ms` або до `max_batch` запитів і виконує
+    один спільний пошук.
+    """
+    
+    def __init__(
+        self,
+        search_fn: Callable[[np.ndarray, int], Tuple[np.ndarray, np.ndarray]],
+        max_batch: int = 32,
+        max_wait_ms: float = 3.0
+    ):
+        self._search_fn = search_fn
+        self._queue: "queue.Queue[Tuple[np.ndarray, int, Future]]" = queue.Queue()
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+    
+    def submit(self, vector: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Ставить запит в чергу та чекає результат (scores, ids)."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((vector, k, future))
+        return future.result()
+    
+    def _ensure_worker(self) -> None:
+        """Lazy запуск фонового worker потоку."""
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="faiss-query-batcher", daemon=True
+                )
+                self._worker.start()
+    
+    def _collect_batch(self) -> List[Tuple[np.ndarray, int, Future]]:
+        """Блокується до першого запиту, потім добирає інші до дедлайну."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._max_wait
+        
+        while len(batch) < self._max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        
+        return batch
+    
+    def _run(self) -> None:
+        """Головний цикл worker потоку."""
+        while True:
+            batch = self._collect_batch()
+            vectors = np.stack([vector for vector, _, _ in batch])
+            k = max(item_k for _, item_k, _ in batch)
+            
+            try:
+                scores, ids = self._search_fn(vectors, k)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for row, (_, _, future) in enumerate(batch):
+                future.set_result((scores[row], ids[row]))
+
+
+class FaissVectorStore:
+    """
+    Векторне сховище на базі FAISS IndexHNSWFlat.
+    
+    Використовує inner product метрику - для L2-нормалізованих ембедингів
+    вона еквівалентна косинусній схожості, як і колекція в Qdrant.
+    """
+    
+    # У скільки разів більше кандидатів запитуємо, коли частину
+    # результатів відкинуть фільтри або tombstones
+    _OVERFETCH = 4
+    
+    # Індекс перебудовується, коли tombstones не менше _COMPACT_MIN_DELETED
+    # і вони складають щонайменше _COMPACT_DELETED_RATIO від усіх points
+    _COMPACT_MIN_DELETED = 1024
+    _COMPACT_DELETED_RATIO = 0.25
+    
+    def __init__(self):
+        """Ініціалізація сервісу. Збережений індекс завантажується одразу, новий створюється ліниво."""
+        self.collection_name = settings.qdrant_collection_name
+        self.embedding_dimension = settings.embedding_dimension
+        self.hnsw_m = settings.hnsw_m
+        self.ef_search = settings.hnsw_ef_search
+        self.index_path = Path(settings.faiss_index_path) if settings.faiss_index_path else None
+        
+        self.index = None
+        # FAISS індекс не thread-safe для одночасного add та search
+        self._index_lock = threading.RLock()
+        
+        # ID point = позиція вектора в індексі
+        self._payloads: List[Dict[str, Any]] = []
+        self._ids_by_chunk: Dict[str, int] = {}
+        self._deleted: Set[int] = set()
+        # Збільшується при кожній перебудові індексу - ID points з пошуку,
+        # виконаного до перебудови, вже не відповідають _payloads
+        self._generation = 0
+        
+        self._batcher = QueryBatcher(self._search_batch)
+        self._load()
+        
+        logger.info(
+            f"FaissVectorStore initialized for collection '{self.collection_name}' "
+            f"(M={self.hnsw_m}, efSearch={self.ef_search})"
+        )
+    
+    def _new_index(self):
+        """Порожній HNSW індекс з налаштуваннями сервісу."""
+        if faiss is None:
+            raise ConnectionError("FAISS backend selected but faiss package is not installed")
+        
+        index = faiss.IndexHNSWFlat(self.embedding_dimension, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = self.ef_search
+        return index
+    
+    def _get_index(self):
+        """Lazy створення HNSW індексу."""
+        if self.index is None:
+            self.index = self._new_index()
+            logger.info(f"Created FAISS HNSW index (dimension={self.embedding_dimension})")
+        
+        return self.index
+    
+    def _load(self) -> bool:
+        """Завантаження індексу та payloads з index_path. False якщо нічого завантажити."""
+        if self.index_path is None or faiss is None:
+            return False
+        
+        index_file = self.index_path / "index.faiss"
+        payloads_file = self.index_path / "payloads.pkl"
+        if not (index_file.exists() and payloads_file.exists()):
+            return False
+        
+        try:
+            index = faiss.read_index(str(index_file))
+            with open(payloads_file, 'rb') as f:
+                state = pickle.load(f)
+            
+            # Файли пишуться по черзі - якщо процес впав між ними, вони розходяться
+            if index.ntotal != len(state["payloads"]) or index.d != self.embedding_dimension:
+                logger.warning(f"FAISS index at {self.index_path} is inconsistent, starting empty")
+                return False
+        except Exception as e:
+            logger.warning(f"Failed to load FAISS index from {self.index_path}: {str(e)}")
+            return False
+        
+        index.hnsw.efSearch = self.ef_search
+        self.index = index
+        self._payloads = state["payloads"]
+        self._deleted = set(state["deleted"])
+        self._ids_by_chunk = {
+            payload["chunk_id"]: point_id for point_id, payload in enumerate(self._payloads)
+            if point_id not in self._deleted
+        }
+        
+        logger.info(f"Loaded FAISS index from {self.index_path}: {index.ntotal - len(self._deleted)} points")
+        return True
+    
+    def _persist(self) -> None:
+        """
+        Збереження індексу та payloads в index_path після зміни індексу.
+        
+        Кожен файл пишеться у тимчасовий та атомарно підміняється, тож
+        рестарт посеред запису не залишає обрізаного файлу.
+        """
+        if self.index_path is None:
+            return
+        
+        try:
+            with self._index_lock:
+                self.index_path.mkdir(parents=True, exist_ok=True)
+                index_file = self.index_path / "index.faiss"
+                payloads_file = self.index_path / "payloads.pkl"
+                
+                faiss.write_index(self._get_index(), f"{index_file}.tmp")
+                with open(f"{payloads_file}.tmp", 'wb') as f:
+                    pickle.dump({"payloads": self._payloads, "deleted": list(self._deleted)}, f)
+                
+                os.replace(f"{index_file}.tmp", index_file)
+                os.replace(f"{payloads_file}.tmp", payloads_file)
+        except Exception as e:
+            logger.error(f"Failed to persist FAISS index to {self.index_path}: {str(e)}")
+    
+    def _maybe_compact(self) -> None:
+        """Перебудова індексу, якщо tombstones перевищили поріг. Викликається під _index_lock."""
+        deleted = len(self._deleted)
+        if deleted < self._COMPACT_MIN_DELETED or deleted < self.index.ntotal * self._COMPACT_DELETED_RATIO:
+            return
+        
+        index = self.index
+        total = index.ntotal
+        live_ids = [point_id for point_id in range(total) if point_id not in self._deleted]
+        
+        new_index = self._new_index()
+        if live_ids:
+            vectors = index.reconstruct_n(0, total)[live_ids]
+            new_index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        
+        self.index = new_index
+        self._payloads = [self._payloads[point_id] for point_id in live_ids]
+        self._ids_by_chunk = {
+            payload["chunk_id"]: point_id for point_id, payload in enumerate(self._payloads)
+        }
+        self._deleted = set()
+        self._generation += 1
+        
+        logger.info(f"Compacted FAISS index: removed {total - len(live_ids)} deleted points, {len(live_ids)} left")
+    
+    def _search_batch(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Один виклик index.search для матриці запитів (nq, d)."""
+        with self._index_lock:
+            index = self._get_index()
+            return index.search(np.ascontiguousarray(vectors, dtype=np.float32), k)
+    
+    async def ensure_collection_exists(self) -> bool:
+        """Створення індексу, якщо він ще не існує."""
+        try:
+            self._get_index()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to ensure FAISS index exists: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _build_payload(chunk: DocumentChunk) -> Dict[str, Any]:
+        """Payload у тому ж форматі, що й у Qdrant колекції."""
+        return chunk_payload(chunk)
+    
+    def _add(self, chunks: List[DocumentChunk], embeddings: List[np.ndarray]) -> int:
+        """Додає вектори в індекс. Повторна індексація чанку замінює старий point."""
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(chunks), self.embedding_dimension)
+        
+        with self._index_lock:
+            index = self._get_index()
+            start_id = index.ntotal
+            index.add(vectors)
+            
+            for offset, chunk in enumerate(chunks):
+                point_id = start_id + offset
+                previous_id = self._ids_by_chunk.get(chunk.chunk_id)
+                if previous_id is not None:
+                    self._deleted.add(previous_id)
+                self._ids_by_chunk[chunk.chunk_id] = point_id
+                self._payloads.append(self._build_payload(chunk))
+            
+            self._maybe_compact()
+        
+        return len(chunks)
+    
+    def index_document_chunk(self, chunk: DocumentChunk, embedding: np.ndarray) -> bool:
+        """Індексація одного чанку документа з його ембедингом."""
+        try:
+            self._add([chunk], [embedding])
+            self._persist()
+            logger.debug(f"Successfully indexed chunk: {chunk.chunk_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to index chunk {chunk.chunk_id}: {str(e)}")
+            return False
+    
+    def bulk_load_chunks(
+        self,
+        chunks: List[DocumentChunk],
+        embeddings: List[np.ndarray],
+        batch_size: int = 256,
+        concurrency: int = 1
+    ) -> Optional[int]:
+        """Завантаження у порожній індекс одним додаванням. None якщо індекс не порожній."""
+        if len(chunks) != len(embeddings):
+            raise ValueError("Number of chunks must match number of embeddings")
+        
+        if self._get_index().ntotal > len(self._deleted):
+            return None
+        indexed_count = self._add(chunks, embeddings)
+        self._persist()
+        return indexed_count
+    
+    def index_document_chunks_batch(
+        self,
+        chunks: List[DocumentChunk],
+        embeddings: List[np.ndarray],
+        batch_size: int = 100,
+        concurrency: int = 1
+    ) -> int:
+        """
+        Батчева індексація множинних чанків.
+        
+        concurrency приймається для сумісності з VectorStore: додавання
+        в in-process індекс серіалізується локом, паралельність не допомагає.
+        """
+        if len(chunks) != len(embeddings):
+            raise ValueError("Number of chunks must match number of embeddings")
+        
+        indexed_count = 0
+        total_chunks = len(chunks)
+        
+        for i in range(0, total_chunks, batch_size):
+            try:
+                indexed_count += self._add(chunks[i:i + batch_size], embeddings[i:i + batch_size])
+            except Exception as e:
+                logger.error(f"Failed to index batch {i//batch_size + 1}: {str(e)}")
+                continue
+        
+        if indexed_count:
+            self._persist()
+        
+        logger.info(f"Batch indexing completed: {indexed_count}/{total_chunks} chunks indexed")
+        return indexed_count
+    
+    @staticmethod
+    def _matches_filters(payload: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+        """Перевірка payload на фільтри з тією ж семантикою, що й у Qdrant."""
+        for field, value in filters.items():
+            actual = payload.get(field)
+            if isinstance(value, dict) and 'range' in value:
+                range_filter = value['range']
+                if actual is None:
+                    return False
+                if range_filter.get('gte') is not None and actual < range_filter['gte']:
+                    return False
+                if range_filter.get('lte') is not None and actual > range_filter['lte']:
+                    return False
+            elif isinstance(value, (list, tuple)) and actual not in value:
+                return False
+            elif isinstance(value, (str, int, float)) and actual != value:
+                return False
+        return True
+    
+    def search_similar(
+        self,
+        query_embedding: np.ndarray,
+        limit: int = None,
+        score_threshold: float = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]:
+        """Семантичний пошук схожих документів за ембедингом запиту."""
+        limit = limit or settings.default_limit
+        score_threshold = score_threshold or settings.similarity_threshold
+        
+        try:
+            vector = np.asarray(query_embedding, dtype=np.float32)
+            k = limit * self._OVERFETCH if (filters or self._deleted) else limit
+            
+            # Якщо tombstones або фільтри відкинули забагато кандидатів -
+            # розширюємо k, доки не набереться limit результатів або
+            # не закінчаться points вище порогу
+            while True:
+                generation = self._generation
+                total = max(1, self._get_index().ntotal)
+                scores, ids = self._batcher.submit(vector, min(k, total))
+                
+                with self._index_lock:
+                    if generation != self._generation:
+                        continue  # Індекс перебудовано під час пошуку - ID застаріли
+                    results, exhausted = self._collect_results(scores, ids, limit, score_threshold, filters)
+                
+                if len(results) >= limit or exhausted or k >= total:
+                    break
+                k *= 2
+            
+            logger.info(
+                f"Search completed: found {len(results)} results "
+                f"(threshold: {score_threshold}, limit: {limit})"
+            )
+            return results
+        
+        except Exception as e:
+            logger.error(f"Search failed: {str(e)}")
+            return []
+    
+    def _collect_results(
+        self,
+        scores: np.ndarray,
+        ids: np.ndarray,
+        limit: int,
+        score_threshold: float,
+        filters: Optional[Dict[str, Any]]
+    ) -> Tuple[List[SearchResult], bool]:
+        """
+        Живі результати пошуку, що проходять фільтри.
+        
+        Другий елемент - True, якщо кандидати вище порогу закінчились
+        і збільшення k нічого не додасть.
+        """
+        results = []
+        for score, point_id in zip(scores, ids):
+            # FAISS повертає результати за спаданням схожості, -1 = порожньо
+            if point_id < 0 or score < score_threshold:
+                return results, True
+            if point_id in self._deleted:
+                continue
+            
+            payload = self._payloads[point_id]
+            if filters and not self._matches_filters(payload, filters):
+                continue
+            
+            results.append(SearchResult(
+                chunk_id=payload.get('chunk_id', 'unknown'),
+                text=payload.get('text', ''),
+                score=float(score),
+                source_file=payload.get('source_file', ''),
+                metadata={
+                    key: value for key, value in payload.items()
+                    if key not in ['text', 'chunk_id', 'source_file']
+                }
+            ))
+            if len(results) >= limit:
+                break
+        
+        return results, False
+    
+    def search_by_text(
+        self,
+        query_text: str,
+        embedding_service,
+        limit: int = None,
+        score_threshold: float = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]:
+        """Зручний метод для пошуку за текстовим запитом."""
+        try:
+            query_embedding = embedding_service.encode_single(query_text)
+            return self.search_similar(
+                query_embedding=query_embedding,
+                limit=limit,
+                score_threshold=score_threshold,
+                filters=filters
+            )
+        except Exception as e:
+            logger.error(f"Text search failed for query '{query_text}': {str(e)}")
+            return []
+    
+    def delete_by_source_file(self, source_file: str) -> int:
+        """Позначає всі чанки файлу як видалені."""
+        with self._index_lock:
+            point_ids = [
+                point_id for point_id, payload in enumerate(self._payloads)
+                if payload.get("source_file") == source_file and point_id not in self._deleted
+            ]
+            for point_id in point_ids:
+                self._ids_by_chunk.pop(self._payloads[point_id]["chunk_id"], None)
+            self._deleted.update(point_ids)
+            self._maybe_compact()
+        
+        if point_ids:
+            self._persist()
+        
+        logger.info(f"Deleted {len(point_ids)} chunks from file: {source_file}")
+        return len(point_ids)
+    
+    def batch_delete(self, document_ids: List[str]) -> int:
+        """Позначає як видалені всі чанки множини документів за один прохід."""
+        targets = set(document_ids)
+        if not targets:
+            return 0
+        
+        with self._index_lock:
+            point_ids = [
+                point_id for point_id, payload in enumerate(self._payloads)
+                if payload.get("document_id") in targets and point_id not in self._deleted
+            ]
+            for point_id in point_ids:
+                self._ids_by_chunk.pop(self._payloads[point_id]["chunk_id"], None)
+            self._deleted.update(point_ids)
+            self._maybe_compact()
+        
+        if point_ids:
+            self._persist()
+        
+        logger.info(f"Deleted {len(point_ids)} chunks of {len(targets)} documents")
+        return len(point_ids)
+    
+    def _document_payloads(
+        self,
+        file_type: Optional[str] = None,
+        name_query: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Payload першого чанку кожного не видаленого документа."""
+        with self._index_lock:
+            payloads = [
+                payload for point_id, payload in enumerate(self._payloads)
+                if payload.get("chunk_index") == 0
+                and point_id not in self._deleted
+                and (not file_type or payload.get("file_type") == file_type)
+            ]
+        
+        if name_query:
+            file_names = [payload.get("file_name") or "" for payload in payloads]
+            payloads = [payloads[i] for i in match_names(file_names, name_query)]
+        return payloads
+    
+    def get_document_chunk_hashes(self, document_id: str) -> Dict[str, Optional[str]]:
+        """chunk_id -> content_hash для всіх не видалених чанків документа."""
+        with self._index_lock:
+            return {
+                payload["chunk_id"]: payload.get("content_hash")
+                for point_id, payload in enumerate(self._payloads)
+                if payload.get("document_id") == document_id and point_id not in self._deleted
+            }
+    
+    def replace_document_chunks(
+        self,
+        chunks: List[DocumentChunk],
+        embeddings: List[np.ndarray],
+        stale_chunk_ids: List[str]
+    ) -> int:
+        """Додає змінені чанки (замінюючи старі points) та видаляє зайві."""
+        if chunks:
+            self._add(chunks, embeddings)
+        
+        with self._index_lock:
+            for chunk_id in stale_chunk_ids:
+                point_id = self._ids_by_chunk.pop(chunk_id, None)
+                if point_id is not None:
+                    self._deleted.add(point_id)
+            self._maybe_compact()
+        
+        self._persist()
+        return len(chunks)
+    
+    def count_documents(self, file_type: Optional[str] = None, name_query: Optional[str] = None) -> int:
+        """Кількість документів серед не видалених points."""
+        return len(self._document_payloads(file_type, name_query))
+    
+    def scroll_documents(
+        self,
+        offset: int = 0,
+        limit: int = 20,
+        file_type: Optional[str] = None,
+        batch_size: int = 64,
+        name_query: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Генератор сторінки списку документів з in-process payloads."""
+        for payload in self._document_payloads(file_type, name_query)[offset:offset + limit]:
+            yield document_row(payload)
+    
+    def get_collection_stats(self) -> Dict[str, Any]:
+        """Отримання статистики індексу для моніторингу."""
+        try:
+            index = self._get_index()
+            return {
+                "collection_name": self.collection_name,
+                "backend": "faiss",
+                "points_count": index.ntotal - len(self._deleted),
+                "vectors_count": index.ntotal,
+                "indexed_vectors_count": index.ntotal,
+                "deleted_count": len(self._deleted),
+                "status": "green",
+                "hnsw_m": self.hnsw_m,
+                "ef_search": self.ef_search,
+            }
+        except Exception as e:
+            logger.error(f"Failed to get collection stats: {str(e)}")
+            return {"error": str(e)}
+    
+    def health_check(self) -> bool:
+        """Індекс здоровий, якщо FAISS доступний та індекс створено."""
+        try:
+            self._get_index()
+            return True
+        except Exception as e:
+            logger.error(f"Health check failed: {str(e)}")
+            return False
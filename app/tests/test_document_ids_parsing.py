@@ -0,0 +1,76 @@
+"""
+Тести _parse_document_ids - тіло batch запитів у JSON або msgpack.
+"""
+
+import json
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.api.endpoints import documents
+
+
+def _request(body: bytes, content_type: str) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/v1/documents/batch-delete",
+        "headers": [(b"content-type", content_type.encode("latin-1"))]
+    }
+    return Request(scope, receive)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content_type", ["application/json", "application/json; charset=utf-8", ""])
+async def test_json_list_of_strings(content_type):
+    request = _request(json.dumps(["a", "документ-2"]).encode("utf-8"), content_type)
+    
+    assert await documents._parse_document_ids(request) == ["a", "документ-2"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [b"{not json", b'{"ids": ["a"]}', b'["a", 1]', b'"a"'])
+async def test_invalid_json_is_400(body):
+    with pytest.raises(HTTPException) as error:
+        await documents._parse_document_ids(_request(body, "application/json"))
+    
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content_type", ["application/msgpack", "Application/X-Msgpack; charset=binary"])
+async def test_msgpack_list_of_strings(content_type):
+    msgpack = pytest.importorskip("msgpack")
+    request = _request(msgpack.packb(["a", "документ-2"]), content_type)
+    
+    assert await documents._parse_document_ids(request) == ["a", "документ-2"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_msgpack_is_400():
+    msgpack = pytest.importorskip("msgpack")
+    
+    for body in (b"\xc1", msgpack.packb({"ids": ["a"]}), msgpack.packb(["a", 1])):
+        with pytest.raises(HTTPException) as error:
+            await documents._parse_document_ids(_request(body, "application/msgpack"))
+        assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_msgpack_without_library_is_415(monkeypatch):
+    monkeypatch.setattr(documents, "msgpack", None)
+    
+    with pytest.raises(HTTPException) as error:
+        await documents._parse_document_ids(_request(b"\x91\xa1a", "application/msgpack"))
+    
+    assert error.value.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_json_parsed_without_orjson(monkeypatch):
+    monkeypatch.setattr(documents, "orjson", None)
+    
+    assert await documents._parse_document_ids(_request(b'["a"]', "application/json")) == ["a"]
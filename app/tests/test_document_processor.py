@@ -0,0 +1,117 @@
+"""
+Тести ковзного вікна DocumentProcessor.split_into_chunks.
+
+Слова в тестових текстах унікальні, тому перекриття сусідніх чанків
+однозначно визначається спільним суфіксом/префіксом слів.
+"""
+
+import pytest
+
+from app.services.document_processor import DocumentProcessor
+
+
+CHUNK_SIZE = 60
+CHUNK_OVERLAP = 15
+
+
+@pytest.fixture
+def processor():
+    # __init__ перевіряє documents_path з конфігурації - для розбиття
+    # тексту потрібні лише параметри чанків
+    processor = DocumentProcessor.__new__(DocumentProcessor)
+    processor.chunk_size = CHUNK_SIZE
+    processor.chunk_overlap = CHUNK_OVERLAP
+    return processor
+
+
+def _words(count: int, sentence_every: int = 0):
+    """Унікальні слова різної довжини; кожне sentence_every-те закінчує речення."""
+    words = []
+    for i in range(count):
+        word = f"w{i}" + "x" * (i % 7)
+        if sentence_every and (i + 1) % sentence_every == 0:
+            word += "."
+        words.append(word)
+    return words
+
+
+def _overlap_words(previous, current):
+    """Кількість слів, якими current перекриває кінець previous."""
+    for size in range(min(len(previous), len(current)), 0, -1):
+        if previous[-size:] == current[:size]:
+            return size
+    return 0
+
+
+def _chunk_words(processor, words):
+    chunks = processor.split_into_chunks(" ".join(words), {})
+    return chunks, [chunk.split() for chunk in chunks]
+
+
+def test_short_text_is_single_chunk(processor):
+    assert processor.split_into_chunks("коротка фраза", {}) == ["коротка фраза"]
+    assert processor.split_into_chunks("", {}) == []
+
+
+@pytest.mark.parametrize("sentence_every", [0, 3, 5, 11])
+def test_chunk_length_within_chunk_size(processor, sentence_every):
+    chunks, _ = _chunk_words(processor, _words(300, sentence_every))
+    
+    assert len(chunks) > 1
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks)
+
+
+@pytest.mark.parametrize("sentence_every", [0, 3, 5, 11])
+def test_overlap_bounded_by_chunk_overlap(processor, sentence_every):
+    _, chunk_words = _chunk_words(processor, _words(300, sentence_every))
+    
+    for previous, current in zip(chunk_words, chunk_words[1:]):
+        size = _overlap_words(previous, current)
+        assert len(" ".join(current[:size])) <= CHUNK_OVERLAP
+
+
+@pytest.mark.parametrize("sentence_every", [0, 3, 5, 11])
+def test_forward_progress_covers_all_words(processor, sentence_every):
+    words = _words(300, sentence_every)
+    _, chunk_words = _chunk_words(processor, words)
+    
+    # Кожен наступний чанк починається строго далі за попередній,
+    # а склеєні без перекриття чанки відтворюють весь текст
+    position = {word: i for i, word in enumerate(words)}
+    starts = [position[chunk[0]] for chunk in chunk_words]
+    assert starts == sorted(set(starts))
+    
+    rebuilt = list(chunk_words[0])
+    for previous, current in zip(chunk_words, chunk_words[1:]):
+        rebuilt.extend(current[_overlap_words(previous, current):])
+    assert rebuilt == words
+
+
+def test_word_longer_than_chunk_size_is_own_chunk(processor):
+    long_word = "y" * (CHUNK_SIZE * 2)
+    words = _words(20) + [long_word] + [f"z{i}" for i in range(20)]
+    
+    chunks, _ = _chunk_words(processor, words)
+    
+    assert long_word in chunks
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks if chunk != long_word)
+
+
+def test_chunk_snaps_to_sentence_end_in_second_half(processor):
+    # Кінець речення на ~40 символі з 60 - у другій половині вікна
+    first = "alpha beta gamma delta epsilon zeta eta."
+    words = first.split() + _words(40)
+    
+    chunks, _ = _chunk_words(processor, words)
+    
+    assert chunks[0] == first
+
+
+def test_sentence_end_in_first_half_is_ignored(processor):
+    # Кінець речення на ~10 символі - різати по ньому дає надто короткий чанк
+    words = ["alpha", "beta."] + _words(40)
+    
+    chunks, _ = _chunk_words(processor, words)
+    
+    assert chunks[0] != "alpha beta."
+    assert len(chunks[0]) > CHUNK_SIZE // 2
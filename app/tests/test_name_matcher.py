@@ -0,0 +1,51 @@
+"""
+Тести match_names - Python fallback без Hyperscan.
+"""
+
+import pytest
+
+from app.utils import name_matcher
+from app.utils.name_matcher import match_names
+
+
+NAMES = ["Звіт_2023.pdf", "notes.txt", "STRASSE.docx", "Straße plan.pdf", "звіт фінальний.docx"]
+
+
+@pytest.fixture(autouse=True)
+def no_hyperscan(monkeypatch):
+    monkeypatch.setattr(name_matcher, "hyperscan", None)
+
+
+def test_empty_query_matches_all():
+    assert match_names(NAMES, "") == list(range(len(NAMES)))
+
+
+def test_case_insensitive_substring_in_original_order():
+    assert match_names(NAMES, "ЗВІТ") == [0, 4]
+    assert match_names(NAMES, ".PDF") == [0, 3]
+
+
+def test_casefold_matches_sharp_s():
+    assert match_names(NAMES, "strasse") == [2, 3]
+
+
+def test_no_match():
+    assert match_names(NAMES, "missing") == []
+    assert match_names([], "звіт") == []
+
+
+def test_large_list_without_hyperscan_uses_fallback():
+    names = [f"doc_{i}.txt" for i in range(name_matcher.HYPERSCAN_MIN_CANDIDATES)]
+    
+    assert match_names(names, "DOC_4999.") == [4999]
+
+
+def test_newline_in_query_bypasses_hyperscan(monkeypatch):
+    class FailingHyperscan:
+        def __getattr__(self, name):
+            raise AssertionError("hyperscan must not be used")
+    
+    monkeypatch.setattr(name_matcher, "hyperscan", FailingHyperscan())
+    names = [f"doc_{i}.txt" for i in range(name_matcher.HYPERSCAN_MIN_CANDIDATES)]
+    
+    assert match_names(names, "doc\n") == []
@@ -0,0 +1,90 @@
+"""
+Тести _rate_limit_kernel над SoA масивами RateLimiter.
+
+Таблиця з 8 слотів при _PROBE_WINDOW = 8 - вікно пошуку покриває
+її повністю, тож переповнення відтворюється детерміновано.
+"""
+
+import numpy as np
+import pytest
+
+from app.api.dependencies import RateLimiter, _rate_limit_kernel
+
+
+MAX_REQUESTS = 3
+WINDOW_SECONDS = 60
+
+
+@pytest.fixture
+def limiter():
+    limiter = RateLimiter(max_requests=MAX_REQUESTS, window_seconds=WINDOW_SECONDS, max_clients=8)
+    assert limiter.capacity == RateLimiter._PROBE_WINDOW
+    return limiter
+
+
+def _check(limiter, key, now, home=0):
+    return _rate_limit_kernel(
+        limiter._ids, limiter._counts, limiter._starts,
+        np.uint64(key), home, float(now),
+        limiter.max_requests, limiter.window_seconds, RateLimiter._PROBE_WINDOW
+    )
+
+
+def test_counts_down_until_limit(limiter):
+    results = [_check(limiter, 42, 1000.0) for _ in range(MAX_REQUESTS + 1)]
+    
+    assert [bool(allowed) for allowed, _ in results] == [True, True, True, False]
+    assert [int(remaining) for _, remaining in results] == [2, 1, 0, 0]
+
+
+def test_window_reset_after_window_seconds(limiter):
+    for _ in range(MAX_REQUESTS):
+        _check(limiter, 42, 1000.0)
+    assert not _check(limiter, 42, 1000.0 + WINDOW_SECONDS)[0]
+    
+    allowed, remaining = _check(limiter, 42, 1000.0 + WINDOW_SECONDS + 1)
+    
+    assert allowed
+    assert remaining == MAX_REQUESTS - 1
+    slot = int(np.flatnonzero(limiter._ids == 42)[0])
+    assert limiter._counts[slot] == 1
+    assert limiter._starts[slot] == 1000.0 + WINDOW_SECONDS + 1
+
+
+def test_clients_are_tracked_independently(limiter):
+    for _ in range(MAX_REQUESTS):
+        _check(limiter, 1, 1000.0)
+    
+    assert not _check(limiter, 1, 1000.0)[0]
+    assert _check(limiter, 2, 1000.0)[0]
+
+
+def test_full_table_evicts_oldest_window(limiter):
+    # Всі слоти зайняті активними клієнтами, найстаріше вікно - у ключа 4
+    for key in range(1, 9):
+        _check(limiter, key, 1000.0 + (key - 4) % 8)
+    
+    allowed, remaining = _check(limiter, 99, 1010.0)
+    
+    assert allowed
+    assert remaining == MAX_REQUESTS - 1
+    assert 99 in limiter._ids
+    assert 4 not in limiter._ids
+    assert np.count_nonzero(limiter._ids) == 8
+
+
+def test_full_table_reuses_expired_slot_first(limiter):
+    # Ключі 2 та 5 прострочені (5 - найстаріший), решта активні
+    starts = {2: 1020.0, 5: 1000.0}
+    for key in range(1, 9):
+        limiter._ids[key - 1] = key
+        limiter._counts[key - 1] = 1
+        limiter._starts[key - 1] = starts.get(key, 1090.0)
+    
+    _check(limiter, 99, 1100.0)
+    
+    # Перевикористовується перший прострочений слот вікна пошуку,
+    # активні клієнти не витісняються
+    assert 99 in limiter._ids
+    assert 2 not in limiter._ids
+    assert all(key in limiter._ids for key in (1, 3, 4, 5, 6, 7, 8))
@@ -28,8 +28,11 @@ DocumentSearchException (базовий)
 """
 
 from typing import Optional, Dict, Any, List
+import sys
 import traceback
 
+from app.utils.logger import LazyLogData
+
 
 class DocumentSearchException(Exception):
     """
@@ -66,8 +69,13 @@ class DocumentSearchException(Exception):
         self.details = details or {}
         self.cause = cause
         
-        # Автоматично додаємо traceback для debugging
-        self.traceback_str = traceback.format_exc()
+        # Запам'ятовуємо активне виключення (якщо є) для debugging.
+        # lookup_lines=False - без читання джерел через linecache, а текст
+        # traceback форматується лише при зверненні до traceback_str
+        exc_type, exc_value, exc_tb = sys.exc_info()
+        self._context_tb = traceback.TracebackException(
+            exc_type, exc_value, exc_tb, lookup_lines=False
+        ) if exc_value is not None else None
         
         # Додаємо інформацію про оригінальну причину
         if cause:
@@ -76,6 +84,13 @@ class DocumentSearchException(Exception):
                 "message": str(cause)
             }
     
+    @property
+    def traceback_str(self) -> str:
+        """Traceback виключення, активного при створенні (як traceback.format_exc())."""
+        if self._context_tb is None:
+            return "NoneType: None\n"
+        return "".join(self._context_tb.format())
+    
     def to_dict(self) -> Dict[str, Any]:
         """
         Конвертує виключення в словник для API відповіді.
@@ -489,13 +504,16 @@ def log_exception(logger, exception: DocumentSearchException, context: Optional[
     Ця функція забезпечує консистентне логування всіх помилок
     з максимальною діагностичною інформацією.
     """
-    log_data = exception.get_debug_info()
-    if context:
-        log_data["context"] = context
+    def build_log_data() -> Dict[str, Any]:
+        log_data = exception.get_debug_info()
+        if context:
+            log_data["context"] = context
+        return log_data
     
+    # Traceback форматується лише якщо запис дійде до форматера
     logger.error(
-        f"Exception occurred: {exception.message}",
-        extra={"extra_data": log_data}
+        "Exception occurred: %s", exception.message,
+        extra={"extra_data": LazyLogData(build_log_data)}
     )
 
 
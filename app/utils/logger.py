@@ -13,17 +13,65 @@
 Використовуємо структуровані логи (JSON) для легкого парсингу системами моніторингу.
 """
 
+import atexit
+import copy
 import logging
 import logging.handlers
+import os
+import queue
 import sys
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable
+
+try:
+    import orjson
+except ImportError:  # orjson опціональний - fallback на stdlib json
+    orjson = None
 
 from app.config import settings
 
 
+# Опції orjson: numpy масиви/скаляри та не-рядкові ключі (як json.dumps)
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def json_dumps(data: Any) -> str:
+    """
+    Серіалізація структурованих даних логу в JSON рядок.
+    
+    orjson в кілька разів швидший за stdlib json і нативно підтримує
+    datetime, UUID та numpy - а кожен запит пише кілька JSON лог записів.
+    Невідомі типи, як і раніше, перетворюються через str().
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=_ORJSON_OPTIONS).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class LazyLogData:
+    """
+    Відкладене обчислення структурованих даних для логу.
+    
+    Передається в `extra={"extra_data": LazyLogData(fn)}` замість готового
+    словника. Функція викликається тільки коли запис реально форматується,
+    тому при відфільтрованому рівні логування словник не будується взагалі.
+    """
+    
+    __slots__ = ("_factory",)
+    
+    def __init__(self, factory: Callable[[], Dict[str, Any]]):
+        self._factory = factory
+    
+    def resolve(self) -> Dict[str, Any]:
+        """Будує словник з даними для логу."""
+        return self._factory()
+    
+    def __str__(self) -> str:
+        return json_dumps(self.resolve())
+
+
 class JSONFormatter(logging.Formatter):
     """
     Custom formatter для виводу логів у JSON форматі.
@@ -70,7 +118,10 @@ class JSONFormatter(logging.Formatter):
         
         # Додаємо додаткові дані, якщо передані через extra параметр
         if hasattr(record, 'extra_data'):
-            log_entry["extra"] = record.extra_data
+            extra_data = record.extra_data
+            if isinstance(extra_data, LazyLogData):
+                extra_data = extra_data.resolve()
+            log_entry["extra"] = extra_data
         
         # Додаємо контекстну інформацію для ML операцій
         if hasattr(record, 'operation_type'):
@@ -84,7 +135,7 @@ class JSONFormatter(logging.Formatter):
         if hasattr(record, 'user_context'):
             log_entry["user"] = record.user_context
         
-        return json.dumps(log_entry, ensure_ascii=False)
+        return json_dumps(log_entry)
 
 
 class ContextFilter(logging.Filter):
@@ -258,12 +309,109 @@ class MLOperationContext:
         )
 
 
+class _ThreadQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler для черги в межах одного процесу.
+    
+    Стандартний prepare форматує запис повністю (включно з traceback) та
+    видаляє exc_info - це потрібно лише для передачі між процесами. Тут
+    підставляються тільки args та знімок LazyLogData, а JSON форматування
+    й traceback виконує потік QueueListener.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        
+        # Знімок даних на момент логування - контекст запиту змінюється далі
+        extra_data = getattr(record, "extra_data", None)
+        if isinstance(extra_data, LazyLogData):
+            record.extra_data = extra_data.resolve()
+        
+        return record
+
+
+# Фоновий потік, що пише записи з черги в handlers, та PID процесу,
+# який його запустив: потоки не переживають fork, тож у дочірньому
+# процесі успадкований listener вже нічого не читає з черги
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+_queue_listener_pid: Optional[int] = None
+
+
+def stop_logging() -> None:
+    """
+    Дописує записи, що лишились у черзі, та зупиняє потік логування.
+    
+    Handlers listener повертаються напряму в root logger - записи після
+    зупинки (shutdown сервера) пишуться синхронно, а не губляться в черзі.
+    """
+    global _queue_listener
+    if _queue_listener is None:
+        return
+    
+    listener, _queue_listener = _queue_listener, None
+    # Потоку listener, успадкованого через fork, у цьому процесі немає
+    if _queue_listener_pid == os.getpid():
+        listener.stop()
+    
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, _ThreadQueueHandler):
+            root_logger.removeHandler(handler)
+    for handler in listener.handlers:
+        root_logger.addHandler(handler)
+
+
+# Записи в черзі не губляться, навіть якщо lifespan shutdown не виконався
+atexit.register(stop_logging)
+
+
+def _console_handler(log_level: int) -> logging.Handler:
+    """Handler для stdout: простий формат у DEBUG, JSON у production."""
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(log_level)
+    
+    # Для консолі використовуємо простий формат у development
+    if settings.log_level.upper() == "DEBUG":
+        console_formatter = logging.Formatter(
+            "%(asctime)s [%(levelname)8s] %(name)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        )
+    else:
+        # У production використовуємо JSON навіть для консолі
+        console_formatter = JSONFormatter()
+    
+    console_handler.setFormatter(console_formatter)
+    console_handler.addFilter(ContextFilter())
+    return console_handler
+
+
+def setup_worker_logging() -> None:
+    """
+    Логування в дочірніх процесах (initializer для ProcessPoolExecutor).
+    
+    QueueListener працює лише в головному процесі, а RotatingFileHandler
+    не можна безпечно ділити між процесами - тому worker пише напряму
+    в stdout тим самим форматом, що й консоль головного процесу.
+    """
+    log_level = getattr(logging, settings.log_level.upper(), logging.INFO)
+    
+    root_logger = logging.getLogger()
+    root_logger.handlers.clear()
+    root_logger.setLevel(log_level)
+    root_logger.addHandler(_console_handler(log_level))
+
+
 def setup_logging() -> None:
     """
     Головна функція налаштування системи логування.
     
-    Ця функція має викликатись один раз при старті додатку
-    для налаштування всіх логерів та handlers.
+    Викликається при старті кожного процесу сервера (lifespan startup),
+    а не при імпорті: після fork (gunicorn, uvicorn --workers) потік
+    QueueListener батьківського процесу не існує, і записи накопичувались
+    би в черзі без читача. Повторний виклик безпечний - попередній
+    listener зупиняється (або відкидається, якщо успадкований через fork).
     
     Архітектурний підхід:
     1. **Hierarchical Loggers** - різні рівні деталізації для різних компонентів
@@ -280,29 +428,20 @@ def setup_logging() -> None:
     log_dir.mkdir(exist_ok=True)
     
     # Очищуємо існуючі handlers (важливо для тестів)
+    stop_logging()
     root_logger = logging.getLogger()
     root_logger.handlers.clear()
     
+    # Handlers пишуть у stdout/файл синхронно під lock - у event loop це
+    # блокує всі запити на час запису. Тому root logger лише кладе запис
+    # у чергу, а handlers працюють у окремому потоці QueueListener
+    handlers = []
+    
     # Налаштовуємо root logger
     root_logger.setLevel(log_level)
     
     # === Console Handler для development ===
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(log_level)
-    
-    # Для консолі використовуємо простий формат у development
-    if settings.log_level.upper() == "DEBUG":
-        console_formatter = logging.Formatter(
-            "%(asctime)s [%(levelname)8s] %(name)s: %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-    else:
-        # У production використовуємо JSON навіть для консолі
-        console_formatter = JSONFormatter()
-    
-    console_handler.setFormatter(console_formatter)
-    console_handler.addFilter(ContextFilter())
-    root_logger.addHandler(console_handler)
+    handlers.append(_console_handler(log_level))
     
     # === File Handler для production логів ===
     if settings.log_file:
@@ -319,7 +458,14 @@ def setup_logging() -> None:
         file_handler.setLevel(log_level)
         file_handler.setFormatter(JSONFormatter())
         file_handler.addFilter(ContextFilter())
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    global _queue_listener, _queue_listener_pid
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(_ThreadQueueHandler(log_queue))
+    _queue_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
+    _queue_listener_pid = os.getpid()
     
     # === Спеціальні логери для різних компонентів ===
     
@@ -352,7 +498,7 @@ def setup_logging() -> None:
             "extra_data": {
                 "log_level": settings.log_level,
                 "log_file": str(settings.log_file) if settings.log_file else None,
-                "handlers_count": len(root_logger.handlers)
+                "handlers_count": len(handlers)
             }
         }
     )
@@ -429,8 +575,12 @@ def log_document_processing(logger: logging.Logger, file_path: str, chunks_count
 # Експортуємо основні функції для зручності використання
 __all__ = [
     "setup_logging",
+    "stop_logging",
+    "setup_worker_logging",
     "get_ml_logger", 
     "MLOperationLogger",
+    "LazyLogData",
+    "json_dumps",
     "log_api_request",
     "log_search_query",
     "log_document_processing"
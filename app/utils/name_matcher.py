@@ -0,0 +1,85 @@
+# Name matching utilities for document list filtering
+
+"""
+Пошук підрядка в назвах файлів для фільтра search_query.
+
+Для невеликих списків достатньо звичайного `in` по casefold рядках.
+Для великих (тисячі документів) використовується Hyperscan: всі назви
+склеюються в один буфер і скануються одним викликом SIMD DFA, а компільовані
+бази кешуються за запитом. Без hyperscan працює лише Python fallback.
+"""
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Sequence
+
+try:
+    import hyperscan
+except ImportError:  # hyperscan опціональний - без нього працює str fallback
+    hyperscan = None
+
+# Нижче цього порогу компіляція та підготовка буфера дорожчі за простий цикл
+HYPERSCAN_MIN_CANDIDATES = 5000
+
+# Назви файлів не містять перенос рядка, тому він безпечний як роздільник
+_SEPARATOR = b"\n"
+
+
+@lru_cache(maxsize=256)
+def _compile_database(query: str):
+    """Компіляція Hyperscan бази для одного літерального запиту (без урахування регістру)."""
+    database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    database.compile(
+        expressions=[re.escape(query).encode("utf-8")],
+        ids=[0],
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP]
+    )
+    return database
+
+
+def _match_hyperscan(names: Sequence[str], query: str) -> List[int]:
+    """Одне сканування склеєного буфера, match -> індекс назви через bisect."""
+    encoded = [name.encode("utf-8") for name in names]
+    
+    # starts[i] - байтовий offset початку i-ї назви у буфері
+    starts = []
+    position = 0
+    for name_bytes in encoded:
+        starts.append(position)
+        position += len(name_bytes) + 1
+    
+    matched = set()
+    
+    def on_match(pattern_id, start, end, flags, context):
+        matched.add(bisect_right(starts, end - 1) - 1)
+    
+    _compile_database(query).scan(_SEPARATOR.join(encoded), match_event_handler=on_match)
+    return sorted(matched)
+
+
+def match_names(names: Sequence[str], query: str) -> List[int]:
+    """
+    Індекси назв, що містять query (без урахування регістру), у вихідному порядку.
+    
+    Args:
+        names: Назви файлів
+        query: Підрядок для пошуку
+    
+    Returns:
+        List[int]: Відсортовані індекси співпадінь
+    """
+    if not query:
+        return list(range(len(names)))
+    
+    if hyperscan is not None and len(names) >= HYPERSCAN_MIN_CANDIDATES and "\n" not in query:
+        return _match_hyperscan(names, query)
+    
+    needle = query.casefold()
+    return [i for i, name in enumerate(names) if needle in name.casefold()]
+
+
+__all__ = [
+    "HYPERSCAN_MIN_CANDIDATES",
+    "match_names"
+]
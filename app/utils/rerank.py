@@ -0,0 +1,79 @@
+# Numeric score fusion for search result reranking
+
+"""
+Злиття векторного score з keyword boost та length normalization.
+
+Рядкова частина (перетин слів запиту та тексту) лишається в Python,
+а вся арифметика над score виконується одним циклом по numpy масивах.
+З numba цикл компілюється в native код, без неї працює як звичайна
+Python функція з тією ж семантикою.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba опціональна - без неї kernel працює як чистий Python
+    njit = None
+
+# Параметри ранжування - ті самі, що й у SearchService._post_process_results
+KEYWORD_BOOST_MAX = 0.1
+SHORT_TEXT_WORDS = 10
+LONG_TEXT_WORDS = 500
+SHORT_TEXT_PENALTY = 0.9
+LONG_TEXT_PENALTY = 0.95
+
+
+def _maybe_njit(func):
+    """numba.njit для гарячих числових функцій, якщо numba встановлена."""
+    if njit is None:
+        return func
+    return njit(cache=True, fastmath=True, nogil=True)(func)
+
+
+@_maybe_njit
+def _fuse_kernel(scores, keyword_matches, text_lengths, query_word_count, out):
+    """Score кожного результату в out - скалярна арифметика без алокацій."""
+    for i in range(scores.shape[0]):
+        score = scores[i]
+        
+        # Keyword Boost: частка слів запиту, знайдених у тексті
+        if keyword_matches[i] > 0:
+            boost = min(KEYWORD_BOOST_MAX, keyword_matches[i] / query_word_count * KEYWORD_BOOST_MAX)
+            score = min(1.0, score + boost)
+        
+        # Length Normalization: штраф для занадто коротких або довгих текстів
+        if text_lengths[i] < SHORT_TEXT_WORDS:
+            score *= SHORT_TEXT_PENALTY
+        elif text_lengths[i] > LONG_TEXT_WORDS:
+            score *= LONG_TEXT_PENALTY
+        
+        out[i] = score
+
+
+def fuse_scores(
+    scores: np.ndarray,
+    keyword_matches: np.ndarray,
+    text_lengths: np.ndarray,
+    query_word_count: int
+) -> np.ndarray:
+    """
+    Фінальні score результатів після keyword boost та length normalization.
+    
+    Args:
+        scores: Векторні score (float64)
+        keyword_matches: Кількість спільних слів запиту та тексту (int64)
+        text_lengths: Довжина текстів у словах (int64)
+        query_word_count: Кількість унікальних слів у запиті
+    
+    Returns:
+        np.ndarray: Нові score (float64) у тому ж порядку
+    """
+    out = np.empty_like(scores)
+    _fuse_kernel(scores, keyword_matches, text_lengths, max(1, query_word_count), out)
+    return out
+
+
+__all__ = [
+    "fuse_scores"
+]